@@ -0,0 +1,62 @@
+"""Throughput of response_check on a 404 heavy workload, against the BeautifulSoup version it replaced
+
+    python benchmarks/bench_errors.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bs4 import BeautifulSoup
+
+from nationstates_async.nsapiwrapper.exceptions import NotFound
+from nationstates_async.nsapiwrapper.objects import response_check
+
+
+def not_found_page(name):
+    # Roughly the size and shape of a real NationStates 404 page
+    nav = "".join('<li><a href="/page={0}">{0}</a></li>'.format(i) for i in range(60))
+    return ('<!DOCTYPE html><html><head><title>NationStates | Not Found</title>'
+            '<link rel="stylesheet" href="/ns.css"></head><body><div id="banner"><ul>{}</ul></div>'
+            '<div id="content"><h1>Unknown nation: "{}".</h1><p>It may have ceased to exist.</p></div>'
+            '</body></html>').format(nav, name)
+
+
+def response_check_previous(data):
+    # Only the 404 branch of the previous implementation
+    if data["status"] == 404:
+        raise NotFound(BeautifulSoup(data["xml"], "html.parser").h1.text)
+
+
+def workload(size=2000, missing=0.8):
+    # Mostly CTE'd nations, the rest found
+    responses = []
+    for i in range(size):
+        if i < size * missing:
+            responses.append({"status": 404, "xml": not_found_page("nation_{}".format(i))})
+        else:
+            responses.append({"status": 200, "xml": "<NATION><NAME>nation_{}</NAME></NATION>".format(i)})
+    return responses
+
+
+def check_all(check, responses):
+    messages = []
+    for data in responses:
+        try:
+            check(data)
+        except NotFound as exc:
+            messages.append(str(exc))
+    return messages
+
+
+def bench(responses, repeat=3):
+    assert check_all(response_check, responses) == check_all(response_check_previous, responses)
+    previous = min(timeit.repeat(lambda: check_all(response_check_previous, responses), number=1, repeat=repeat))
+    current = min(timeit.repeat(lambda: check_all(response_check, responses), number=1, repeat=repeat))
+    print("{} responses  previous {:9.0f}/s  current {:9.0f}/s  {:5.1f}x".format(
+        len(responses), len(responses) / previous, len(responses) / current, previous / current))
+
+
+if __name__ == "__main__":
+    bench(workload())
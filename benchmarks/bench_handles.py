@@ -0,0 +1,42 @@
+"""Memory and allocations per Nation handle
+
+    python benchmarks/bench_handles.py
+"""
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import nationstates_async as ns
+from nationstates_async.objects import Nation
+
+
+def measure(label, make, names):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    handles = [make(name) for name in names]
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    tracemalloc.stop()
+    print("{:<28} {:>7.0f} bytes/handle {:>5.1f} blocks/handle {:>7.3f}s (traced)".format(
+        label, current / len(names), blocks / len(names), elapsed))
+    return handles
+
+
+def main(count=100000):
+    api = ns.Nationstates("pynationstates benchmarks")
+    names = ["nation_number_{}".format(i) for i in range(count)]
+    measure("Nation()", lambda name: Nation(name, api), names)
+    handles = measure("Nationstates.nation()", api.nation, names)
+    # Every name again, with different spelling, all from the registry
+    measure("Nationstates.nation() again", api.nation, [name.replace("_", " ").title() for name in names])
+    del handles
+
+
+if __name__ == "__main__":
+    main()
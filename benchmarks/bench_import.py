@@ -0,0 +1,53 @@
+"""Import time of the package, fails if it goes over budget
+
+    python benchmarks/bench_import.py
+
+Each statement runs in a fresh interpreter with -X importtime,
+the best of several runs is compared against its budget in milliseconds.
+"""
+import os
+import subprocess
+import sys
+
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+budgets = (
+    ("import nationstates_async", 25),
+    ("from nationstates_async import Nationstates", 150),
+    ("from nationstates_async import Nationstates; Nationstates('bench').nation('testlandia')", 150),
+)
+
+
+def import_time(statement):
+    """Microseconds spent in imports by statement"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            cwd=root, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Only top level imports, their cumulative time covers the nested ones
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            total = total + int(cumulative)
+    return total
+
+
+def baseline():
+    # Whatever the interpreter imports on its own, site and such
+    return import_time("pass")
+
+
+def bench(runs=5):
+    base = min(baseline() for _ in range(runs))
+    over = False
+    for statement, budget in budgets:
+        elapsed = (min(import_time(statement) for _ in range(runs)) - base) / 1000
+        status = "ok" if elapsed <= budget else "OVER BUDGET"
+        over = over or elapsed > budget
+        print("{:8.1f}ms  budget {:4}ms  {:<12} {}".format(elapsed, budget, status, statement))
+    return over
+
+
+if __name__ == "__main__":
+    sys.exit(1 if bench() else 0)
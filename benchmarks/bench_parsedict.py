@@ -0,0 +1,61 @@
+"""Compares _parsedict against the implementation it replaced
+
+    python benchmarks/bench_parsedict.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from nationstates_async.nsapiwrapper.utils import _parsedict, parse, pyns_decode_entities
+from nationstates_async.objects import NSDict
+
+
+def _parsedict_previous(x, dicttype):
+    # The previous implementation, converts list elements up to three times
+    if isinstance(x, list):
+        gen_list = [dicttype(_parsedict_previous(y, dicttype)) if isinstance(
+            _parsedict_previous(y, dicttype), dicttype) else _parsedict_previous(y, dicttype) for y in x]
+        return gen_list
+    if isinstance(x, str):
+        return pyns_decode_entities(x)
+    if isinstance(x, dict):
+        newdicttype = dicttype()
+        for key in x.keys():
+            if key[0] in ["@", "#"]:
+                thiskey = key[1:].lower()
+            else:
+                thiskey = key.lower()
+            this_lower = _parsedict_previous(x[key], dicttype)
+            newdicttype[thiskey] = dicttype(this_lower) if isinstance(
+                this_lower, dicttype) else this_lower
+        return newdicttype
+    if x is None:
+        return None
+
+
+def census_xml(nations=30, scales=90):
+    scale = "".join('<SCALE id="{0}"><SCORE>{0}.5</SCORE><RANK>{0}</RANK><RRANK>{0}</RRANK></SCALE>'.format(i)
+                    for i in range(scales))
+    return "<WORLD><CENSUSRANKS>{}</CENSUSRANKS></WORLD>".format(
+        "".join("<NATIONS>{}</NATIONS>".format(scale) for _ in range(nations)))
+
+
+def deck_xml(cards=2000):
+    card = "<CARD><CARDID>{0}</CARDID><CATEGORY>common</CATEGORY><SEASON>2</SEASON></CARD>"
+    return "<CARDS><DECK>{}</DECK></CARDS>".format("".join(card.format(i) for i in range(cards)))
+
+
+def bench(name, xml, number=5):
+    tree = parse(xml)
+    assert _parsedict(tree, NSDict) == _parsedict_previous(tree, NSDict)
+    previous = min(timeit.repeat(lambda: _parsedict_previous(tree, NSDict), number=number, repeat=3)) / number
+    current = min(timeit.repeat(lambda: _parsedict(tree, NSDict), number=number, repeat=3)) / number
+    print("{:<8} previous {:8.2f}ms  current {:8.2f}ms  {:5.1f}x".format(
+        name, previous * 1000, current * 1000, previous / current))
+
+
+if __name__ == "__main__":
+    bench("census", census_xml())
+    bench("deck", deck_xml())
@@ -1,3 +1,26 @@
-from .main import Nationstates
-from .nsapiwrapper import Shard
-from . import exceptions
\ No newline at end of file
+import sys as _sys
+
+from . import exceptions
+
+__all__ = ["Nationstates", "Shard", "exceptions"]
+
+# Loaded on first use so importing the package stays cheap, see PEP 562
+_lazy = {
+    "Nationstates": ".main",
+    "Shard": ".nsapiwrapper.urls",
+}
+
+if _sys.version_info >= (3, 7):
+    def __getattr__(name):
+        if name not in _lazy:
+            raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+        from importlib import import_module
+        value = globals()[name] = getattr(import_module(_lazy[name], __name__), name)
+        return value
+
+    def __dir__():
+        return sorted(set(globals()) | set(_lazy))
+else:
+    # No module __getattr__ before 3.7
+    from .main import Nationstates
+    from .nsapiwrapper import Shard
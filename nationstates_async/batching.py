@@ -0,0 +1,108 @@
+"""Coalesces shard requests for the same target into one request"""
+import asyncio
+
+
+class _Batch:
+    def __init__(self, wrapper):
+        self.wrapper = wrapper
+        # dict keeps the order the shards were asked for
+        self.shards = dict()
+        # (future, shards) of every caller
+        self.callers = []
+        self.handle = None
+
+
+def _key(shard):
+    # Shards come back under their lowercased name
+    return str(shard).lower()
+
+
+class ShardBatcher:
+
+    """
+    Collects get_shards calls for the same nation/region/etc for a short window,
+    then sends them as one request (q=a+b+c) and hands every caller its part.
+
+    A caller gets the keys of the shards it asked for, plus whatever in the
+    response doesn't belong to any shard of the batch (like the id, or
+    unstatus for the wa shard). If the combined request fails, its callers
+    are retried one by one so a single bad shard only fails its own caller.
+    Only plain shards without parameters are batched.
+
+    """
+    def __init__(self, window, max_shards):
+        self.window = window
+        self.max_shards = max_shards
+        self.pending = dict()
+        # The loop only keeps weak references to tasks, these are the batches being sent
+        self.sending = set()
+
+    @staticmethod
+    def can_batch(shards):
+        for shard in shards:
+            if not isinstance(shard, str) and getattr(shard, "_tags", True):
+                return False
+        return bool(shards)
+
+    async def get_shards(self, wrapper, key, shards):
+        loop = asyncio.get_event_loop()
+        batch = self.pending.get(key)
+        if batch is None:
+            batch = self.pending[key] = _Batch(wrapper)
+            batch.handle = loop.call_later(self.window, self._flush, key, batch)
+        fut = loop.create_future()
+        batch.callers.append((fut, shards))
+        for shard in shards:
+            batch.shards[str(shard)] = None
+        if len(batch.shards) >= self.max_shards:
+            self._flush(key, batch)
+        return await fut
+
+    def _flush(self, key, batch):
+        if self.pending.get(key) is batch:
+            del self.pending[key]
+        batch.handle.cancel()
+        task = asyncio.ensure_future(self._send(batch))
+        self.sending.add(task)
+        task.add_done_callback(self.sending.discard)
+
+    @staticmethod
+    def _part(resp, shards, batch_keys):
+        """The part of a combined response that answers shards"""
+        if not isinstance(resp, dict):
+            return resp
+        wanted = set(_key(shard) for shard in shards)
+        # Each caller gets its own copy to mutate
+        return type(resp)((k, v) for k, v in resp.items() if k in wanted or k not in batch_keys)
+
+    async def _send_alone(self, batch, fut, shards):
+        try:
+            resp = await batch.wrapper.request(shards=tuple(shards), full_response=False)
+        except Exception as exc:
+            if not fut.done():
+                fut.set_exception(exc)
+            return
+        if not fut.done():
+            fut.set_result(resp)
+
+    async def _send(self, batch):
+        callers = [(fut, shards) for fut, shards in batch.callers if not fut.done()]
+        if not callers:
+            # Everyone gave up while the batch was collecting
+            return
+        try:
+            resp = await batch.wrapper.request(shards=tuple(batch.shards), full_response=False)
+        except Exception as exc:
+            if len(callers) == 1:
+                fut = callers[0][0]
+                if not fut.done():
+                    fut.set_exception(exc)
+                return
+            # Could be any one of the shards, find out whose by asking separately
+            await asyncio.gather(*(self._send_alone(batch, fut, shards) for fut, shards in callers
+                                   if not fut.done()))
+            return
+        batch_keys = set(_key(shard) for shard in batch.shards)
+        for fut, shards in callers:
+            if not fut.done():
+                fut.set_result(self._part(resp, shards, batch_keys))
@@ -0,0 +1,169 @@
+"""Fetching shards for many nations/regions at once
+
+    async for result in api.fetch_many(names, ["population", "region"]):
+        if result.ok:
+            print(result.name, result.data["population"])
+        else:
+            print(result.name, "failed:", result.error)
+
+Requests run at bulk priority, as many at once as the Api allows,
+and the rate limit paces them. Results come back in completion order.
+"""
+import asyncio
+import json
+
+from .nsapiwrapper.info import priority_bulk
+from .nsapiwrapper.urls import Shard
+from .objects import API_WRAPPER
+
+
+class FetchResult:
+    """Outcome of one target, either data or the exception its request raised"""
+    __slots__ = ("name", "index", "data", "error")
+
+    def __init__(self, name, index, data=None, error=None):
+        self.name = name
+        self.index = index
+        self.data = data
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        return "<FetchResult:'{}' {}>".format(self.name, "ok" if self.ok else type(self.error).__name__)
+
+
+class BulkFetch:
+
+    """
+    Async iterable of FetchResults, see Nationstates.fetch_many.
+
+    token is a string describing what has been handed out so far,
+    pass it as resume= with the same targets to continue an interrupted run.
+    A result only counts as done once the loop asks for the next one,
+    so the item being processed when a crawl dies is fetched again.
+
+    Breaking out of the loop leaves the queued requests running until
+    the loop is garbage collected, aclose() cancels them right away.
+
+    """
+    def __init__(self, api_mother, targets, shards, kind="nation", concurrency=None,
+                 resume=None, full_response=False, priority=priority_bulk):
+        if isinstance(shards, (str, Shard)):
+            shards = (shards,)
+        self.api_mother = api_mother
+        self.targets = targets
+        self.shards = tuple(shards)
+        self.kind = kind
+        self.concurrency = concurrency
+        self.full_response = full_response
+        self.priority = priority
+        self.position = 0
+        self.done = set()
+        self._iterator = None
+        if resume:
+            state = json.loads(resume)
+            self.position = state["position"]
+            self.done = set(state["done"])
+
+    @property
+    def token(self):
+        return json.dumps({"position": self.position, "done": sorted(self.done)})
+
+    def _mark_done(self, index):
+        self.done.add(index)
+        # Everything below position is done, only out of order completions are kept
+        while self.position in self.done:
+            self.done.remove(self.position)
+            self.position = self.position + 1
+
+    def _handle(self, target):
+        if isinstance(target, API_WRAPPER):
+            return target
+        if self.kind == "region":
+            return self.api_mother.region(target)
+        return self.api_mother.nation(target)
+
+    async def _targets(self):
+        index = 0
+        if hasattr(self.targets, "__aiter__"):
+            targets = self.targets.__aiter__()
+            try:
+                async for target in targets:
+                    if index >= self.position and index not in self.done:
+                        yield index, target
+                    index = index + 1
+            finally:
+                if hasattr(targets, "aclose"):
+                    await targets.aclose()
+        else:
+            for target in self.targets:
+                if index >= self.position and index not in self.done:
+                    yield index, target
+                index = index + 1
+
+    async def _fetch(self, index, target):
+        name = target
+        try:
+            # A bad name raises here, it's that target's error like any other
+            handle = self._handle(target)
+            name = getattr(handle, "nation_name", None) or getattr(handle, "region_name", None) or target
+            data = await handle.get_shards(*self.shards, full_response=self.full_response, priority=self.priority)
+            return FetchResult(name, index, data=data)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            return FetchResult(name, index, error=exc)
+
+    def __aiter__(self):
+        self._iterator = self._run()
+        return self._iterator
+
+    async def aclose(self):
+        """Cancels the requests still out, for when the loop stops early"""
+        if self._iterator is not None:
+            await self._iterator.aclose()
+
+    async def _run(self):
+        concurrency = self.concurrency or self.api_mother.max_requests_at_once
+        targets = self._targets()
+        pending = set()
+        # task -> (index, target)
+        started = dict()
+        exhausted = False
+        try:
+            while True:
+                # Keep just enough requests queued to use every slot,
+                # the rate limit decides when they're actually sent
+                while not exhausted and len(pending) < concurrency:
+                    try:
+                        index, target = await targets.__anext__()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    task = asyncio.ensure_future(self._fetch(index, target))
+                    started[task] = (index, target)
+                    pending.add(task)
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                results = []
+                for task in done:
+                    index, target = started.pop(task)
+                    if task.cancelled():
+                        # Cancelled from somewhere else, only this target failed
+                        name = getattr(target, "nation_name", None) or getattr(target, "region_name", None) or target
+                        results.append(FetchResult(name, index, error=asyncio.CancelledError()))
+                    else:
+                        results.append(task.result())
+                for result in sorted(results, key=lambda result: result.index):
+                    yield result
+                    self._mark_done(result.index)
+        finally:
+            await targets.aclose()
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,206 @@
+"""Response caching, sits between API_WRAPPER.request and the nsapiwrapper request"""
+from collections import OrderedDict
+from time import time as timestamp
+
+from .info import static_shards, volatile_shards, cache_static_ttl, cache_default_ttl, cache_max_entries, cache_max_bytes
+
+
+def _header(headers, name):
+    # Headers read back from disk are a plain dict
+    value = headers.get(name)
+    if value is None:
+        name = name.lower()
+        for key, value in headers.items():
+            if key.lower() == name:
+                return value
+    return value
+
+
+class CacheEntry:
+    """A stored response"""
+    __slots__ = ("response", "stored_at", "ttl", "size")
+
+    def __init__(self, response, stored_at, ttl, size):
+        self.response = response
+        self.stored_at = stored_at
+        self.ttl = ttl
+        self.size = size
+
+    def age(self, now=None):
+        return (timestamp() if now is None else now) - self.stored_at
+
+    def is_fresh(self, max_age=None, now=None):
+        return self.age(now) < (self.ttl if max_age is None else max_age)
+
+    def validators(self):
+        """Conditional request headers built from this response's ETag / Last-Modified"""
+        headers = self.response["headers"]
+        validators = dict()
+        etag = _header(headers, "ETag")
+        if etag:
+            validators["If-None-Match"] = etag
+        last_modified = _header(headers, "Last-Modified")
+        if last_modified:
+            validators["If-Modified-Since"] = last_modified
+        return validators
+
+
+class ResponseCache:
+
+    """
+    LRU cache of raw responses keyed by request url.
+
+    How long a response stays fresh depends on the shards requested.
+    Static shards (dbid, foundedtime, flag...) last cache_static_ttl,
+    volatile ones (happenings, messages...) are never cached,
+    anything else lasts default_ttl. ttl_policy maps shard names to seconds
+    to override that.
+
+    The cache is bounded both by amount of entries and total size of the responses.
+
+    Stale responses with an ETag or Last-Modified header are revalidated
+    with a conditional request, a 304 answer refreshes them without a download.
+
+    backend is an optional persistent store behind the in-memory one,
+    see diskcache.SQLiteCache. With replay=True anything stored counts as fresh,
+    which is meant for replaying a previous run offline.
+
+    """
+    def __init__(self, max_entries=cache_max_entries, max_bytes=cache_max_bytes,
+                 default_ttl=cache_default_ttl, static_ttl=cache_static_ttl, ttl_policy=None,
+                 backend=None, replay=False):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.static_ttl = static_ttl
+        self.ttl_policy = dict(ttl_policy) if ttl_policy else dict()
+        self.backend = backend
+        self.replay = replay
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.revalidations = 0
+        self.bytes_saved = 0
+
+    def shard_ttl(self, shard):
+        """Seconds a single shard stays fresh"""
+        name = str(shard)
+        if name in self.ttl_policy:
+            return self.ttl_policy[name]
+        if not name:
+            # Query only shards are commands, like verify
+            return 0
+        if name in volatile_shards:
+            return 0
+        if name in static_shards:
+            return self.static_ttl
+        return self.default_ttl
+
+    def ttl_for(self, shards):
+        """Seconds a response for these shards stays fresh"""
+        if not shards:
+            return self.default_ttl
+        return min(self.shard_ttl(shard) for shard in shards)
+
+    def get(self, key, max_age=None, now=None):
+        """Returns the stored response if it is still fresh, otherwise None"""
+        return self.fresh_response(key, self.lookup(key), max_age, now)
+
+    def fresh_response(self, key, entry, max_age=None, now=None):
+        """Counts a lookup that found entry (or None), returns its response if it is still fresh"""
+        if entry is not None and (self.replay or entry.is_fresh(max_age, now)):
+            if key in self.entries:
+                self.entries.move_to_end(key)
+            self.hits = self.hits + 1
+            return entry.response
+        self.misses = self.misses + 1
+        return None
+
+    def lookup(self, key):
+        """Returns the CacheEntry for key, fresh or not"""
+        entry = self.entries.get(key)
+        if entry is None and self.backend is not None:
+            stored = self.backend.get(key)
+            if stored is not None:
+                response, stored_at, ttl = stored
+                entry = self._store(key, response, stored_at, ttl)
+        return entry
+
+    def put(self, key, response, ttl, now=None):
+        if ttl <= 0:
+            return
+        now = timestamp() if now is None else now
+        if self.backend is not None:
+            self.backend.put(key, response, now, ttl)
+        self._store(key, response, now, ttl)
+        self.stores = self.stores + 1
+
+    def revalidated(self, key, entry, now=None):
+        """The server answered 304 Not Modified for a stale entry, it is fresh again
+
+            Called after the get that found the entry stale
+        """
+        now = timestamp() if now is None else now
+        entry.stored_at = now
+        if key in self.entries:
+            self.entries.move_to_end(key)
+        if self.backend is not None:
+            self.backend.touch(key, now)
+        # get counted the stale lookup as a miss, it's a revalidation instead
+        self.misses = self.misses - 1
+        self.revalidations = self.revalidations + 1
+        self.bytes_saved = self.bytes_saved + entry.size
+        return entry.response
+
+    def _store(self, key, response, stored_at, ttl):
+        size = len(response["xml"] or "")
+        if size > self.max_bytes:
+            return None
+        self._discard(key)
+        entry = self.entries[key] = CacheEntry(response, stored_at, ttl, size)
+        self.size = self.size + size
+        while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size = self.size - evicted.size
+            self.evictions = self.evictions + 1
+        return entry
+
+    def _discard(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size = self.size - entry.size
+
+    def discard(self, key):
+        self._discard(key)
+        if self.backend is not None:
+            self.backend.discard(key)
+
+    def clear(self):
+        """Clears the in-memory cache, the backend is left alone"""
+        self.entries.clear()
+        self.size = 0
+
+    def close(self):
+        if self.backend is not None:
+            self.backend.close()
+
+    def stats(self):
+        """Hit/miss statistics, every lookup counts as exactly one of hits, misses and revalidations"""
+        lookups = self.hits + self.misses + self.revalidations
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "revalidations": self.revalidations,
+            "bytes_saved": self.bytes_saved,
+            "entries": len(self.entries),
+            "bytes": self.size
+        }
+
+    def __len__(self):
+        return len(self.entries)
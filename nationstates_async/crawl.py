@@ -0,0 +1,219 @@
+"""Resumable crawls over many nations or regions
+
+The work queue and what has been completed live in a SQLite file,
+a crawl that dies can be started again with the same file and carries on.
+
+    async with Nationstates(user_agent) as api:
+        crawl = api.crawl("regions.crawl", region_shards, kind="region",
+                          sink=JSONLinesSink("regions.jsonl"))
+        await crawl.add_world()
+        await crawl.run(on_progress=print)
+
+Each result is handed to the sink before it's marked as done,
+so after a crash the sink may see the last result twice, but never misses one.
+"""
+import asyncio
+import json
+import sqlite3
+from collections import deque
+from time import time as timestamp
+
+from .bulk import BulkFetch
+from .objects import normalize_name
+
+PENDING = 0
+DONE = 1
+FAILED = 2
+
+_schema = """
+CREATE TABLE IF NOT EXISTS targets (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    state INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS targets_state ON targets (state, id);
+"""
+
+
+class JSONLinesSink:
+    """Appends one {"name": ..., "data": ...} line per result"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def write(self, name, data):
+        if self.file is None:
+            self.file = open(self.path, "a", encoding="utf-8")
+        self.file.write(json.dumps({"name": name, "data": data}) + "\n")
+        self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class MemorySink(dict):
+    """Keeps the results in memory, name -> data"""
+
+    def write(self, name, data):
+        self[name] = data
+
+    def close(self):
+        pass
+
+
+class CrawlProgress:
+    """Snapshot of a running crawl"""
+    __slots__ = ("done", "failed", "remaining", "elapsed", "requests_per_second", "eta")
+
+    def __init__(self, done, failed, remaining, elapsed, requests_per_second, eta):
+        self.done = done
+        self.failed = failed
+        self.remaining = remaining
+        self.elapsed = elapsed
+        self.requests_per_second = requests_per_second
+        self.eta = eta
+
+    @property
+    def total(self):
+        return self.done + self.failed + self.remaining
+
+    def __str__(self):
+        return "{}/{} done, {} failed, {:.2f} req/s, ETA {:.0f}s".format(
+            self.done + self.failed, self.total, self.failed, self.requests_per_second, self.eta)
+
+
+class Crawl:
+
+    """
+    Requests the same shards for every target in a work queue stored at path.
+
+    A sink is anything with write(name, data) and close(), write may be a coroutine.
+
+    Targets are deduplicated by normalized name. Targets that 404 are marked as failed,
+    so are ones that raise anything else, retry_failed() puts them back in the queue.
+
+    """
+    # Completions used to measure the current rate
+    rate_window = 60
+
+    def __init__(self, api_mother, path, shards, kind="region", sink=None, concurrency=None):
+        self.api_mother = api_mother
+        self.path = path
+        self.shards = shards
+        self.kind = kind
+        self.sink = MemorySink() if sink is None else sink
+        self.concurrency = concurrency
+        self.conn = None
+        self.started = None
+        self.completions = deque(maxlen=self.rate_window)
+
+    def _connection(self):
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.path)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(_schema)
+        return self.conn
+
+    def add(self, names):
+        """Queues names, returns how many weren't already known"""
+        conn = self._connection()
+        with conn:
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO targets (key, name) VALUES (?, ?)",
+                             ((normalize_name(name), name) for name in names))
+            return conn.total_changes - before
+
+    async def add_world(self):
+        """Queues every nation or region in the world, depending on kind"""
+        world = self.api_mother.world()
+        if self.kind == "region":
+            names = await world.lazy_regions(names_only=True)
+        else:
+            names = await world.lazy_nations(names_only=True)
+        return self.add(names)
+
+    def retry_failed(self):
+        conn = self._connection()
+        with conn:
+            return conn.execute("UPDATE targets SET state = ?, error = NULL WHERE state = ?", (PENDING, FAILED)).rowcount
+
+    def counts(self):
+        """(done, failed, remaining)"""
+        counts = dict(self._connection().execute("SELECT state, COUNT(*) FROM targets GROUP BY state"))
+        return counts.get(DONE, 0), counts.get(FAILED, 0), counts.get(PENDING, 0)
+
+    def failures(self):
+        """(name, error) of every failed target"""
+        return self._connection().execute("SELECT name, error FROM targets WHERE state = ? ORDER BY id", (FAILED,)).fetchall()
+
+    @property
+    def budget(self):
+        """Requests per second the rate limit allows"""
+        api = self.api_mother.api
+        if not api.ratelimit_enabled:
+            return float("inf")
+        return api.ratelimit_max / api.ratelimit_within
+
+    def progress(self):
+        done, failed, remaining = self.counts()
+        now = timestamp()
+        elapsed = now - self.started if self.started is not None else 0.0
+        rate = 0.0
+        if len(self.completions) > 1 and self.completions[-1] > self.completions[0]:
+            rate = (len(self.completions) - 1) / (self.completions[-1] - self.completions[0])
+        # Can't go faster than the rate limit, whatever the last few requests did
+        expected = min(rate, self.budget) if rate else self.budget
+        eta = remaining / expected if remaining and expected != float("inf") else 0.0
+        return CrawlProgress(done, failed, remaining, elapsed, rate, eta)
+
+    async def _pending(self, page=500):
+        conn = self._connection()
+        last = 0
+        while True:
+            rows = conn.execute("SELECT id, name FROM targets WHERE state = ? AND id > ? ORDER BY id LIMIT ?",
+                                (PENDING, last, page)).fetchall()
+            if not rows:
+                return
+            for last, name in rows:
+                yield name
+
+    async def run(self, on_progress=None):
+        """Works through the queue until it's empty, returns the final CrawlProgress
+            :param on_progress: called with a CrawlProgress after every result
+        """
+        conn = self._connection()
+        self.started = timestamp()
+        results = BulkFetch(self.api_mother, self._pending(), self.shards,
+                            kind=self.kind, concurrency=self.concurrency)
+        try:
+            async for result in results:
+                key = normalize_name(result.name)
+                if result.ok:
+                    written = self.sink.write(result.name, result.data)
+                    if asyncio.iscoroutine(written):
+                        await written
+                    with conn:
+                        conn.execute("UPDATE targets SET state = ? WHERE key = ?", (DONE, key))
+                else:
+                    error = "{}: {}".format(type(result.error).__name__, result.error)
+                    with conn:
+                        conn.execute("UPDATE targets SET state = ?, error = ? WHERE key = ?", (FAILED, error, key))
+                self.completions.append(timestamp())
+                if on_progress is not None:
+                    on_progress(self.progress())
+        finally:
+            # Cancels the requests still out if the loop stops early
+            await results.aclose()
+        return self.progress()
+
+    def close(self):
+        self.sink.close()
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
@@ -0,0 +1,183 @@
+"""SQLite storage for the response cache, shared across runs and processes"""
+import json
+import sqlite3
+from time import time as timestamp
+
+from .info import disk_cache_max_bytes, disk_cache_busy_timeout
+
+
+_schema = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    stored_at REAL NOT NULL,
+    ttl REAL NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    xml TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_stored_at ON responses (stored_at);
+"""
+
+
+class SQLiteCache:
+
+    """
+    Stores raw responses in a SQLite database in WAL mode.
+
+    Pass it as the backend of a ResponseCache, the in-memory cache stays in front of it:
+
+        cache = ResponseCache(backend=SQLiteCache("responses.db"))
+        api = Nationstates(user_agent, cache=cache)
+
+    Several processes can share one file. Responses are stored with their
+    status and headers (X-ratelimit-requests-seen, ETag, Last-Modified...).
+    Once the file holds more than max_bytes of responses the oldest are deleted.
+    readonly=True opens an existing file without ever writing to it, combined with
+    ResponseCache(replay=True) this replays a previous run offline.
+
+    Lookups and writes run on the event loop, so they only wait busy_timeout
+    seconds for another process's lock. A lookup that can't get it is a miss
+    and a write that can't get it is skipped.
+
+    """
+    def __init__(self, path, max_bytes=disk_cache_max_bytes, readonly=False, busy_timeout=disk_cache_busy_timeout):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.readonly = readonly
+        self.busy_timeout = busy_timeout
+        self.conn = None
+        self.size = None
+        # Lookups and writes given up because the file was locked
+        self.busy = 0
+
+    def _connection(self):
+        if self.conn is None:
+            if self.readonly:
+                conn = sqlite3.connect("file:{}?mode=ro".format(self.path), uri=True, timeout=self.busy_timeout)
+            else:
+                conn = sqlite3.connect(self.path, timeout=self.busy_timeout)
+            try:
+                if not self.readonly:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute("PRAGMA synchronous=NORMAL")
+                    conn.executescript(_schema)
+                self.size = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            except sqlite3.Error:
+                conn.close()
+                raise
+            self.conn = conn
+        return self.conn
+
+    def _locked(self, exc):
+        # sqlite3 only tells them apart by the message
+        message = str(exc)
+        if "locked" in message or "busy" in message:
+            self.busy = self.busy + 1
+            return True
+        return False
+
+    def get(self, key):
+        """Returns (response, stored_at, ttl) or None"""
+        try:
+            row = self._connection().execute(
+                "SELECT stored_at, ttl, status, headers, xml FROM responses WHERE url = ?", (key,)).fetchone()
+        except sqlite3.OperationalError as exc:
+            if self._locked(exc):
+                return None
+            raise
+        if row is None:
+            return None
+        stored_at, ttl, status, headers, xml = row
+        response = {
+            "response": None,
+            "xml": xml,
+            "request": None,
+            "status": status,
+            "headers": json.loads(headers),
+            "url": key
+        }
+        return response, stored_at, ttl
+
+    def put(self, key, response, stored_at, ttl):
+        if self.readonly:
+            return
+        xml = response["xml"] or ""
+        size = len(xml)
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             (key, stored_at, ttl, response["status"], json.dumps(dict(response["headers"])), size, xml))
+            # Other processes write too, this is only an estimate until the next trim
+            self.size = self.size + size
+            if self.size > self.max_bytes:
+                self.trim()
+        except sqlite3.OperationalError as exc:
+            if not self._locked(exc):
+                raise
+
+    def touch(self, key, stored_at):
+        """Marks a stored response as fresh again"""
+        if self.readonly:
+            return
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute("UPDATE responses SET stored_at = ? WHERE url = ?", (stored_at, key))
+        except sqlite3.OperationalError as exc:
+            if not self._locked(exc):
+                raise
+
+    def trim(self):
+        """Deletes the oldest responses until the file is within 90% of max_bytes"""
+        conn = self._connection()
+        target = self.max_bytes * 0.9
+        with conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > target:
+                removed = 0
+                cutoff = None
+                for stored_at, size in conn.execute("SELECT stored_at, size FROM responses ORDER BY stored_at"):
+                    removed = removed + size
+                    cutoff = stored_at
+                    if total - removed <= target:
+                        break
+                conn.execute("DELETE FROM responses WHERE stored_at <= ?", (cutoff,))
+            self.size = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def compact(self, max_age=None):
+        """Deletes responses older than max_age seconds, trims to size, and gives the space back to the OS"""
+        if self.readonly:
+            return
+        conn = self._connection()
+        # Maintenance, called outside of requests, so it waits for locks as long as it takes
+        conn.execute("PRAGMA busy_timeout = 30000")
+        try:
+            if max_age is not None:
+                with conn:
+                    conn.execute("DELETE FROM responses WHERE stored_at < ?", (timestamp() - max_age,))
+            self.trim()
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.execute("VACUUM")
+        finally:
+            conn.execute("PRAGMA busy_timeout = {:d}".format(int(self.busy_timeout * 1000)))
+
+    def discard(self, key):
+        if self.readonly:
+            return
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM responses WHERE url = ?", (key,))
+        except sqlite3.OperationalError as exc:
+            if not self._locked(exc):
+                raise
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
@@ -0,0 +1,214 @@
+"""Nationstates daily data dumps
+
+The dumps are gzip'd XML files of every nation and region, several hundred MB
+once decompressed. They are parsed as they are read, each nation/region is
+yielded as soon as its closing tag is seen and then dropped, so memory use
+stays flat no matter the size of the file.
+
+    async with Nationstates(user_agent) as api:
+        async for nation in api.dumps().stream("nations"):
+            print(nation.name, nation.region)
+
+Records are NSDicts with the same keys as parsed API responses.
+
+The download holds a request slot until the last record is read. A loop
+that stops early should aclose() the stream, otherwise the slot is only
+given back once the stream is garbage collected:
+
+    records = api.dumps().stream("nations")
+    try:
+        async for nation in records:
+            if nation.name == "Testlandia":
+                break
+    finally:
+        await records.aclose()
+"""
+import os
+import zlib
+from html import unescape
+
+
+from .nsapiwrapper.exceptions import BadResponse
+from .nsapiwrapper.info import priority_bulk
+from .nsapiwrapper.objects import response_check
+from .nsapiwrapper.utils import _TreeBuilder, LazyModule
+from .objects import NSDict
+
+aiohttp = LazyModule("aiohttp")
+
+DUMP_URLS = {
+    "nations": "https://www.nationstates.net/pages/nations.xml.gz",
+    "regions": "https://www.nationstates.net/pages/regions.xml.gz",
+}
+
+chunk_size = 64 * 1024
+
+_gzip_magic = b"\x1f\x8b"
+
+
+def dump_url(kind):
+    try:
+        return DUMP_URLS[kind]
+    except KeyError:
+        raise ValueError("Unknown dump {!r}, expected one of: {}".format(kind, ", ".join(sorted(DUMP_URLS))))
+
+
+class DumpParser:
+
+    """
+    Incremental dump parser, feed it bytes and it returns the records they completed.
+
+    Gzip'd input is detected and decompressed on the fly.
+
+    """
+    def __init__(self, dicttype=NSDict):
+        self.records = []
+        self.builder = _TreeBuilder(dicttype, item_depth=2, item_callback=self.records.append)
+        self.parser = self.builder.parser()
+        # The dumps use html entities expat doesn't know about,
+        # a foreign DTD makes expat hand them over instead of failing
+        self.parser.UseForeignDTD(True)
+        self.parser.SkippedEntityHandler = self._entity
+        self.decompressor = None
+        # Holds the first bytes until there are enough to tell if it's gzip'd
+        self.head = b""
+
+    def _entity(self, name, is_parameter_entity):
+        self.builder.characters(unescape("&{};".format(name)))
+
+    def feed(self, data, final=False):
+        """Parses the next chunk of the file, returns a list of the records completed by it"""
+        if self.head is not None:
+            data = self.head + data
+            if len(data) < len(_gzip_magic) and not final:
+                self.head = data
+                return []
+            self.head = None
+            if data.startswith(_gzip_magic):
+                self.decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self.decompressor is None:
+            self.parser.Parse(data, final)
+        else:
+            # Decompress in bounded pieces, the dumps compress very well
+            # and a single chunk can expand to many MB
+            while data:
+                self.parser.Parse(self.decompressor.decompress(data, chunk_size), False)
+                data = self.decompressor.unconsumed_tail
+            self.parser.Parse(self.decompressor.flush() if final else b"", final)
+        records = self.records[:]
+        del self.records[:]
+        return records
+
+    def close(self):
+        return self.feed(b"", final=True)
+
+
+def iter_dump(source, dicttype=NSDict, size=chunk_size):
+    """Yields the records of a local dump, source is a path or a binary file object.
+        Works on both the .xml.gz files and decompressed ones."""
+    if isinstance(source, (str, bytes, os.PathLike)):
+        with open(source, "rb") as f:
+            for record in iter_dump(f, dicttype, size):
+                yield record
+        return
+    parser = DumpParser(dicttype)
+    while True:
+        data = source.read(size)
+        if not data:
+            break
+        for record in parser.feed(data):
+            yield record
+    for record in parser.close():
+        yield record
+
+
+class Dumps:
+
+    """
+    Access to the daily dumps. Downloads go through the same session,
+    request slots and rate limit as API requests, at bulk priority.
+    The slot is held while records are read, see the module docstring.
+
+    """
+    def __init__(self, api_mother):
+        self.api_mother = api_mother
+
+    @property
+    def dicttype(self):
+        return NSDict if self.api_mother.use_nsdict else dict
+
+    def _timeout(self):
+        # A dump takes a while to download, only a stalled one times out
+        timeout = self.api_mother.api.timeout
+        return aiohttp.ClientTimeout(total=None, connect=timeout.connect, sock_read=timeout.sock_read)
+
+    async def _chunks(self, kind, size):
+        api = self.api_mother.api
+        url = dump_url(kind)
+        # The slot also waits for the rate limit
+        async with api.slot(priority_bulk):
+            headers = {"User-Agent": api.user_agent}
+            if api.use_session:
+                session = await api.get_session()
+                chunks = self._download(session, url, headers, size)
+                try:
+                    async for chunk in chunks:
+                        yield chunk
+                finally:
+                    # Closed right away, not when garbage collected, see stream
+                    await chunks.aclose()
+            else:
+                async with aiohttp.ClientSession(timeout=self._timeout()) as session:
+                    chunks = self._download(session, url, headers, size)
+                    try:
+                        async for chunk in chunks:
+                            yield chunk
+                    finally:
+                        await chunks.aclose()
+
+    async def _download(self, session, url, headers, size):
+        async with session.get(url, headers=headers, timeout=self._timeout()) as response:
+            if response.status != 200:
+                response_check({
+                    "status": response.status,
+                    "xml": await response.text(),
+                    "response": response
+                })
+                raise BadResponse("Dump download failed with status {}".format(response.status))
+            async for chunk in response.content.iter_chunked(size):
+                yield chunk
+
+    async def stream(self, kind, size=chunk_size):
+        """Downloads a dump and yields its records as they are parsed, nothing is written to disk
+            :param kind: "nations" or "regions"
+
+            Holds a request slot until exhausted, aclose() it when stopping early
+        """
+        parser = DumpParser(self.dicttype)
+        chunks = self._chunks(kind, size)
+        try:
+            async for chunk in chunks:
+                for record in parser.feed(chunk):
+                    yield record
+        finally:
+            # So aclose() on the stream gives the slot and connection back right away
+            await chunks.aclose()
+        for record in parser.close():
+            yield record
+
+    async def download(self, kind, path, size=chunk_size):
+        """Saves a dump to path as is (gzip'd), for later use with iter_file
+            :returns: path
+        """
+        chunks = self._chunks(kind, size)
+        try:
+            with open(path, "wb") as f:
+                async for chunk in chunks:
+                    f.write(chunk)
+        finally:
+            await chunks.aclose()
+        return path
+
+    def iter_file(self, source, size=chunk_size):
+        """Yields the records of a dump saved locally"""
+        return iter_dump(source, self.dicttype, size)
@@ -0,0 +1,462 @@
+"""Columnar in-memory store for dump records
+
+Every field is kept in a flat array with one slot per nation/region:
+numbers in array('d') (NaN when missing), repeated strings like region
+names are interned (case insensitively) into a table and stored as array('I') codes,
+and unique strings like names are one utf-8 blob plus offsets.
+
+    store = DumpStore.from_dump("nations.xml.gz")
+    rows = store.filter(region="the_pacific", population=(1000, None))
+    print(store.names(rows))
+    print(store.top(65, 10), store.rank("testlandia", 65))
+    store.save("nations.store")
+
+    store = DumpStore.load("nations.store")
+
+The saved file is laid out so it can be memory mapped,
+loading it only reads the header, the arrays are views into the mapping.
+"""
+import json
+import mmap
+import sys
+import zlib
+from array import array
+
+from .dumps import iter_dump
+from .objects import normalize_name
+
+NAN = float("nan")
+
+_magic = b"NSDSTOR1"
+
+default_fields = {
+    "nations": {
+        "strings": ("name", "fullname"),
+        "interned": ("region", "category", "unstatus"),
+        "numbers": ("population", "issues_answered", "firstlogin", "lastlogin", "dbid"),
+    },
+    "regions": {
+        "strings": ("name", "delegate", "founder"),
+        "interned": ("power",),
+        "numbers": ("numnations", "delegatevotes", "lastupdate", "dbid"),
+    },
+}
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return NAN
+
+def _scales(record):
+    census = record.get("census")
+    if not isinstance(census, dict):
+        return ()
+    scales = census.get("scale", ())
+    return scales if isinstance(scales, list) else (scales,)
+
+def _pad(size):
+    return -size % 8
+
+
+class _Strings:
+    """Read only sequence of strings stored as one utf-8 blob and offsets"""
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i = i + len(self)
+        return bytes(self.blob[self.offsets[i]:self.offsets[i+1]]).decode("utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class _Interned:
+    """Read only sequence of interned strings, codes index into table"""
+
+    def __init__(self, codes, table):
+        self.codes = codes
+        self.table = table
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, i):
+        return self.table[self.codes[i]]
+
+    def __iter__(self):
+        table = self.table
+        for code in self.codes:
+            yield table[code]
+
+
+class DumpStore:
+
+    """
+    Columnar store of nation or region dump records.
+
+    Indexes:
+        names     - open addressing hash table on the normalized name
+        interned  - rows grouped by value for every interned column (region...)
+        census    - rows sorted by score for every census id
+
+    Use from_records/from_dump to build one, load to open a saved one.
+
+    """
+    def __init__(self, kind, count, strings, interned, numbers, census, sections, mapping=None):
+        self.kind = kind
+        self.count = count
+        self.strings = strings
+        self.interned = interned
+        self.numbers = numbers
+        self.census = census
+        self.sections = sections
+        self.mapping = mapping
+        self._codes = dict()
+
+    # Building
+
+    @classmethod
+    def from_records(cls, records, kind="nations", strings=None, interned=None, numbers=None):
+        """Builds a store from parsed dump records, in a single pass"""
+        fields = default_fields[kind]
+        strings = tuple(fields["strings"] if strings is None else strings)
+        interned = tuple(fields["interned"] if interned is None else interned)
+        numbers = tuple(fields["numbers"] if numbers is None else numbers)
+
+        blobs = {field: bytearray() for field in strings}
+        offsets = {field: array("Q", [0]) for field in strings}
+        codes = {field: array("I") for field in interned}
+        tables = {field: [] for field in interned}
+        lookups = {field: dict() for field in interned}
+        values = {field: array("d") for field in numbers}
+        scores = dict()
+        count = 0
+
+        for record in records:
+            for field in strings:
+                value = record.get(field)
+                blobs[field].extend((value if isinstance(value, str) else "").encode("utf-8"))
+                offsets[field].append(len(blobs[field]))
+            for field in interned:
+                value = record.get(field)
+                value = value if isinstance(value, str) else ""
+                # Interned case insensitively, the first spelling seen is kept
+                key = normalize_name(value)
+                lookup = lookups[field]
+                code = lookup.get(key)
+                if code is None:
+                    code = lookup[key] = len(tables[field])
+                    tables[field].append(value)
+                codes[field].append(code)
+            for field in numbers:
+                values[field].append(_number(record.get(field)))
+            for scale in _scales(record):
+                column = scores.get(scale.get("id"))
+                if column is None:
+                    column = scores[scale.get("id")] = array("d")
+                if len(column) < count:
+                    # Rows without this census id
+                    column.extend(array("d", [NAN]) * (count - len(column)))
+                column.append(_number(scale.get("score")))
+            count = count + 1
+
+        sections = dict()
+        for field in strings:
+            sections["strings/{}/blob".format(field)] = blobs[field]
+            sections["strings/{}/offsets".format(field)] = offsets[field]
+        for field in interned:
+            sections["interned/{}/codes".format(field)] = codes[field]
+            groups, rows = cls._group(codes[field], len(tables[field]))
+            sections["interned/{}/groups".format(field)] = groups
+            sections["interned/{}/rows".format(field)] = rows
+        for field in numbers:
+            sections["numbers/{}".format(field)] = values[field]
+        census = sorted(scores, key=int)
+        for censusid in census:
+            column = scores[censusid]
+            column.extend(array("d", [NAN]) * (count - len(column)))
+            sections["census/{}/scores".format(censusid)] = column
+            # Sorted descending then flipped, so ties come out in dump order from top()
+            order = sorted((i for i in range(count) if column[i] == column[i]), key=column.__getitem__, reverse=True)
+            order.reverse()
+            sections["census/{}/order".format(censusid)] = array("I", order)
+        if "name" in strings:
+            sections["names"] = cls._hash_names(_Strings(blobs["name"], offsets["name"]))
+        return cls(kind, count, strings, tables, numbers, census, sections)
+
+    @classmethod
+    def from_dump(cls, source, kind="nations", **fields):
+        """Builds a store straight from a dump file, see dumps.iter_dump"""
+        return cls.from_records(iter_dump(source, dict), kind, **fields)
+
+    @staticmethod
+    def _group(codes, size):
+        # Counting sort, rows[groups[code]:groups[code+1]] are the rows with that code
+        groups = array("Q", [0]) * (size + 1)
+        for code in codes:
+            groups[code+1] = groups[code+1] + 1
+        for i in range(size):
+            groups[i+1] = groups[i+1] + groups[i]
+        position = array("Q", groups)
+        rows = array("I", [0]) * len(codes)
+        for row, code in enumerate(codes):
+            rows[position[code]] = row
+            position[code] = position[code] + 1
+        return groups, rows
+
+    @staticmethod
+    def _hash_names(names):
+        size = 8
+        while size < len(names) * 2:
+            size = size * 2
+        mask = size - 1
+        # Slots hold row + 1, 0 is empty
+        table = array("I", [0]) * size
+        for row, name in enumerate(names):
+            slot = zlib.crc32(normalize_name(name).encode("utf-8")) & mask
+            while table[slot]:
+                slot = (slot + 1) & mask
+            table[slot] = row + 1
+        return table
+
+    # Saving and loading
+
+    def save(self, path):
+        """Writes the store to path in a format load can memory map"""
+        layout = dict()
+        position = 0
+        for name, section in self.sections.items():
+            data = memoryview(section)
+            layout[name] = [position, data.format, len(data)]
+            position = position + data.nbytes + _pad(data.nbytes)
+        header = json.dumps({
+            "kind": self.kind,
+            "count": self.count,
+            "byteorder": sys.byteorder,
+            "strings": self.strings,
+            "interned": self.interned,
+            "numbers": self.numbers,
+            "census": self.census,
+            "sections": layout
+        }).encode("utf-8")
+        with open(path, "wb") as f:
+            f.write(_magic)
+            f.write(len(header).to_bytes(8, "little"))
+            f.write(header)
+            f.write(b"\0" * _pad(len(header)))
+            for section in self.sections.values():
+                data = memoryview(section)
+                f.write(data)
+                f.write(b"\0" * _pad(data.nbytes))
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """Opens a saved store, the arrays are views into a read only memory mapping"""
+        with open(path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mapping[:len(_magic)] != _magic:
+            mapping.close()
+            raise ValueError("{} is not a saved DumpStore".format(path))
+        length = int.from_bytes(mapping[8:16], "little")
+        header = json.loads(mapping[16:16+length].decode("utf-8"))
+        if header["byteorder"] != sys.byteorder:
+            mapping.close()
+            raise ValueError("{} was saved on a {} endian machine".format(path, header["byteorder"]))
+        start = 16 + length + _pad(length)
+        view = memoryview(mapping)
+        sections = dict()
+        for name, (offset, typecode, size) in header["sections"].items():
+            itemsize = array(typecode).itemsize
+            sections[name] = view[start+offset:start+offset+size*itemsize].cast(typecode)
+        return cls(header["kind"], header["count"], tuple(header["strings"]), header["interned"],
+                   tuple(header["numbers"]), header["census"], sections, mapping)
+
+    def close(self):
+        """Releases the memory mapping of a loaded store
+
+            Columns still held by the caller keep the mapping alive,
+            it's closed by the garbage collector once they're gone.
+        """
+        if self.mapping is not None:
+            for section in self.sections.values():
+                try:
+                    section.release()
+                except BufferError:
+                    # Something sliced it and still holds the slice
+                    pass
+            self.sections = dict()
+            try:
+                self.mapping.close()
+            except BufferError:
+                pass
+            self.mapping = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    # Columns
+
+    def __len__(self):
+        return self.count
+
+    def column(self, field):
+        """Sequence of a field's values, one per row"""
+        if field in self.strings:
+            return _Strings(self.sections["strings/{}/blob".format(field)],
+                            self.sections["strings/{}/offsets".format(field)])
+        if field in self.interned:
+            return _Interned(self.sections["interned/{}/codes".format(field)], self.interned[field])
+        if field in self.numbers:
+            return self.sections["numbers/{}".format(field)]
+        raise KeyError(field)
+
+    def census_column(self, censusid):
+        """Scores of a census id, one per row, NaN where missing"""
+        return self.sections["census/{}/scores".format(censusid)]
+
+    def value(self, row, field):
+        return self.column(field)[row]
+
+    def record(self, row):
+        """All stored fields of a row as a dict, census scores under "census" """
+        result = {field: self.value(row, field) for field in self.strings + tuple(self.interned) + self.numbers}
+        census = dict()
+        for censusid in self.census:
+            score = self.census_column(censusid)[row]
+            if score == score:
+                census[censusid] = score
+        result["census"] = census
+        return result
+
+    def names(self, rows):
+        names = self.column("name")
+        return [names[row] for row in rows]
+
+    def records(self, rows):
+        return [self.record(row) for row in rows]
+
+    # Indexes
+
+    def find(self, name):
+        """Row of a nation/region by name, or None"""
+        table = self.sections.get("names")
+        if table is None:
+            raise KeyError("This store has no name column")
+        names = self.column("name")
+        key = normalize_name(name)
+        mask = len(table) - 1
+        slot = zlib.crc32(key.encode("utf-8")) & mask
+        while table[slot]:
+            row = table[slot] - 1
+            if normalize_name(names[row]) == key:
+                return row
+            slot = (slot + 1) & mask
+        return None
+
+    def __contains__(self, name):
+        return self.find(name) is not None
+
+    def __getitem__(self, name):
+        row = self.find(name)
+        if row is None:
+            raise KeyError(name)
+        return self.record(row)
+
+    def code(self, field, value):
+        """Interned code of a value, compared normalized, or None"""
+        codes = self._codes.get(field)
+        if codes is None:
+            codes = self._codes[field] = {normalize_name(v): i for i, v in enumerate(self.interned[field])}
+        return codes.get(normalize_name(value))
+
+    def rows_where(self, field, value):
+        """Rows whose interned field equals value, without scanning"""
+        code = self.code(field, value)
+        if code is None:
+            return []
+        groups = self.sections["interned/{}/groups".format(field)]
+        # A copy, a slice of a loaded store would pin its memory mapping
+        return self.sections["interned/{}/rows".format(field)][groups[code]:groups[code+1]].tolist()
+
+    def filter(self, **conditions):
+        """Rows matching every condition
+
+            Interned and string fields match a value (case insensitively),
+            number fields take a (low, high) inclusive range with None for open ends,
+            any field can also take a function returning a bool.
+
+            store.filter(region="the_pacific", population=(1000, None))
+        """
+        rows = None
+        checks = []
+        for field, condition in conditions.items():
+            if field in self.interned and not callable(condition):
+                # Narrow down with the index, the smallest group first would be better
+                # but a single interned condition is the usual case
+                if rows is None:
+                    rows = self.rows_where(field, condition)
+                    continue
+            checks.append((self.column(field), self._check(field, condition)))
+        if rows is None:
+            rows = range(self.count)
+        return [row for row in rows if all(check(column[row]) for column, check in checks)]
+
+    def _check(self, field, condition):
+        if callable(condition):
+            return condition
+        if field in self.numbers:
+            low, high = condition
+            return lambda v: v == v and (low is None or v >= low) and (high is None or v <= high)
+        key = normalize_name(condition)
+        return lambda v: normalize_name(v) == key
+
+    def _census_bisect(self, censusid, score, right=False):
+        # Position of score in the ascending order, before equal scores or after them with right
+        scores = self.census_column(censusid)
+        order = self.sections["census/{}/order".format(censusid)]
+        low, high = 0, len(order)
+        while low < high:
+            middle = (low + high) // 2
+            value = scores[order[middle]]
+            if value < score or (right and value == score):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def census_between(self, censusid, low=None, high=None):
+        """Rows with a census score in [low, high), lowest score first"""
+        order = self.sections["census/{}/order".format(censusid)]
+        start = 0 if low is None else self._census_bisect(censusid, low)
+        end = len(order) if high is None else self._census_bisect(censusid, high)
+        return order[start:end].tolist()
+
+    def top(self, censusid, amount=10):
+        """Rows with the highest scores for a census id, highest first"""
+        order = self.sections["census/{}/order".format(censusid)]
+        return [order[i] for i in range(len(order) - 1, max(len(order) - amount, 0) - 1, -1)]
+
+    def rank(self, name, censusid):
+        """World rank in a census, 1 is the highest score and ties share a rank. None if unranked"""
+        row = self.find(name)
+        if row is None:
+            return None
+        score = self.census_column(censusid)[row]
+        if score != score:
+            return None
+        order = self.sections["census/{}/order".format(censusid)]
+        return len(order) - self._census_bisect(censusid, score, right=True) + 1
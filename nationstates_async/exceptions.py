@@ -1,6 +1,8 @@
 from .nsapiwrapper.exceptions import (
     NSBaseError,
     RateLimitReached, 
+    DeadlineExceeded,
+    CircuitOpen,
     NSServerBaseException, 
     APIError, 
     Forbidden,
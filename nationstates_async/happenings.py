@@ -0,0 +1,99 @@
+"""Following world happenings as they happen
+
+    async for event in api.world().stream_happenings(filters=["law", "change"]):
+        print(event["id"], event["text"])
+
+The stream remembers the id of the last event it handed out (sinceid),
+so nothing is yielded twice and a stream can be restarted from stream.sinceid.
+It only polls when the loop asks for more events, a slow consumer just means
+fewer requests. Polls are normal requests, they count against the rate limit.
+"""
+import asyncio
+
+from .info import happenings_poll_interval, happenings_min_interval, happenings_max_interval, happenings_limit
+from .nsapiwrapper.urls import Shard
+
+
+def _events(happenings):
+    # No events parses to None, one event to a dict
+    if not isinstance(happenings, dict):
+        return []
+    events = happenings.get("event") or []
+    return events if isinstance(events, list) else [events]
+
+
+class HappeningsStream:
+
+    """
+    Async iterable of happenings, oldest first. See World.stream_happenings.
+
+    The poll interval halves after a poll that found events and grows by half
+    after an empty one, staying between min_interval and max_interval.
+
+    """
+    def __init__(self, world, filters=None, view=None, poll_interval=happenings_poll_interval,
+                 min_interval=happenings_min_interval, max_interval=happenings_max_interval,
+                 limit=happenings_limit, sinceid=None):
+        if isinstance(filters, str):
+            filters = (filters,)
+        self.world = world
+        self.filters = tuple(filters) if filters else ()
+        self.view = view
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min(max(poll_interval, min_interval), max_interval)
+        self.limit = limit
+        self.sinceid = sinceid
+
+    def _shard(self, **params):
+        if self.filters:
+            params["filter"] = "+".join(self.filters)
+        if self.view:
+            params["view"] = self.view
+        return Shard("happenings", limit=self.limit, **params)
+
+    async def _request(self, **params):
+        resp = await self.world.get_shards(self._shard(**params), cache=False)
+        return _events(resp.get("happenings"))
+
+    async def poll(self):
+        """Events newer than sinceid, oldest first. Without a sinceid, the latest page of events"""
+        if self.sinceid is None:
+            events = await self._request()
+            return sorted(events, key=lambda event: int(event["id"]))
+        events = await self._request(sinceid=self.sinceid)
+        page = events
+        # A full page may mean there were more, page back until the gap is closed
+        while len(page) >= self.limit:
+            oldest = min(int(event["id"]) for event in page)
+            page = [event for event in await self._request(sinceid=self.sinceid, beforeid=oldest)
+                    if int(event["id"]) < oldest]
+            events.extend(page)
+        unique = dict()
+        for event in events:
+            if int(event["id"]) > self.sinceid:
+                unique[int(event["id"])] = event
+        return [unique[eventid] for eventid in sorted(unique)]
+
+    def _adapt(self, found):
+        if found:
+            self.interval = max(self.min_interval, self.interval / 2)
+        else:
+            self.interval = min(self.max_interval, self.interval * 1.5)
+
+    def __aiter__(self):
+        return self._run()
+
+    async def _run(self):
+        if self.sinceid is None:
+            # Only what happens from now on
+            resp = await self.world.get_shards("lasteventid", cache=False)
+            self.sinceid = int(resp["lasteventid"])
+        while True:
+            events = await self.poll()
+            for event in events:
+                yield event
+                # Counted once the consumer is done with it
+                self.sinceid = int(event["id"])
+            self._adapt(bool(events))
+            await asyncio.sleep(self.interval)
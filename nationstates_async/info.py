@@ -146,3 +146,90 @@ individual_cards_shards = (
 	'trades'
 	)
 
+
+
+# Shard batching, see batching.ShardBatcher
+# How long to collect shards for the same target before sending
+batch_window = 0.05
+# A batch is sent early once it has this many shards
+batch_max_shards = 20
+
+
+# Response caching, see cache.ResponseCache
+# Shards that rarely or never change once set
+static_shards = frozenset((
+ 'animal',
+ 'capital',
+ 'censusdesc',
+ 'censusid',
+ 'censusname',
+ 'censusscale',
+ 'censustitle',
+ 'currency',
+ 'customcapital',
+ 'customleader',
+ 'customreligion',
+ 'dbid',
+ 'demonym',
+ 'demonym2',
+ 'demonym2plural',
+ 'firstlogin',
+ 'flag',
+ 'founded',
+ 'foundedtime',
+ 'founder',
+ 'leader',
+ 'motto',
+ 'name',
+ 'religion'))
+
+# Shards that change from one request to the next, these are never cached
+volatile_shards = frozenset((
+ 'dellog',
+ 'delvotes',
+ 'happenings',
+ 'lastactivity',
+ 'lasteventid',
+ 'lastlogin',
+ 'lastupdate',
+ 'messages',
+ 'newnations',
+ 'poll',
+ 'tgcancampaign',
+ 'tgcanrecruit',
+ 'tgqueue',
+ 'voters',
+ 'votetrack'))
+
+# Seconds a response is fresh for, a request uses its shortest lived shard
+cache_static_ttl = 86400
+cache_default_ttl = 300
+cache_max_entries = 4096
+cache_max_bytes = 64 * 1024 * 1024
+disk_cache_max_bytes = 512 * 1024 * 1024
+# Seconds the disk cache waits on another process's lock before giving up
+disk_cache_busy_timeout = 0.05
+# Oldest response served from the cache while NationStates is down
+cache_stale_if_error = 86400
+
+# Seconds between happenings polls, adjusted between min and max to the event rate
+happenings_poll_interval = 15
+happenings_min_interval = 5
+happenings_max_interval = 120
+happenings_limit = 100
+
+# Seconds between polls of a watch.Watcher
+watch_interval = 300
+
+# Retries, see retry.RetryPolicy
+# Seconds before the first retry, doubled on each one up to retry_max_delay
+retry_base_delay = 5
+retry_max_delay = 60
+# Up to this fraction of a delay is taken off at random, so retries don't line up
+retry_jitter = 0.5
+# Longest Retry-After of a 429 that's waited out instead of raised,
+# a rate limit ban is 900 seconds
+retry_max_retry_after = 60
+# Retries allowed in a rate limit window, on top of retry_budget_ratio per request made
+retry_budget_minimum = 10
+retry_budget_ratio = 0.2
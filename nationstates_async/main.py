@@ -1,5 +1,11 @@
+import weakref
+
 from . import nsapiwrapper
-from .objects import Nation, Region, World, WorldAssembly, Telegram, Cards, IndividualCards
+from . import info
+from .batching import ShardBatcher
+from .cache import ResponseCache
+from .retry import RetryPolicy
+from .objects import Nation, Region, World, WorldAssembly, Telegram, Cards, IndividualCards, normalize_name
 
 class Nationstates:
 
@@ -7,7 +13,12 @@ class Nationstates:
                 ratelimit_limit=40, ratelimit_timeframe=30, ratelimit_sleep_time=1,
                 ratelimit_maxsleeps=45, ratelimit_enabled=True, do_retry=True, 
                 retry_sleep=5, max_retries=5, use_nsdict=True, use_session=True,
-                enable_beta=False, max_requests_at_once=None):
+                enable_beta=False, max_requests_at_once=None,
+                connection_limit=nsapiwrapper.info.connection_limit, ratelimit_backend=None,
+                batch_shards=False, batch_window=info.batch_window, batch_max_shards=info.batch_max_shards,
+                single_flight=True, cache=None, retry_policy=None, circuit_breaker=None,
+                stale_if_error=info.cache_stale_if_error, total_timeout=nsapiwrapper.info.total_timeout,
+                connect_timeout=nsapiwrapper.info.connect_timeout, read_timeout=nsapiwrapper.info.read_timeout):
         self.api = nsapiwrapper.Api(user_agent, version=version,
                                     ratelimit_sleep=ratelimit_sleep,
                                     ratelimit_sleep_time=ratelimit_sleep_time,
@@ -15,15 +26,59 @@ class Nationstates:
                                     ratelimit_within=ratelimit_timeframe,
                                     ratelimit_maxsleeps=ratelimit_maxsleeps,
                                     ratelimit_enabled=ratelimit_enabled,
-                                    use_session=use_session)
+                                    use_session=use_session,
+                                    connection_limit=connection_limit,
+                                    ratelimit_backend=ratelimit_backend,
+                                    single_flight=single_flight,
+                                    circuit_breaker=circuit_breaker,
+                                    total_timeout=total_timeout,
+                                    connect_timeout=connect_timeout,
+                                    read_timeout=read_timeout)
         self.do_retry = do_retry
         self.retry_sleep = retry_sleep
         self.max_retries = max_retries
+        # retry_sleep and max_retries are the defaults of the policy, do_retry=False disables it
+        if retry_policy is None and do_retry:
+            retry_policy = RetryPolicy(max_retries=max_retries, base_delay=retry_sleep)
+        self.retry_policy = retry_policy if retry_policy is not False else None
         self.use_nsdict = use_nsdict
         self.enable_beta = enable_beta
+        # Opt in, combines concurrent get_shards calls for the same target
+        self.batcher = ShardBatcher(batch_window, batch_max_shards) if batch_shards else None
+        # Opt in, pass True for the default ResponseCache or pass your own
+        if cache is True:
+            cache = ResponseCache()
+        self.cache = cache if cache is not False else None
+        # Oldest cached response in seconds served while the circuit breaker is open, None to never
+        self.stale_if_error = stale_if_error
         if max_requests_at_once is not None:
             self.api.max_ongoing_requests = max_requests_at_once
+        # Unauthenticated nation/region handles by normalized name,
+        # shared for as long as something holds on to them
+        self.nation_handles = weakref.WeakValueDictionary()
+        self.region_handles = weakref.WeakValueDictionary()
+
+    def _handle(self, handles, factory, name):
+        key = normalize_name(name)
+        handle = handles.get(key)
+        if handle is None:
+            handle = handles[key] = factory(name, self)
+        return handle
+
+    def _is_shared_handle(self, nation):
+        return self.nation_handles.get(normalize_name(nation.nation_name)) is nation
 
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def close(self):
+        """Closes the underlying http session, and the cache's backend if it has one"""
+        await self.api.close()
+        if self.cache is not None:
+            self.cache.close()
 
     def nation(self, nation_name, password=None, autologin=None):
         """Setup access to the Nation API with the Nation object
@@ -36,8 +91,13 @@ class Nationstates:
             :type autologin: str
             :returns: Nation Object based off nation_name
             :rtype: Nation
+
+            Without a password or autologin the same handle is returned
+            for the same name, "Foo Bar" and "foo_bar" included.
         """
-        return Nation(nation_name, self, password=password, autologin=autologin)
+        if password or autologin:
+            return Nation(nation_name, self, password=password, autologin=autologin)
+        return self._handle(self.nation_handles, Nation, nation_name)
 
     def region(self, region_name):
         """Setup access to the Region API with the Nation object
@@ -48,8 +108,9 @@ class Nationstates:
             :returns: Region Object based off region_name
             :rtype: Region
 
+            The same handle is returned for the same name.
         """
-        return Region(region_name, self)
+        return self._handle(self.region_handles, Region, region_name)
 
     def world(self):
         """Setup access to the World API with the Nation object
@@ -92,6 +153,71 @@ class Nationstates:
         """
         return IndividualCards(self, cardid=cardid, season=season)
 
+    def fetch_many(self, targets, shards, kind="nation", concurrency=None, resume=None, full_response=False):
+        """Requests the same shards for many nations or regions
+
+            :param targets: iterable or async iterable of names (or Nation/Region objects)
+            :param shards: shard or list of shards to request for each
+            :param kind: "nation" or "region", what the names are
+            :param concurrency: requests queued at once, defaults to max_requests_at_once
+            :param resume: token from a previous BulkFetch to skip what it already returned
+            :returns: BulkFetch, an async iterable of FetchResult in completion order.
+                Errors like NotFound are stored on the result instead of raised.
+        """
+        # Imported here, most scripts never use them
+        from .bulk import BulkFetch
+        return BulkFetch(self, targets, shards, kind=kind, concurrency=concurrency,
+                         resume=resume, full_response=full_response)
+
+    def crawl(self, path, shards, kind="region", sink=None, concurrency=None):
+        """Resumable crawl with its work queue stored in a SQLite file at path
+
+            :param shards: shards to request for every target
+            :param kind: "region" or "nation"
+            :param sink: receives each result, defaults to a crawl.MemorySink
+            :returns: Crawl
+        """
+        from .crawl import Crawl
+        return Crawl(self, path, shards, kind=kind, sink=sink, concurrency=concurrency)
+
+    def dumps(self):
+        """Access to the daily nation and region dumps
+
+            :returns: Dumps Object
+            :rtype: Dumps
+        """
+        from .dumps import Dumps
+        return Dumps(self)
+
+    @property
+    def max_requests_at_once(self):
+        """Amount of requests allowed in flight at once, can be changed at runtime"""
+        return self.api.max_ongoing_requests
+
+    @max_requests_at_once.setter
+    def max_requests_at_once(self, value):
+        self.api.max_ongoing_requests = value
+
+    @property
+    def queue_depth(self):
+        """Amount of requests waiting for a slot"""
+        return self.api.queue_depth
+
+    def add_queue(self, name, weight=1, priority=nsapiwrapper.info.priority_default):
+        """Creates a named queue, pass its name as priority= to requests.
+            See nsapiwrapper.Api.add_queue
+        """
+        return self.api.add_queue(name, weight=weight, priority=priority)
+
+    def queue_stats(self):
+        """Wait time metrics per queue"""
+        return self.api.queue_stats()
+
+    @property
+    def breaker(self):
+        """The CircuitBreaker, None if it's disabled. breaker.state and breaker.stats() show how it's doing"""
+        return self.api.breaker
+
     @property
     def user_agent(self):
         return self.api.user_agent
@@ -4,9 +4,33 @@ nsapiwrapper is a simple api wrapper for nationstates.
 
 
 """
+import sys as _sys
 
-from .main import Api
-from .urls import Shard
 from . import exceptions
-from . import utils
+from . import info
 
+__all__ = ["Api", "Shard", "exceptions", "utils"]
+
+# Loaded on first use, Api pulls in the whole request path, see PEP 562
+_lazy = {
+    "Api": ".main",
+    "Shard": ".urls",
+}
+
+if _sys.version_info >= (3, 7):
+    def __getattr__(name):
+        from importlib import import_module
+        if name == "utils":
+            return import_module(".utils", __name__)
+        if name not in _lazy:
+            raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+        value = globals()[name] = getattr(import_module(_lazy[name], __name__), name)
+        return value
+
+    def __dir__():
+        return sorted(set(globals()) | set(_lazy) | {"utils"})
+else:
+    # No module __getattr__ before 3.7
+    from .main import Api
+    from .urls import Shard
+    from . import utils
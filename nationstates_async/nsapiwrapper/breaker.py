@@ -0,0 +1,132 @@
+"""Circuit breaker for when NationStates is down
+
+After failure_threshold requests in a row fail with a server side error
+(500, 521, timeouts, dropped connections) the circuit opens and requests
+fail right away with CircuitOpen, instead of holding a slot to wait for
+an answer that won't come. After reset_timeout seconds a single request is
+let through as a probe, the circuit closes if it succeeds and opens again if not.
+"""
+import asyncio
+from time import monotonic
+
+from .exceptions import CircuitOpen, CloudflareServerError, InternalServerError, NSServerBaseException
+from .info import breaker_failure_threshold, breaker_reset_timeout
+from .utils import LazyModule
+
+aiohttp = LazyModule("aiohttp")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitBreaker:
+
+    """
+    state is one of closed, open and half-open.
+    Functions in listeners are called with (breaker, old state, new state) on every change.
+
+    """
+    # aiohttp's connection errors count too, see tripped_by
+    trip_on = (CloudflareServerError, InternalServerError, asyncio.TimeoutError)
+
+    def __init__(self, failure_threshold=breaker_failure_threshold, reset_timeout=breaker_reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        # Consecutive failures
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.trips = 0
+        self.rejected = 0
+        self.listeners = []
+
+    def _set_state(self, state):
+        old = self.state
+        if old == state:
+            return
+        self.state = state
+        for listener in self.listeners:
+            listener(self, old, state)
+
+    @property
+    def retry_in(self):
+        """Seconds until a probe is allowed, 0 unless open"""
+        if self.state != OPEN:
+            return 0
+        return max(0, self.opened_at + self.reset_timeout - monotonic())
+
+    def before(self):
+        """Raises CircuitOpen if a request can't be made right now"""
+        if self.state == OPEN:
+            if self.retry_in > 0:
+                self.rejected = self.rejected + 1
+                raise CircuitOpen("NationStates looks down, not retrying for {:.0f} seconds".format(self.retry_in),
+                                  retry_in=self.retry_in)
+            self._set_state(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self.probing:
+                self.rejected = self.rejected + 1
+                raise CircuitOpen("NationStates looks down, waiting on a probe request", retry_in=0)
+            self.probing = True
+
+    def success(self):
+        self.probing = False
+        self.failures = 0
+        self._set_state(CLOSED)
+
+    def failure(self):
+        self.probing = False
+        self.failures = self.failures + 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = monotonic()
+            if self.state != OPEN:
+                self.trips = self.trips + 1
+            self._set_state(OPEN)
+
+    def cancelled(self):
+        """The request ended without telling anything about the server"""
+        self.probing = False
+
+    def tripped_by(self, exc_type):
+        """Whether an error means NationStates is down"""
+        if issubclass(exc_type, self.trip_on):
+            return True
+        if issubclass(exc_type, NSServerBaseException):
+            return False
+        return issubclass(exc_type, aiohttp.ClientConnectionError)
+
+    def guard(self):
+        """Context manager around one request"""
+        return _Guard(self)
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "retry_in": self.retry_in,
+        }
+
+
+class _Guard:
+    __slots__ = ("breaker",)
+
+    def __init__(self, breaker):
+        self.breaker = breaker
+
+    def __enter__(self):
+        self.breaker.before()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.breaker.success()
+        elif self.breaker.tripped_by(exc_type):
+            self.breaker.failure()
+        elif issubclass(exc_type, NSServerBaseException):
+            # Anything else the server answered with means it's up
+            self.breaker.success()
+        else:
+            self.breaker.cancelled()
@@ -13,6 +13,15 @@ class RateLimitBreach(NSBaseError):
 class RateLimitReached(RateLimitBreach):
     """Rate Limit was reached"""
 
+class DeadlineExceeded(NSBaseError):
+    """Request waited for a slot or the rate limit past its deadline"""
+
+class CircuitOpen(NSBaseError):
+    """NationStates looks down and requests aren't being sent, see nsapiwrapper.breaker"""
+    def __init__(self, message, retry_in=0):
+        super().__init__(message)
+        self.retry_in = retry_in
+
 class NSServerBaseException(NSBaseError):
     """Exceptions that the server returns"""
     pass
@@ -30,8 +39,10 @@ class NotFound(APIError):
     pass
 
 class APIRateLimitBan(APIError):
-    """Server has banned your IP"""
-    pass
+    """Server has banned your IP, retry_after is how many seconds for if the server said"""
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
 
 class APIUsageError(APIError):
     pass
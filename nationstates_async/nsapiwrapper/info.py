@@ -20,5 +20,31 @@ ratelimit_within = 30
 # The actual max time of around 30
 # by 20 seconds by default
 ratelimit_maxsleeps = 90
-# Amount of time to sleep before retrying rate limit check
-ratelimit_sleep_time = 0.5
\ No newline at end of file
+# ratelimit_sleep_time * ratelimit_maxsleeps caps how long
+# a request will wait on the rate limit
+ratelimit_sleep_time = 0.5
+
+# Connection pool used by the shared aiohttp session
+# Everything goes to the same host, so keeping connections alive
+# saves a DNS lookup and TLS handshake on every request
+connection_limit = 20
+keepalive_timeout = 30
+dns_cache_ttl = 300
+
+# Request timeouts in seconds, so a hung connection can't hold a slot forever
+# total covers the whole request, connect getting a connection from the pool
+# and read the time between two reads of the response
+total_timeout = 60
+connect_timeout = 10
+read_timeout = 30
+
+# Priorities used when waiting for a request slot, lower goes first
+priority_interactive = 0
+priority_default = 10
+priority_bulk = 20
+
+# Circuit breaker, see breaker.CircuitBreaker
+# Server errors in a row that open the circuit
+breaker_failure_threshold = 5
+# Seconds the circuit stays open before a probe request
+breaker_reset_timeout = 30
@@ -1,12 +1,16 @@
-from requests import Session
 from .objects import RateLimit, NationAPI, RegionAPI, WorldAPI, WorldAssemblyAPI, TelegramAPI
-from .exceptions import RateLimitReached
+from .exceptions import RateLimitReached, DeadlineExceeded
 from .info import max_safe_requests, ratelimit_max, ratelimit_within, ratelimit_maxsleeps, ratelimit_sleep_time, max_ongoing_requests
+from .info import connection_limit, keepalive_timeout, dns_cache_ttl, priority_default
+from .info import total_timeout, connect_timeout, read_timeout
 from .objects import RateLimit, NationAPI, PrivateNationAPI, RegionAPI, WorldAPI, WorldAssemblyAPI, CardsAPI
-from .utils import sleep_thread
+from .scheduling import Scheduler, Schedule, QueueStats
+from .breaker import CircuitBreaker
+from .utils import sleep_thread, LazyModule
 
 import asyncio
-import aiohttp
+
+aiohttp = LazyModule("aiohttp")
 
 class Api:
     def __init__(self, user_agent, version='11',
@@ -18,7 +22,16 @@ class Api:
         max_safe_requests=max_safe_requests,
         ratelimit_enabled=True,
         use_session=True,
-        max_ongoing_requests=max_ongoing_requests):
+        max_ongoing_requests=max_ongoing_requests,
+        connection_limit=connection_limit,
+        keepalive_timeout=keepalive_timeout,
+        dns_cache_ttl=dns_cache_ttl,
+        ratelimit_backend=None,
+        single_flight=True,
+        circuit_breaker=None,
+        total_timeout=total_timeout,
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout):
         self.user_agent = user_agent
         self.version = version
         self.ratelimitsleep = ratelimit_sleep
@@ -28,74 +41,184 @@ class Api:
         self.ratelimit_within = ratelimit_within
         self.max_safe_requests = max_safe_requests
         self.ratelimit_enabled = ratelimit_enabled
-        self.max_ongoing_requests = max_ongoing_requests
-        self.use_session = False
-        if use_session:
-            # Todo remove session usage
-            self.session = None
-        else:
-            self.session = None
+        # Slots for requests in flight
+        self.gate = Scheduler(max_ongoing_requests)
+        # Only one request at a time waits on the rate limit, the best ranked one,
+        # so interactive requests don't end up sleeping behind bulk work
+        self.turn = Scheduler(1)
+        # queue name -> QueueStats
+        self.stats = dict()
+        self.use_session = use_session
+        self.connection_limit = connection_limit
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.total_timeout = total_timeout
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._timeout = None
+        # Created lazily, a ClientSession has to be made inside the event loop
+        self.session = None
+        self._session_loop = None
         self.xrls = 0
-        self.rlobj = RateLimit()
-        self.ratelimit_lock = asyncio.Lock()
+        # Any object implementing acquire/feedback, see nsapiwrapper.ratelimiting
+        self.rlobj = RateLimit(ratelimit_within) if ratelimit_backend is None else ratelimit_backend
         self.limit_request = False
-        self.__activerequests__ = 0
+        self.single_flight = single_flight
+        # url -> future of the request currently in flight
+        self.inflight = dict()
+        # Pass False to disable, or a CircuitBreaker of your own
+        self.breaker = CircuitBreaker() if circuit_breaker is None else (circuit_breaker or None)
+
+    @property
+    def max_ongoing_requests(self):
+        return self.gate.limit
+
+    @max_ongoing_requests.setter
+    def max_ongoing_requests(self, value):
+        self.gate.limit = value
+
+    @property
+    def __activerequests__(self):
+        return self.gate.active
+
+    @property
+    def queue_depth(self):
+        """Amount of requests waiting for a slot"""
+        return self.gate.queue_depth
+
+    def add_queue(self, name, weight=1, priority=priority_default):
+        """Creates a named queue requests can wait in, see nsapiwrapper.scheduling
+
+            :param weight: share of the slots compared to other queues of the same priority
+            :param priority: queues with a lower priority are always served first
+        """
+        self.turn.add_queue(name, weight, priority)
+        return self.gate.add_queue(name, weight, priority)
+
+    def queue_stats(self):
+        """Wait time metrics per queue, name -> dict"""
+        return {name: stats.as_dict() for name, stats in self.stats.items()}
+
+    def _stats(self, name):
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = QueueStats()
+        return stats
+
+    def slot(self, priority=None, deadline=None):
+        """Async context manager that waits for the rate limit and holds a request slot
+
+            :param priority: queue name, priority value (lower goes first) or a Schedule
+            :param deadline: seconds allowed to wait, DeadlineExceeded is raised past it
+        """
+        if isinstance(priority, Schedule):
+            if deadline is None:
+                deadline = priority.deadline
+            priority = priority.queue
+        if priority is None:
+            priority = priority_default
+        return _RequestSlot(self, priority, deadline)
+
+    def create_session(self):
+        """Creates a new aiohttp session using this object's connection settings"""
+        connector = aiohttp.TCPConnector(limit=self.connection_limit,
+                                         keepalive_timeout=self.keepalive_timeout,
+                                         ttl_dns_cache=self.dns_cache_ttl)
+        return aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+
+    @property
+    def timeout(self):
+        """Default aiohttp.ClientTimeout of requests"""
+        if self._timeout is None:
+            self._timeout = aiohttp.ClientTimeout(total=self.total_timeout, connect=self.connect_timeout,
+                                                  sock_read=self.read_timeout)
+        return self._timeout
 
-    def increment_tracker(self):
-        self.__activerequests__ = self.__activerequests__ + 1
+    def client_timeout(self, timeout=None):
+        """The ClientTimeout for a request, timeout overrides the defaults
 
-    def decrement_tracker(self):
-        self.__activerequests__ = self.__activerequests__ - 1
+            :param timeout: seconds for the whole request, or an aiohttp.ClientTimeout
+        """
+        if timeout is None:
+            return self.timeout
+        if isinstance(timeout, aiohttp.ClientTimeout):
+            return timeout
+        return aiohttp.ClientTimeout(total=timeout, connect=self.timeout.connect, sock_read=self.timeout.sock_read)
+
+    async def get_session(self):
+        """Returns the shared session, creating it if needed"""
+        loop = asyncio.get_event_loop()
+        if self.session is None or self.session.closed or self._session_loop is not loop:
+            # A session is bound to the loop that created it
+            if self.session is not None and not self.session.closed:
+                self._drop_session(self.session, self._session_loop)
+            self.session = self.create_session()
+            self._session_loop = loop
+        return self.session
+
+    @staticmethod
+    def _drop_session(session, loop):
+        # A session can only be closed from its own loop
+        if loop is not None and loop.is_running():
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+        else:
+            # Its loop is stopped or closed, so close() can't be awaited.
+            # The connector's own synchronous close shuts its pooled connections
+            # and marks it closed, so it won't warn about them when collected
+            connector = session.connector
+            session.detach()
+            if connector is not None and not connector.closed:
+                connector._close()
+
+    async def close(self):
+        """Closes the shared session, a new one will be created on the next request"""
+        session = self.session
+        self.session = None
+        self._session_loop = None
+        if session is not None and not session.closed:
+            await session.close()
 
     def get_xrls(self):
-        return self.rlobj.get_xrls_timestamp()
+        return self.rlobj.count()
 
     async def rate_limit(self, new_xrls=1):
-        # Raises an exception if RateLimit is either banned 
-        await self.rlobj.add_xrls_timestamp(new_xrls)
-
-    async def _check_ratelimit(self):
-        xrls = await self.rlobj.get_xrls_timestamp_final()
-        return await self.rlobj.ratelimitcheck(xrls=xrls,
-                amount_allow=self.ratelimit_max,
-                within_time=self.ratelimit_within)
+        # Feeds the server's view of the rate limit back into the backend
+        await self.rlobj.feedback(new_xrls)
 
     async def check_ratelimit(self):
-        "Check's the ratelimit"
-        rlflag = await self._check_ratelimit()
+        """Waits until a request can be made, then marks it as made
+
+            Sleeps exactly until the next slot frees up instead of polling.
+            Waiting is capped at ratelimit_sleep_time * ratelimit_maxsleeps seconds
+        """
         if not self.ratelimit_enabled:
+            # Still tracked, so other users of the backend see it
+            await self.rlobj.acquire(float("inf"), self.ratelimit_within)
             return True
-        # Get other async operations a chance to aquire the lock
-
-        if not rlflag:
-            if self.ratelimitsleep:
-                n = 0
-                while not await self._check_ratelimit():
-                    n = n + 1
-                    if n >= self.ratelimitsleep_maxsleeps:
-                        if self.max_safe_requests > self.ratelimit_max:
-                            break
-                        else:
-                            return True
-                    await sleep_thread(self.ratelimitsleep_time)
-
-                else:
-                    return True
-            raise RateLimitReached("The Rate Limit was too close the API limit to safely handle this request")
-        else:
-            return True
+        max_wait = self.ratelimitsleep_time * self.ratelimitsleep_maxsleeps
+        waited = 0
+        wait = await self.rlobj.acquire(self.ratelimit_max, self.ratelimit_within)
+        while wait > 0:
+            if not self.ratelimitsleep:
+                raise RateLimitReached("The Rate Limit was too close the API limit to safely handle this request")
+            if waited >= max_wait:
+                if self.max_safe_requests > self.ratelimit_max:
+                    raise RateLimitReached("The Rate Limit was too close the API limit to safely handle this request")
+                await self.rlobj.acquire(float("inf"), self.ratelimit_within)
+                break
+            wait = min(wait, max_wait - waited)
+            await sleep_thread(wait)
+            waited = waited + wait
+            wait = await self.rlobj.acquire(self.ratelimit_max, self.ratelimit_within)
+        return True
 
     async def __aenter__(self, *args, **kwargs):
-        while self.__activerequests__ >= self.max_ongoing_requests:
-            # if the user bursts 40+ requests
-            # we can't just allow it
-            await asyncio.sleep(0.1)
-        self.increment_tracker()
+        # if the user bursts 40+ requests
+        # we can't just allow it
+        await self.gate.acquire(priority_default)
 
     async def __aexit__(self, *args, **kwargs):
-        # aexit isn't really async dependent but we want to keep the with syntax
-        await asyncio.sleep(0)
-        self.decrement_tracker()
+        self.gate.release()
 
     def Nation(self, name):
         return NationAPI(name, self)
@@ -117,4 +240,53 @@ class Api:
 
     def Cards(self, **kwargs):
         """ Pass request details in kwargs """
-        return CardsAPI(self, **kwargs)
\ No newline at end of file
+        return CardsAPI(self, **kwargs)
+
+
+class _RequestSlot:
+    def __init__(self, api, priority, deadline):
+        self.api = api
+        self.priority = priority
+        self.deadline = deadline
+
+    async def _check_ratelimit(self, deadline, loop):
+        if deadline is None:
+            await self.api.check_ratelimit()
+            return
+        try:
+            await asyncio.wait_for(self.api.check_ratelimit(), deadline - loop.time())
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded("Waited past the deadline on the rate limit")
+
+    async def __aenter__(self):
+        api = self.api
+        loop = asyncio.get_event_loop()
+        started = loop.time()
+        deadline = None if self.deadline is None else started + self.deadline
+        queue = api.gate.queue(self.priority)
+        api.turn.queue(self.priority)
+        stats = api._stats(queue.name)
+        stats.waiting = stats.waiting + 1
+        try:
+            await api.gate.acquire(queue.name, deadline)
+            try:
+                # Waited on last, right before the request goes out, so the local
+                # window lines up with the server's. Marked as sent before it is,
+                # since requests can burst
+                await api.turn.acquire(queue.name, deadline)
+                try:
+                    await self._check_ratelimit(deadline, loop)
+                finally:
+                    api.turn.release()
+            except BaseException:
+                api.gate.release()
+                raise
+        except DeadlineExceeded:
+            stats.expired = stats.expired + 1
+            raise
+        finally:
+            stats.waiting = stats.waiting - 1
+        stats.record(loop.time() - started)
+
+    async def __aexit__(self, *args):
+        self.api.gate.release()
@@ -1,42 +1,51 @@
-from bs4 import BeautifulSoup
 from time import time as timestamp
 from xml.parsers.expat import ExpatError
 from .exceptions import APIError, APIRateLimitBan, BadRequest, CloudflareServerError, ConflictError, Forbidden, InternalServerError, NotFound
                         
 from .urls import gen_url, Shard, POST_API_URL as API_URL, shard_object_extract
-import requests
+from .info import priority_interactive
+from .utils import error_message, LazyModule
 
+from collections import deque
 import asyncio
-import aiohttp
+
+aiohttp = LazyModule("aiohttp")
+
+
+def _seconds(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
 
 
 def response_check(data):
-    def xmlsoup():
-        return BeautifulSoup(data["xml"], "html.parser")
+    if data["status"] == 304:
+        # Not Modified, the caller's cached copy is still good
+        return
     if data["status"] == 409:
         raise ConflictError("Nationstates API has returned a Conflict Error.")
     if data["status"] == 400:
-        raise BadRequest(xmlsoup().h1.text)
+        raise BadRequest(error_message(data["xml"]))
     if data["status"] == 403:
-        raise Forbidden(xmlsoup().h1.text)
+        raise Forbidden(error_message(data["xml"]))
     if data["status"] == 404:
-        raise NotFound(xmlsoup().h1.text)
+        raise NotFound(error_message(data["xml"]))
     if data["status"] == 429:
-        try:
+        headers = data["response"].headers
+        if "X-Retry-After" in headers:
+            seconds = headers["X-Retry-After"]
             message = (
                 "Nationstates API has temporary banned this IP for Breaking the Rate Limit. Retry-After: {seconds}"
-                        .format(
-                           seconds=(data["response"]
-                                    .headers["X-Retry-After"])))
-            raise APIRateLimitBan(message)
-        except KeyError:
+                        .format(seconds=seconds))
+        else:
             # This currently handles telegrams
+            seconds = headers["Retry-After"]
             message = (
                 "{html_response} Retry-After: {seconds}"
-                        .format(html_response=xmlsoup().h1.text,
-                           seconds=(data["response"]
-                                    .headers["Retry-After"])))
-            raise APIRateLimitBan(message)    
+                        .format(html_response=error_message(data["xml"]),
+                           seconds=seconds))
+        raise APIRateLimitBan(message, retry_after=_seconds(seconds))
     if data["status"] == 500:
         message = ("Nationstates API has returned a Internal Server Error")
         raise InternalServerError(message)
@@ -45,37 +54,29 @@ def response_check(data):
             "Error 521: Cloudflare did not recieve a response from nationstates"
             )
 
-def within(number, value, window):
-    return (value < (number+window)) and (value > (number-window))
-
-def find_xrls(rlref, window=2):
-    highest_value = rlref[-1]
-    latest = rlref[-1]
-    for row in rlref:
-        if row is latest:
-            continue
-        if not within(latest[0], row[0], window):
-            continue
-        if row[1] > highest_value[1]:
-            highest_value = row
-    return highest_value
-
-# Rate limit isn't actually io-bound, but it has locks
-# To prevent out of order execution
-# Since this is basically the same code as in the main module
+# Feedback from the server within this many seconds of each other
+# is treated as the same moment, responses can arrive out of order
+xrls_window = 2
+
 class RateLimit:
 
     """
     This object wraps around the ratelimiting system. 
 
-    """
-    def __init__(self):
-        self.rlref = []
-        self.rlxrls = []
-        self.statelock = asyncio.Lock()
-        self.timestamplock_internal = asyncio.Lock()
-        self.timestamplock_xrls = asyncio.Lock()
+    Sent requests are kept oldest first in a deque, so recording a request
+    and expiring old ones are both O(1). Instead of answering "can I send now"
+    it answers "how long until I can send", so callers can sleep exactly that long.
+
+    The server reports how many requests it has seen (X-ratelimit-requests-seen).
+    Anything above what was sent from here belongs to someone else on this IP,
+    those are assumed to expire a full window after the report.
 
+    """
+    def __init__(self, within_time=30):
+        self.within_time = within_time
+        self.rlref = deque()
+        # (timestamp, requests seen by the server that weren't sent by this object)
+        self.rlxrls = None
 
     @property
     def rltime(self):
@@ -85,100 +86,106 @@ class RateLimit:
     @rltime.setter
     def rltime(self, val):
         """Sets the current tracker"""
-        self.rlref = val
+        self.rlref = deque(val)
+
+    def _within(self, within_time):
+        return self.within_time if within_time is None else within_time
+
+    def _expire(self, within_time, now):
+        rlref = self.rlref
+        while rlref and (rlref[0] + within_time) <= now:
+            rlref.popleft()
+        if self.rlxrls is not None and (self.rlxrls[0] + within_time) <= now:
+            self.rlxrls = None
+
+    def _foreign(self):
+        return 0 if self.rlxrls is None else self.rlxrls[1]
+
+    def count(self, within_time=None, now=None):
+        """Estimated amount of requests made inside the current window"""
+        within_time = self._within(within_time)
+        now = timestamp() if now is None else now
+        self._expire(within_time, now)
+        return len(self.rlref) + self._foreign()
+
+    def wait_time(self, amount_allow=48, within_time=None, now=None):
+        """Seconds until another request can be made without going over amount_allow,
+            0 if it can be made right now
+        """
+        within_time = self._within(within_time)
+        now = timestamp() if now is None else now
+        self._expire(within_time, now)
+        rlref = self.rlref
+        local = len(rlref)
+        # Amount of recorded requests that have to expire first
+        over = local - amount_allow + 1
+        local_wait = (rlref[over-1] + within_time - now) if over > 0 else 0
+        foreign = self._foreign()
+        if not foreign:
+            return max(local_wait, 0)
+        over = over + foreign
+        if over <= 0:
+            return 0
+        # Either enough of our requests expire, or the foreign ones do
+        foreign_wait = max(self.rlxrls[0] + within_time - now, local_wait)
+        if over <= local:
+            return max(min(rlref[over-1] + within_time - now, foreign_wait), 0)
+        return max(foreign_wait, 0)
+
+    def record(self, now=None):
+        """Records a request being sent"""
+        self.rlref.append(timestamp() if now is None else now)
+
+    def record_xrls(self, xrls, within_time=None, now=None):
+        """Records the amount of requests the server says it has seen"""
+        within_time = self._within(within_time)
+        now = timestamp() if now is None else now
+        self._expire(within_time, now)
+        foreign = max(int(xrls) - len(self.rlref), 0)
+        previous = self.rlxrls
+        if previous is not None and (now - previous[0]) < xrls_window and previous[1] >= foreign:
+            # A late response with an older count, keep the higher one
+            return
+        self.rlxrls = (now, foreign)
+
+    async def acquire(self, amount_allow=48, within_time=None):
+        """Takes a request slot if one is free
+
+            Returns 0 when the request was recorded, otherwise the seconds to wait
+            before trying again. This is the interface every rate limit backend implements
+        """
+        wait = self.wait_time(amount_allow, within_time)
+        if wait <= 0:
+            self.record()
+        return wait
 
-    async def ratelimitcheck(self, amount_allow=48, within_time=30, xrls=0):
-        """Checks if nsapiwrapper needs pause to prevent api banning
+    async def feedback(self, xrls):
+        """Absorbs the server's X-ratelimit-requests-seen"""
+        self.record_xrls(xrls)
 
-            Side Effects: Also calls .cleanup() when returning True
-        """
-        if xrls >= amount_allow:
-            async with self.statelock:
-                pre_raf = xrls - (xrls - len(self.rltime))
-                currenttime = timestamp()
-                try:
-                    while (self.rltime[-1]+within_time) < currenttime:
-                        del self.rltime[-1]
-                    post_raf = xrls - (xrls - len(self.rltime))
-                    diff = pre_raf - post_raf
-                    nxrls = xrls - diff
-                    if nxrls >= amount_allow:
-                        return False
-                    else:
-                        return True
-                except IndexError as err:
-                    if (xrls - pre_raf) >= amount_allow:
-                        return False
-                    else:
-                        return True
-        else:
-            await self.cleanup()
-            return True
+    async def ratelimitcheck(self, amount_allow=48, within_time=30, xrls=0):
+        """Checks if nsapiwrapper needs pause to prevent api banning"""
+        return self.wait_time(amount_allow, within_time) == 0
 
     async def cleanup(self, amount_allow=50, within_time=30):
-        """To prevent the list from growing forever when there isn't enough requests to force it
-            cleanup
-
-
-            can only be called from ratelimitcheck
-            """
-        currenttime = timestamp()
-        async with self.statelock:
-            try:
-                while (self.rltime[-1]+within_time) < currenttime:
-                    del self.rltime[-1]
-            except IndexError as err:
-                #List is empty, pass
-                pass
-
-            try:
-                while (self.rlxrls[-1][0]+within_time) < currenttime:
-                    del self.rlxrls[-1]
-            except IndexError as err:
-                #List is empty, pass
-                pass
-
-    async def _calculate_internal_xrls(self):
-        # may only be called by ratelimitcheck
-        await self.cleanup()
-        return len(self.rltime)
+        """Drops requests that are outside of the window"""
+        self._expire(within_time, timestamp())
 
     async def add_timestamp(self):
         """Adds timestamp to rltime"""
-        async with self.timestamplock_internal:
-            self.rltime = [timestamp()] + self.rltime
+        self.record()
 
     async def add_xrls_timestamp(self, xrls):
-        """Adds timestamp to rltime"""
-        async with self.timestamplock_xrls:
-            self.rlxrls = [(timestamp(), int(xrls))] + self.rlxrls
-
-    def _get_xrls_timestamp(self):
-        timestamp_sorted = sorted(self.rlxrls, key=lambda x: x[0])
-        if len(timestamp_sorted) == 0:
-            return (0, 0)
-        return find_xrls(timestamp_sorted)
+        """Adds the server's reported amount of requests"""
+        self.record_xrls(xrls)
 
     async def get_xrls_timestamp_final(self):
-        server_xrls = self._get_xrls_timestamp()
-        local_xrls = await self._calculate_internal_xrls()
-        if server_xrls[0] > local_xrls:
-            # We have to calculate the current xrls now
-            return server_xrls[1] + len(tuple(filter(lambda x: x > server_xrls[0], self.rltime)))
-        else:
-            return local_xrls
-
-        timestamp_sorted = sorted(self.rlxrls, key=lambda x: x[0])
-        if len(timestamp_sorted) == 0:
-            return 0
-        async with self.statelock:
-            return find_xrls(timestamp_sorted)
-
+        return self.count()
 
 
 class APIRequest:
     """Data Class for this library"""
-    def __init__(self, url, api_name, api_value, shards, version, custom_headers, use_post, post_data, trawler_lock):
+    def __init__(self, url, api_name, api_value, shards, version, custom_headers, use_post, post_data, trawler_lock, timeout=None):
         self.url = url
         self.api_name = api_name
         self.api_value = api_value
@@ -188,6 +195,8 @@ class APIRequest:
         self.use_post = use_post
         self.post_data = post_data
         self.trawler_lock = trawler_lock
+        # Overrides the Api's timeouts for this request
+        self.timeout = timeout
 
     def __repr__(self):
         return str(vars(self))
@@ -201,10 +210,33 @@ class APIResponse:
         # mostly for debugging purposes
         self.aiohttp_response = aiohttp_response
 
+
+class _NoGuard:
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *args):
+        pass
+
+_no_guard = _NoGuard()
+
+
+class _Inflight:
+    """A request shared by single flight, and how many callers wait on it"""
+    __slots__ = ("future", "waiters")
+
+    def __init__(self, future):
+        self.future = future
+        self.waiters = 0
+
 class NationstatesAPI:
     """Implements Generic Code that is used by Inherited
      Objects to use the API"""
     api_name = None
+    # Slot priority used when a request doesn't ask for one
+    priority = None
+    # Whether responses may be shared between callers, by single flight or caching
+    shared_responses = True
 
     def __init__(self, api_mother):
 
@@ -213,36 +245,40 @@ class NationstatesAPI:
     def _ratelimitcheck(self):
         rlflag = self.api_mother.rl_can_request()
 
-    def _prepare_request(self, url, api_name, api_value, shards, version=None, request_headers=None, use_post=False, post_data=None, trawler_lock=False):
+    def _prepare_request(self, url, api_name, api_value, shards, version=None, request_headers=None, use_post=False, post_data=None, trawler_lock=False, timeout=None):
         if request_headers is None:
             request_headers = dict()
-        return APIRequest(url, api_name, api_value, shards, version, request_headers, use_post, post_data, trawler_lock)
-
-    async def _request_wrap_post(self, url, headers, data):
-        _session = self.api_mother.session if self.api_mother.use_session else aiohttp.ClientSession()
-        async with _session as session:
-            async with session.post(url, headers=headers, data=data) as response:
-                return APIResponse(response.status, await response.text(), response.headers, response)
-
-    async def _request_wrap_get(self, url, headers):
-        _session = self.api_mother.session if self.api_mother.use_session else aiohttp.ClientSession()
-        async with _session as session:
-            async with session.get(url, headers=headers) as response:
-                return APIResponse(response.status, await response.text(), response.headers, response)
+        return APIRequest(url, api_name, api_value, shards, version, request_headers, use_post, post_data, trawler_lock, timeout)
+
+    async def _send(self, request_context):
+        async with request_context as response:
+            return APIResponse(response.status, await response.text(), response.headers, response)
+
+    async def _request_wrap_post(self, url, headers, data, timeout=None):
+        timeout = self.api_mother.client_timeout(timeout)
+        if self.api_mother.use_session:
+            session = await self.api_mother.get_session()
+            return await self._send(session.post(url, headers=headers, data=data, timeout=timeout))
+        async with aiohttp.ClientSession() as session:
+            return await self._send(session.post(url, headers=headers, data=data, timeout=timeout))
+
+    async def _request_wrap_get(self, url, headers, timeout=None):
+        timeout = self.api_mother.client_timeout(timeout)
+        if self.api_mother.use_session:
+            session = await self.api_mother.get_session()
+            return await self._send(session.get(url, headers=headers, timeout=timeout))
+        async with aiohttp.ClientSession() as session:
+            return await self._send(session.get(url, headers=headers, timeout=timeout))
 
     async def _request_api(self, req):
-        # Since it's possible to burst requests, we have to mark the request
-        # before it's sent instead of after
-        await self.api_mother.rlobj.add_timestamp()
-        await self.api_mother.check_ratelimit()
+        # The rate limit was already waited on by api_mother.slot
         headers = {"User-Agent":self.api_mother.user_agent}
         headers.update(req.custom_headers)
-        sess = self.api_mother.session if  self.api_mother.use_session else requests
         if req.use_post:
-            resp =  await self._request_wrap_post(req.url, headers, req.post_data)
+            resp =  await self._request_wrap_post(req.url, headers, req.post_data, timeout=req.timeout)
             return resp
         else:
-            resp =  await self._request_wrap_get(req.url, headers)
+            resp =  await self._request_wrap_get(req.url, headers, timeout=req.timeout)
             return resp
 
 
@@ -255,10 +291,14 @@ class NationstatesAPI:
             "request": request_meta,
             "status": response.status_code,
             "headers": response.headers,
-            "url": request_meta.url
+            "url": request_meta.url,
+            # Only set for conditional requests, the cached response should be used
+            "not_modified": response.status_code == 304
         }
 
-        await self.api_mother.rate_limit(new_xrls=response.headers["X-ratelimit-requests-seen"])
+        xrls = response.headers.get("X-ratelimit-requests-seen")
+        if xrls is not None:
+            await self.api_mother.rate_limit(new_xrls=xrls)
        
         response_check(result)
 
@@ -270,28 +310,70 @@ class NationstatesAPI:
             shards=shards,
             version=version)
 
-    async def _request(self, shards, url, api_name, value_name, version, request_headers=None, force_trawler=False):
+    def _priority(self, priority):
+        return self.priority if priority is None else priority
+
+    async def _request(self, shards, url, api_name, value_name, version, request_headers=None, force_trawler=False, priority=None, timeout=None):
+        if not (self.shared_responses and self.api_mother.single_flight):
+            return await self._send_request(shards, api_name, value_name, version, request_headers, force_trawler, priority, timeout)
+        # Identical requests already in flight share one response
+        # Requests with credentials never get here, so the url and
+        # any conditional headers identify the request
+        key = (url, tuple(sorted(request_headers.items()))) if request_headers else url
+        inflight = self.api_mother.inflight
+        shared = inflight.get(key)
+        if shared is None:
+            shared = inflight[key] = _Inflight(asyncio.ensure_future(
+                self._send_request(shards, api_name, value_name, version, request_headers, force_trawler, priority, timeout)))
+            def done(fut):
+                if inflight.get(key) is shared:
+                    del inflight[key]
+            shared.future.add_done_callback(done)
+        shared.waiters = shared.waiters + 1
+        try:
+            # Shielded so one caller giving up doesn't cancel it for the others
+            result = await asyncio.shield(shared.future)
+        finally:
+            shared.waiters = shared.waiters - 1
+            # The last caller gave up, nobody wants the response anymore
+            if not shared.waiters and not shared.future.done():
+                # Dropped right away, the done callback only runs later and
+                # a caller arriving in between would join the cancelled request
+                if inflight.get(key) is shared:
+                    del inflight[key]
+                shared.future.cancel()
+        # Callers are free to modify their response
+        return dict(result)
+
+    def _guard(self):
+        # Checked before waiting for a slot, so requests fail fast while NationStates is down
+        breaker = self.api_mother.breaker
+        return _no_guard if breaker is None else breaker.guard()
+
+    async def _send_request(self, shards, api_name, value_name, version, request_headers=None, force_trawler=False, priority=None, timeout=None):
         # This relies on .url() being defined by child classes
-        async with self.api_mother:
-            url = self.url(shards)
-            req = self._prepare_request(url, 
-                    api_name,
-                    value_name,
-                    shards, version, request_headers, False, None, force_trawler)
-            resp = await self._request_api(req)
-            result = await self._handle_request(resp, req)
-            return result
-
-    async def _request_post(self, shards, url, api_name, value_name, version, post_data, request_headers=None, force_trawler=False):
+        with self._guard():
+            async with self.api_mother.slot(self._priority(priority)):
+                url = self.url(shards)
+                req = self._prepare_request(url, 
+                        api_name,
+                        value_name,
+                        shards, version, request_headers, False, None, force_trawler, timeout)
+                resp = await self._request_api(req)
+                result = await self._handle_request(resp, req)
+                return result
+
+    async def _request_post(self, shards, url, api_name, value_name, version, post_data, request_headers=None, force_trawler=False, priority=None, timeout=None):
         # This relies on .url() being defined by child classes
-        async with self.api_mother:
-            req = self._prepare_request(url, 
-                    api_name,
-                    value_name,
-                    shards, version, request_headers, True, post_data, force_trawler)
-            resp = await self._request_api(req)
-            result = await self._handle_request(resp, req)
-            return result
+        with self._guard():
+            async with self.api_mother.slot(self._priority(priority)):
+                req = self._prepare_request(url, 
+                        api_name,
+                        value_name,
+                        shards, version, request_headers, True, post_data, force_trawler, timeout)
+                resp = await self._request_api(req)
+                result = await self._handle_request(resp, req)
+                return result
 
     def _default_shards(self):
         return None
@@ -320,9 +402,9 @@ class NationAPI(NationstatesAPI):
         self.nation_name = nation_name
         super().__init__(api_mother)
 
-    async def request(self, shards=[]):
+    async def request(self, shards=[], priority=None, request_headers=None, timeout=None):
         url = self.url(shards)
-        return await  self._request(shards, url, self.api_name, self.nation_name, self.api_mother.version)
+        return await  self._request(shards, url, self.api_name, self.nation_name, self.api_mother.version, request_headers=request_headers, priority=priority, timeout=timeout)
 
     def url(self, shards):
         return self._url(self.api_name, 
@@ -331,6 +413,10 @@ class NationAPI(NationstatesAPI):
             self.api_mother.version)
 
 class PrivateNationAPI(NationAPI):
+    # Authenticated commands are usually someone waiting on them
+    priority = priority_interactive
+    shared_responses = False
+
     def __init__(self, nation_name, api_mother, password=None, autologin=None):
         self.password = password
         self.autologin = autologin
@@ -343,36 +429,38 @@ class PrivateNationAPI(NationAPI):
         self.pin = None
         super().__init__(nation_name, api_mother)
 
-    async def request(self, shards=[]):
+    async def request(self, shards=[], priority=None, request_headers=None, timeout=None):
 
         pin_used = bool(self.pin)
         custom_headers = await self._get_pin_headers() 
+        if request_headers:
+            custom_headers.update(request_headers)
         url = self.url(shards)
         try:
-            response = await self._request(shards, url, self.api_name, self.nation_name, self.api_mother.version, request_headers=custom_headers, force_trawler=not pin_used)
+            response = await self._request(shards, url, self.api_name, self.nation_name, self.api_mother.version, request_headers=custom_headers, force_trawler=not pin_used, priority=priority, timeout=timeout)
         except Forbidden as exc:
             # PIN is wrong or login is wrong
             if pin_used:
                 self.pin = None
-                return await self.request(shards=shards)
+                return await self.request(shards=shards, priority=priority, request_headers=request_headers, timeout=timeout)
             else:
                 raise exc
             
         await self._setup_pin(response)
         return response
 
-    async def post(self, shards=[]):
+    async def post(self, shards=[], priority=None, timeout=None):
         pin_used = bool(self.pin)
         custom_headers = await self._get_pin_headers() 
         url = self.post_url()
         post_data = shard_object_extract(shards)
         try:
-            response = await self._request_post(shards, url, self.api_name, self.nation_name, self.api_mother.version, post_data, request_headers=custom_headers, force_trawler=not pin_used)
+            response = await self._request_post(shards, url, self.api_name, self.nation_name, self.api_mother.version, post_data, request_headers=custom_headers, force_trawler=not pin_used, priority=priority, timeout=timeout)
         except Forbidden as exc:
             # PIN is wrong or login is wrong
             if pin_used:
                 self.pin = None
-                return await self.post(shards=shards)
+                return await self.post(shards=shards, priority=priority, timeout=timeout)
             else:
                 raise exc            
         await self._setup_pin(response)
@@ -413,9 +501,9 @@ class RegionAPI(NationstatesAPI):
         self.nation_name = nation_name
         super().__init__(api_mother)
 
-    async def request(self, shards=tuple):
+    async def request(self, shards=tuple, priority=None, request_headers=None, timeout=None):
         url = self.url(shards)
-        return await self._request(shards, url, self.api_name, self.nation_name, self.api_mother.version)
+        return await self._request(shards, url, self.api_name, self.nation_name, self.api_mother.version, request_headers=request_headers, priority=priority, timeout=timeout)
 
     def url(self, shards):
         return self._url(self.api_name, 
@@ -429,9 +517,9 @@ class WorldAPI(NationstatesAPI):
     def __init__(self, api_mother):
         super().__init__(api_mother)
 
-    async def request(self, shards=tuple()):
+    async def request(self, shards=tuple(), priority=None, request_headers=None, timeout=None):
         url = self.url(shards)
-        return await self._request(shards, url, self.api_name, None, self.api_mother.version)
+        return await self._request(shards, url, self.api_name, None, self.api_mother.version, request_headers=request_headers, priority=priority, timeout=timeout)
 
     def url(self, shards):
         return self._url(self.api_name, 
@@ -446,9 +534,9 @@ class WorldAssemblyAPI(NationstatesAPI):
         self.chamber = chamber
         super().__init__(api_mother)
 
-    async def request(self, shards=[]):
+    async def request(self, shards=[], priority=None, request_headers=None, timeout=None):
         url = self.url(shards)
-        return await self._request(shards, url, self.api_name, self.chamber, self.api_mother.version)
+        return await self._request(shards, url, self.api_name, self.chamber, self.api_mother.version, request_headers=request_headers, priority=priority, timeout=timeout)
 
     def url(self, shards):
         return self._url(self.api_name, 
@@ -460,6 +548,8 @@ class TelegramAPI(NationstatesAPI):
     """A Specialized API for telegrams"""
     api_name = "a"
     api_value = "sendTG"
+    # Each call sends a telegram
+    shared_responses = False
 
     def __init__(self, api_mother, client_key, tgid, key):
         self.api_mother = api_mother
@@ -473,9 +563,9 @@ class TelegramAPI(NationstatesAPI):
             [Shard(client=self.client_key, tgid=self.tgid, key=self.key, to=shards), shards],
             self.api_mother.version)
 
-    async def request(self, shards):
+    async def request(self, shards, priority=None, request_headers=None, timeout=None):
         url = self.url(shards)
-        return await self._request(shards, url, self.api_name, self.api_value, self.api_mother.version)
+        return await self._request(shards, url, self.api_name, self.api_value, self.api_mother.version, request_headers=request_headers, priority=priority, timeout=timeout)
 
 class CardsAPI(NationstatesAPI):
     # Cards is implemented de facto as a worlds api
@@ -503,9 +593,9 @@ class CardsAPI(NationstatesAPI):
         else:
             return (Shard(mother_shard),)
 
-    async def request(self, shards=tuple()):
+    async def request(self, shards=tuple(), priority=None, request_headers=None, timeout=None):
         url = self.url(shards)
-        return await self._request(shards, url, self.api_name, None, self.api_mother.version)
+        return await self._request(shards, url, self.api_name, None, self.api_mother.version, request_headers=request_headers, priority=priority, timeout=timeout)
 
     def url(self, shards):
         return self._url(self.api_name, 
@@ -0,0 +1,285 @@
+"""Rate limit backends that are shared between processes
+
+Nationstates enforces the rate limit per IP, so every process making
+requests from the same IP has to draw from the same budget.
+
+A rate limit backend is anything with these two coroutines and one method:
+
+    acquire(amount_allow, within_time)
+        Takes a request slot. Returns 0 if one was taken,
+        otherwise the seconds to wait before trying again.
+
+    feedback(xrls)
+        Absorbs the X-ratelimit-requests-seen header from a response.
+
+    count()
+        Estimated amount of requests made inside the current window.
+
+objects.RateLimit is the default in-process backend. FileRateLimit shares
+the budget between processes on one machine, and RateLimitCoordinator
+serves it over a socket to processes on several machines.
+"""
+import asyncio
+import json
+import os
+
+from .objects import RateLimit
+from .info import ratelimit_within
+
+try:
+    import fcntl
+except ImportError: # pragma: no cover
+    fcntl = None
+
+try:
+    _current_task = asyncio.current_task
+except AttributeError: # pragma: no cover
+    # Python 3.6
+    _current_task = asyncio.Task.current_task
+
+
+def _dump_state(rl):
+    return json.dumps({"sent": list(rl.rlref), "xrls": rl.rlxrls})
+
+def _load_state(raw, within_time):
+    rl = RateLimit(within_time)
+    if raw:
+        state = json.loads(raw)
+        rl.rltime = state["sent"]
+        rl.rlxrls = tuple(state["xrls"]) if state["xrls"] else None
+    return rl
+
+
+class FileRateLimit:
+
+    """
+    Shares a rate limit between processes on the same machine.
+
+    The state lives in a small file that is locked for the few
+    microseconds each check takes. File access happens in the default executor
+    so the event loop isn't blocked while another process holds the lock.
+
+    """
+    def __init__(self, path, within_time=ratelimit_within):
+        if fcntl is None: # pragma: no cover
+            raise RuntimeError("FileRateLimit requires fcntl, which isn't available on this platform")
+        self.path = path
+        self.within_time = within_time
+
+    def _locked(self, func):
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        with os.fdopen(fd, "r+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                rl = _load_state(f.read(), self.within_time)
+                result = func(rl)
+                f.seek(0)
+                f.truncate()
+                f.write(_dump_state(rl))
+                f.flush()
+                return result
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _acquire(self, amount_allow, within_time):
+        def take(rl):
+            wait = rl.wait_time(amount_allow, within_time)
+            if wait <= 0:
+                rl.record()
+            return wait
+        return self._locked(take)
+
+    async def _run(self, func, *args):
+        return await asyncio.get_event_loop().run_in_executor(None, func, *args)
+
+    def count(self):
+        """Estimated amount of requests made inside the current window
+
+            Reads the file right here instead of in the executor, so this blocks
+            the event loop while another process holds the lock. Meant for
+            stats and debugging, requests only go through acquire and feedback.
+        """
+        return self._locked(lambda rl: rl.count())
+
+    async def acquire(self, amount_allow=48, within_time=None):
+        return await self._run(self._acquire, amount_allow, within_time)
+
+    async def feedback(self, xrls):
+        await self._run(self._locked, lambda rl: rl.record_xrls(xrls))
+
+
+class RateLimitCoordinator:
+
+    """
+    Small server handing out request slots to other processes or machines.
+
+    The protocol is one line per message:
+
+        acquire <amount_allow> <within_time>   ->  <seconds to wait> <requests in window>
+        feedback <xrls>                        ->  ok <requests in window>
+
+    Anything else, including numbers that don't parse, is answered with error.
+
+    Uses a unix socket if path is given, otherwise TCP on host/port.
+    Only the coordinator's clock is used, so clients don't need to agree on the time.
+
+    """
+    def __init__(self, host="127.0.0.1", port=0, path=None, within_time=ratelimit_within):
+        self.host = host
+        self.port = port
+        self.path = path
+        self.rlobj = RateLimit(within_time)
+        self.server = None
+        self.connections = set()
+
+    async def start(self):
+        if self.path:
+            self.server = await asyncio.start_unix_server(self._handle, path=self.path)
+        else:
+            self.server = await asyncio.start_server(self._handle, self.host, self.port)
+            # Port 0 picks a free port
+            self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+        connections = tuple(self.connections)
+        for task in connections:
+            task.cancel()
+        await asyncio.gather(*connections, return_exceptions=True)
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        try:
+            # Returns once close() is called
+            await self.server.wait_closed()
+        finally:
+            await self.close()
+
+    def _respond(self, line):
+        parts = line.split()
+        try:
+            if parts and parts[0] == "acquire" and len(parts) == 3:
+                amount_allow = float(parts[1])
+                if amount_allow != float("inf"):
+                    amount_allow = int(amount_allow)
+                wait = self.rlobj.wait_time(amount_allow, float(parts[2]))
+                if wait <= 0:
+                    self.rlobj.record()
+                return "{!r} {}".format(wait, self.rlobj.count())
+            if parts and parts[0] == "feedback" and len(parts) == 2:
+                self.rlobj.record_xrls(parts[1])
+                return "ok {}".format(self.rlobj.count())
+        except (ValueError, OverflowError):
+            pass
+        return "error"
+
+    async def _handle(self, reader, writer):
+        task = _current_task()
+        self.connections.add(task)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                writer.write((self._respond(line.decode()) + "\n").encode())
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.connections.discard(task)
+            writer.close()
+
+
+class CoordinatorRateLimit:
+
+    """
+    Rate limit backend that asks a RateLimitCoordinator for request slots.
+
+    """
+    def __init__(self, host="127.0.0.1", port=None, path=None, within_time=ratelimit_within):
+        self.host = host
+        self.port = port
+        self.path = path
+        self.within_time = within_time
+        self.reader = None
+        self.writer = None
+        # Requests in the window as of the coordinator's last answer
+        self.seen = 0
+        # One request/response at a time on the connection
+        self.lock = asyncio.Lock()
+
+    async def _connect(self):
+        if self.path:
+            self.reader, self.writer = await asyncio.open_unix_connection(self.path)
+        else:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def _call(self, line):
+        async with self.lock:
+            for attempt in (0, 1):
+                if self.writer is None:
+                    await self._connect()
+                try:
+                    self.writer.write((line + "\n").encode())
+                    await self.writer.drain()
+                    answer = await self.reader.readline()
+                    if not answer:
+                        raise ConnectionResetError("Coordinator closed the connection")
+                    return answer.decode().strip()
+                except ConnectionError:
+                    # Reconnect once, the coordinator may have restarted
+                    await self.close()
+                    if attempt:
+                        raise
+
+    async def close(self):
+        writer = self.writer
+        self.reader = self.writer = None
+        if writer is not None:
+            writer.close()
+            # No wait_closed before 3.7
+            if hasattr(writer, "wait_closed"):
+                try:
+                    await writer.wait_closed()
+                except ConnectionError:
+                    pass
+
+    def _answer(self, answer):
+        parts = answer.split()
+        if not parts or parts[0] == "error":
+            raise ValueError("Coordinator rejected the request: {!r}".format(answer))
+        if len(parts) > 1:
+            self.seen = int(parts[1])
+        return parts[0]
+
+    def count(self):
+        """Estimated amount of requests made inside the current window,
+            as of the last answer from the coordinator"""
+        return self.seen
+
+    async def acquire(self, amount_allow=48, within_time=None):
+        if within_time is None:
+            within_time = self.within_time
+        return float(self._answer(await self._call("acquire {} {}".format(amount_allow, within_time))))
+
+    async def feedback(self, xrls):
+        self._answer(await self._call("feedback {}".format(int(xrls))))
+
+
+def main(): # pragma: no cover
+    import argparse
+    parser = argparse.ArgumentParser(description="Shares a Nationstates rate limit between processes")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6260)
+    parser.add_argument("--path", default=None, help="unix socket path, used instead of host/port")
+    parser.add_argument("--within", type=float, default=ratelimit_within)
+    args = parser.parse_args()
+    coordinator = RateLimitCoordinator(args.host, args.port, args.path, args.within)
+    asyncio.get_event_loop().run_until_complete(coordinator.serve_forever())
+
+if __name__ == "__main__": # pragma: no cover
+    main()
@@ -0,0 +1,251 @@
+"""Scheduling of requests waiting for a slot or for the rate limit
+
+Requests wait in named queues. Queues with a lower priority value are
+always served first, so interactive requests jump ahead of bulk work.
+Queues sharing a priority split the slots between them by weight,
+a queue with weight 3 gets three turns for every turn of a weight 1 queue.
+Inside a queue the request with the nearest deadline goes first,
+then arrival order.
+
+Three queues always exist: interactive, default and bulk.
+"""
+import asyncio
+import heapq
+import itertools
+
+from .exceptions import DeadlineExceeded
+from .info import priority_interactive, priority_default, priority_bulk
+
+default_queues = (
+    ("interactive", priority_interactive),
+    ("default", priority_default),
+    ("bulk", priority_bulk),
+)
+
+_never = float("inf")
+
+
+class Schedule:
+    """Where a request waits, pass it as priority= to any request
+
+        :param queue: queue name, or a priority value
+        :param deadline: seconds the request may wait before being sent,
+            DeadlineExceeded is raised once they run out
+    """
+    __slots__ = ("queue", "deadline")
+
+    def __init__(self, queue=priority_default, deadline=None):
+        self.queue = queue
+        self.deadline = deadline
+
+    def __repr__(self):
+        return "<Schedule:{} deadline={}>".format(self.queue, self.deadline)
+
+
+class RequestQueue:
+    """A named queue and the requests waiting in it"""
+
+    def __init__(self, name, weight=1, priority=priority_default):
+        if weight <= 0:
+            raise ValueError("weight must be positive")
+        self.name = name
+        self.weight = weight
+        self.priority = priority
+        # (deadline, arrival, future)
+        self.waiters = []
+        # Virtual times the next turn starts and the last one ended, see Scheduler._grant
+        self.start = 0.0
+        self.finish = 0.0
+
+    def _head(self):
+        # Cancelled and expired waiters are left in the heap until they get here
+        while self.waiters and self.waiters[0][-1].done():
+            heapq.heappop(self.waiters)
+        return self.waiters[0] if self.waiters else None
+
+
+class QueueStats:
+    """Wait time metrics of a queue"""
+    __slots__ = ("waiting", "served", "expired", "total_wait", "max_wait")
+
+    def __init__(self):
+        self.waiting = 0
+        self.served = 0
+        self.expired = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait):
+        self.served = self.served + 1
+        self.total_wait = self.total_wait + wait
+        if wait > self.max_wait:
+            self.max_wait = wait
+
+    def as_dict(self):
+        return {
+            "waiting": self.waiting,
+            "served": self.served,
+            "expired": self.expired,
+            "mean_wait": self.total_wait / self.served if self.served else 0.0,
+            "max_wait": self.max_wait,
+        }
+
+
+class Scheduler:
+
+    """
+    Limits how many requests hold a slot at once and decides who's next.
+
+    A released slot is handed directly to the next waiter,
+    so nothing has to poll for it.
+
+    """
+    def __init__(self, limit):
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        self._limit = limit
+        self._active = 0
+        self._queued = 0
+        self._counter = itertools.count()
+        self._vtime = 0.0
+        self.queues = dict()
+        for name, priority in default_queues:
+            self.add_queue(name, priority=priority)
+
+    def add_queue(self, name, weight=1, priority=priority_default):
+        """Creates a queue, or changes the weight and priority of an existing one"""
+        queue = self.queues.get(name)
+        if queue is None:
+            queue = self.queues[name] = RequestQueue(name, weight, priority)
+        else:
+            if weight <= 0:
+                raise ValueError("weight must be positive")
+            queue.weight = weight
+            queue.priority = priority
+        return queue
+
+    def queue(self, key):
+        """The queue for a name or a priority value"""
+        if isinstance(key, RequestQueue):
+            return key
+        queue = self.queues.get(key)
+        if queue is not None:
+            return queue
+        if isinstance(key, str):
+            raise KeyError("Unknown queue {!r}, create it with add_queue".format(key))
+        for queue in self.queues.values():
+            if queue.priority == key:
+                return queue
+        return self.add_queue("priority-{}".format(key), priority=key)
+
+    @property
+    def limit(self):
+        """Amount of requests allowed to hold a slot at once"""
+        return self._limit
+
+    @limit.setter
+    def limit(self, value):
+        if value < 1:
+            raise ValueError("limit must be at least 1")
+        self._limit = value
+        # Growing the limit can admit waiters right away,
+        # Shrinking it lets the extra requests finish normally
+        self._wake()
+
+    @property
+    def active(self):
+        """Amount of requests currently holding a slot"""
+        return self._active
+
+    @property
+    def queue_depth(self):
+        """Amount of requests waiting for a slot"""
+        return self._queued
+
+    def waiting(self, name):
+        """Amount of requests waiting in a queue"""
+        return sum(1 for waiter in self.queues[name].waiters if not waiter[-1].done())
+
+    def _grant(self, queue, start):
+        # Start-time fair queueing, each turn costs 1/weight of virtual time
+        # and the queue with the earliest start goes next
+        self._vtime = start
+        queue.finish = start + 1 / queue.weight
+        # Only used if the queue still has waiters, see acquire
+        queue.start = queue.finish
+        self._active = self._active + 1
+
+    def _next(self):
+        best = None
+        for queue in self.queues.values():
+            if queue._head() is None:
+                continue
+            if best is None or (queue.priority, queue.start) < (best.priority, best.start):
+                best = queue
+        return best
+
+    def _wake(self):
+        while self._active < self._limit:
+            queue = self._next()
+            if queue is None:
+                return
+            fut = heapq.heappop(queue.waiters)[-1]
+            self._grant(queue, queue.start)
+            self._queued = self._queued - 1
+            fut.set_result(None)
+
+    async def acquire(self, queue=priority_default, deadline=None):
+        """Waits for a slot
+
+            :param queue: queue name or priority value
+            :param deadline: loop time after which waiting raises DeadlineExceeded
+        """
+        queue = self.queue(queue)
+        if self._active < self._limit and not self._queued:
+            self._grant(queue, max(queue.finish, self._vtime))
+            return
+        loop = asyncio.get_event_loop()
+        fut = loop.create_future()
+        if queue._head() is None:
+            # The queue was idle, it doesn't get to catch up on turns it didn't use
+            queue.start = max(queue.finish, self._vtime)
+        heapq.heappush(queue.waiters, (_never if deadline is None else deadline, next(self._counter), fut))
+        self._queued = self._queued + 1
+        try:
+            if deadline is None:
+                await fut
+            else:
+                await asyncio.wait_for(fut, deadline - loop.time())
+        except (asyncio.CancelledError, asyncio.TimeoutError) as exc:
+            if fut.cancelled():
+                self._queued = self._queued - 1
+                # A cancelled head may have been what blocked the others
+                self._wake()
+            else:
+                # The slot was handed over right before the cancel landed
+                self.release()
+            if isinstance(exc, asyncio.TimeoutError):
+                raise DeadlineExceeded("Waited past the deadline in queue {!r}".format(queue.name))
+            raise
+
+    def release(self):
+        """Gives a slot back"""
+        self._active = self._active - 1
+        self._wake()
+
+    def slot(self, queue=priority_default, deadline=None):
+        """Async context manager holding a slot for its duration"""
+        return _Slot(self, queue, deadline)
+
+
+class _Slot:
+    def __init__(self, scheduler, queue, deadline):
+        self.scheduler = scheduler
+        self.queue = queue
+        self.deadline = deadline
+
+    async def __aenter__(self):
+        await self.scheduler.acquire(self.queue, self.deadline)
+
+    async def __aexit__(self, *args):
+        self.scheduler.release()
@@ -1,9 +1,11 @@
-from ezurl import Url
+from .utils import LazyModule
 from collections import OrderedDict
 
 API_URL = "www.nationstates.net/cgi-bin/api.cgi"
 POST_API_URL = "https://www.nationstates.net/cgi-bin/api.cgi"
 
+ezurl = LazyModule("ezurl")
+
 
 def shard_object_extract(shards):
     store = dict()
@@ -112,9 +114,9 @@ class Shard(object):
 
 def gen_url(api, shards, version, API_URL=API_URL):
     if not api[0] in {"world", 'cards', 'card'}:
-        url = Url(API_URL).query(**({api[0]: api[1]}))
+        url = ezurl.Url(API_URL).query(**({api[0]: api[1]}))
     else:
-        url = Url(API_URL)
+        url = ezurl.Url(API_URL)
     if shards:
         shard_package = tuple(shard_generator(shards))
         if shard_package:
@@ -1,7 +1,48 @@
 """ Useful functions for dealing with the API response or other functionality"""
 from time import sleep
-from xmltodict import parse
+from xml.parsers import expat
 import asyncio
+import html
+import importlib
+import re
+
+
+class LazyModule:
+
+    """
+    Stands in for a module that is only imported once one of its attributes is used.
+
+    aiohttp alone is most of the import time of this package, and plenty of uses
+    (parsing dumps, reading a crawl journal) never make a request.
+
+    """
+    def __init__(self, name):
+        self.__name = name
+        self.__module = None
+
+    def __getattr__(self, attr):
+        if self.__module is None:
+            self.__module = importlib.import_module(self.__name)
+        return getattr(self.__module, attr)
+
+    def __repr__(self):
+        return "<LazyModule:{}>".format(self.__name)
+
+
+xmltodict = LazyModule("xmltodict")
+
+def parse(xml, **kwargs):
+    """xmltodict.parse"""
+    return xmltodict.parse(xml, **kwargs)
+
+def beautifulsoup():
+    """BeautifulSoup, None if it isn't installed"""
+    try:
+        from bs4 import BeautifulSoup
+    except ImportError:
+        # Optional, only used for error pages too odd for error_message's regex
+        return None
+    return BeautifulSoup
 
 SleepRequestsLock = asyncio.Lock()
 
@@ -29,37 +70,191 @@ def pyns_decode_entities(string):
     return string
 
 
-def _parsedict(x, dicttype):
+def _parsedict(x, dicttype, keys=None):
     """
     This function recursively loops through the processed xml (now dicttype)
     it unorderers Ordereddicttypes and converts them to regular dicttypeionaries
+
+    Every node is visited once. keys caches the converted key names,
+    since tag names repeat a lot.
+
+    Requests don't go through here anymore, parsetree builds the tree directly.
+    This is kept as the reference parsetree is tested against (tests/test_parser.py,
+    benchmarks/bench_parsedict.py) and for code converting parse() output itself.
     """
-    if isinstance(x, list):
-        gen_list = [dicttype(_parsedict(y, dicttype)) if isinstance(
-            _parsedict(y, dicttype), dicttype) else _parsedict(y, dicttype) for y in x]
-        return gen_list
+    if keys is None:
+        keys = dict()
     if isinstance(x, str):
-        return pyns_decode_entities(x)
+        if "|PYNATIONSTATES_" in x:
+            return pyns_decode_entities(x)
+        return x
     if isinstance(x, dict):
         newdicttype = dicttype()
-        for key in x.keys():
-            if key[0] in ["@", "#"]:
-                thiskey = key[1:].lower()
-            else:
-                thiskey = key.lower()
-            this_lower = _parsedict(x[key], dicttype)
-            newdicttype[thiskey] = dicttype(this_lower) if isinstance(
-                this_lower, dicttype) else this_lower
+        for key, value in x.items():
+            try:
+                thiskey = keys[key]
+            except KeyError:
+                if key[0] in ["@", "#"]:
+                    thiskey = keys[key] = key[1:].lower()
+                else:
+                    thiskey = keys[key] = key.lower()
+            newdicttype[thiskey] = _parsedict(value, dicttype, keys)
         return newdicttype
-    if x is None:
-        return None
+    if isinstance(x, list):
+        return [_parsedict(y, dicttype, keys) for y in x]
+    return None
+
+# Named entities outside of the five XML defines. Nationstates sometimes sends
+# html ones, which expat rejects
+_html_entity = re.compile(r"&(?!(?:amp|lt|gt|quot|apos);)([A-Za-z][A-Za-z0-9]*);")
+
+def _unescape_html_entity(match):
+    # Entities html doesn't know either are left for the parser to complain about
+    return html.unescape(match.group(0))
+
+def pyns_unescape_html_entities(xml):
+    """Replaces html entities expat can't handle with their characters"""
+    if "&" not in xml:
+        return xml
+    return _html_entity.sub(_unescape_html_entity, xml)
+
+
+class _TreeBuilder:
+
+    """
+    Builds the same tree as _parsedict(parse(xml), dicttype) straight
+    from expat events, in one pass and without an intermediate tree.
+
+    Attributes and children go into the element's dict with lower cased keys,
+    text only elements become strings, repeated children become lists.
+
+    With item_depth, elements at that depth (the root is 1) are handed to
+    item_callback as soon as they close instead of being kept in the tree.
+    This is how large files are parsed with flat memory use.
+    """
+    def __init__(self, dicttype=dict, item_depth=0, item_callback=None):
+        self.dicttype = dicttype
+        self.item_depth = item_depth
+        self.item_callback = item_callback
+        # Tag names repeat a lot, only lower each one once
+        self.keys = dict()
+        self.stack = []
+        self.depth = 0
+        self.item = None
+        self.seen = None
+        self.data = None
+
+    def _key(self, name):
+        try:
+            return self.keys[name]
+        except KeyError:
+            key = self.keys[name] = name.lower()
+            return key
+
+    def start(self, name, attrs):
+        self.depth = self.depth + 1
+        self.stack.append((self.item, self.seen, self.data))
+        self.data = None
+        self.seen = None
+        if attrs:
+            item = self.dicttype()
+            key = self._key
+            for i in range(0, len(attrs), 2):
+                value = attrs[i+1]
+                if "|PYNATIONSTATES_" in value:
+                    value = pyns_decode_entities(value)
+                item[key(attrs[i])] = value
+            self.item = item
+        else:
+            self.item = None
+
+    def characters(self, data):
+        if self.data is None:
+            self.data = [data]
+        else:
+            self.data.append(data)
+
+    def end(self, name):
+        item = self.item
+        text = None
+        if self.data is not None:
+            text = "".join(self.data).strip() or None
+            if text is not None and "|PYNATIONSTATES_" in text:
+                text = pyns_decode_entities(text)
+        if item is not None:
+            if text is not None:
+                item["text"] = text
+            value = item
+        else:
+            value = text
+        parent, seen, self.data = self.stack.pop()
+        if self.depth == self.item_depth:
+            self.depth = self.depth - 1
+            self.item = parent
+            self.seen = seen
+            self.item_callback(value)
+            return
+        self.depth = self.depth - 1
+        if parent is None:
+            parent = self.dicttype()
+        key = self._key(name)
+        if seen is None:
+            seen = {name}
+            parent[key] = value
+        elif name in seen:
+            # Repeated tag
+            current = parent[key]
+            if type(current) is list:
+                current.append(value)
+            else:
+                parent[key] = [current, value]
+        else:
+            seen.add(name)
+            parent[key] = value
+        self.item = parent
+        self.seen = seen
+
+    def parser(self):
+        parser = expat.ParserCreate("utf-8")
+        parser.ordered_attributes = True
+        parser.buffer_text = True
+        parser.StartElementHandler = self.start
+        parser.EndElementHandler = self.end
+        parser.CharacterDataHandler = self.characters
+        return parser
+
+    def parse(self, xml):
+        self.parser().Parse(xml, True)
+        return self.item
+
 
 def parsetree(xml, dicttype=dict):
     """Converts xml to a simple dicttypeionary"""
-    return _parsedict(parse(xml), dicttype)
+    return _TreeBuilder(dicttype).parse(xml)
 
 async def sleep_thread(n):
     """All Sleep code will be in here, to allow uniform behavior
      if changes are needed"""
     # Currently we just python's built in sleep library """
     await asyncio.sleep(n)
+
+
+_h1 = re.compile(r"<h1\b[^>]*>(.*?)</h1\s*>", re.IGNORECASE | re.DOTALL)
+_tag = re.compile(r"<[^>]*>")
+
+def error_message(page):
+    """Text of the first <h1> of an error page, same as BeautifulSoup's h1.text
+
+        NationStates error pages are small and regular, so a regex does,
+        an unclosed h1 falls back to BeautifulSoup if it's installed
+    """
+    page = page or ""
+    match = _h1.search(page)
+    if match is not None:
+        return html.unescape(_tag.sub("", match.group(1)))
+    BeautifulSoup = beautifulsoup()
+    if BeautifulSoup is not None:
+        h1 = BeautifulSoup(page, "html.parser").h1
+        if h1 is not None:
+            return h1.text
+    return ""
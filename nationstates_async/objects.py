@@ -1,15 +1,19 @@
 from .nsapiwrapper.objects import NationAPI, RegionAPI, WorldAPI, WorldAssemblyAPI, TelegramAPI, CardsAPI
 from .nsapiwrapper.urls import Shard
-from .nsapiwrapper.utils import parsetree, parse, pyns_encode_entities
+from .nsapiwrapper.utils import parsetree, parse, pyns_encode_entities, pyns_unescape_html_entities, LazyModule
 
 from xml.parsers.expat import ExpatError
+from array import array
 import html
+import sys
 from functools import wraps
+import asyncio
 
-from .exceptions import ConflictError, InternalServerError, CloudflareServerError, APIUsageError, NotAuthenticated, NotFound
+from .exceptions import ConflictError, InternalServerError, CloudflareServerError, APIUsageError, NotAuthenticated, NotFound, APIRateLimitBan, CircuitOpen
 from .info import nation_shards, region_shards, world_shards, wa_shards, individual_cards_shards
 
-import aiohttp
+aiohttp = LazyModule("aiohttp")
+
 
 
 # Some Lines may have # pragma: no cover to specify to ignore coverage misses here
@@ -77,19 +81,35 @@ class NSDict(dict):
             raise AttributeError('\'{}\' has no attribute \'{}\''.format(
                 type(self), attr))
 
+class APIResponseDict(dict):
+    """Full response, data_xmltodict is only parsed when it's asked for"""
+
+    def __missing__(self, key):
+        if key == "data_xmltodict":
+            value = self[key] = parse(self._parsed_xml)
+            return value
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key == "data_xmltodict" and key not in self:
+            return self[key]
+        return super().get(key, default)
+
 def response_parser(response, full_response, use_nsdict=True, escape=False):
     raw_xml = response["xml"]
     if escape:
         xml = html.unescape(pyns_encode_entities(raw_xml))
     else:
-        xml = raw_xml
+        # Handles the html entities Nationstates sends without a second parse
+        xml = pyns_unescape_html_entities(raw_xml)
     if full_response:
+        response = APIResponseDict(response)
+        response._parsed_xml = xml
         try:
             if use_nsdict:
                 response["data"] = parsetree(xml, NSDict)
             else:
                 response["data"] = parsetree(xml)
-            response["data_xmltodict"] = parse(xml)
             response["data_parse_success"] = True
         except ExpatError:
             if escape is False:
@@ -113,6 +133,10 @@ def response_parser(response, full_response, use_nsdict=True, escape=False):
             # Will likely replace with Exception asking to create a github issue
             return xml
 
+def normalize_name(name):
+    """Nationstates treats names case insensitively and spaces as underscores"""
+    return name.strip().lower().replace(" ", "_")
+
 def bad_api_parameter(param, api_name):
     if param == "":
         raise ValueError("{} API's argument cannot be an empty string".format(api_name.upper()))
@@ -128,13 +152,84 @@ class NSDict(dict):
             raise AttributeError('\'{}\' has no attribute \'{}\''.format(
                 type(self), attr))
 
+class LazyNameSequence:
+
+    """
+    Read only sequence over a separated list of names, like the
+    world's nations shard, without splitting it up front.
+
+    Items are created with factory (Nation, Region...) only when accessed,
+    or are plain interned strings if factory is None.
+    Iterating scans the string, indexing builds a compact offset table once.
+
+    """
+    def __init__(self, raw, sep, factory=None):
+        self.raw = raw or ""
+        self.sep = sep
+        self.factory = factory
+        self._starts = None
+
+    def __len__(self):
+        return self.raw.count(self.sep) + 1 if self.raw else 0
+
+    def _make(self, name):
+        name = sys.intern(name)
+        return name if self.factory is None else self.factory(name)
+
+    def __iter__(self):
+        raw, sep = self.raw, self.sep
+        if not raw:
+            return
+        start = 0
+        while True:
+            end = raw.find(sep, start)
+            if end == -1:
+                yield self._make(raw[start:])
+                return
+            yield self._make(raw[start:end])
+            start = end + len(sep)
+
+    def _offsets(self):
+        if self._starts is None:
+            raw, sep = self.raw, self.sep
+            starts = array("L", [0]) if raw else array("L")
+            position = raw.find(sep)
+            while position != -1:
+                starts.append(position + len(sep))
+                position = raw.find(sep, position + len(sep))
+            self._starts = starts
+        return self._starts
+
+    def __getitem__(self, index):
+        starts = self._offsets()
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(starts)))]
+        if index < 0:
+            index = index + len(starts)
+        if not 0 <= index < len(starts):
+            raise IndexError("name index out of range")
+        end = starts[index+1] - len(self.sep) if index + 1 < len(starts) else len(self.raw)
+        return self._make(self.raw[starts[index]:end])
+
+    def names(self):
+        """The same sequence, as interned strings"""
+        return LazyNameSequence(self.raw, self.sep)
+
+    def __repr__(self):
+        return "<LazyNameSequence: {} names>".format(len(self))
+
 class API_WRAPPER:
     """A object meant to be inherited that handles all shared code that each API endpoint uses"""
+    # Handles are made by the hundred thousand when crawling, keep them small
+    __slots__ = ("api_mother", "_current_api", "__weakref__")
     auto_shards = set()
+    # Whether a 429 is waited out and retried, see retry.RetryPolicy
+    _retry_ratelimit_ban = True
     _get_shard_ = set("get_"+x for x in auto_shards)
 
     def __init__(self, apiwrapper):
         self.api_mother = apiwrapper
+        self._current_api = None
 
     def __getattr__(self, attr):
         """Implements Auto Implementation of Simpler shards"""
@@ -166,7 +261,17 @@ class API_WRAPPER:
             raise ValueError("{} is not a supported auto shard".format(attr))
 
     def _set_apiwrapper(self, current_api):
-        self.current_api = current_api
+        self._current_api = current_api
+
+    @property
+    def current_api(self):
+        # Created on first request, most handles from World.nations never make one
+        if self._current_api is None:
+            self._current_api = self._create_api()
+        return self._current_api
+
+    def _create_api(self):
+        return self._determine_api()
 
     def _parser(self, response, full_response):
         resp = response_parser(response, full_response, 
@@ -179,11 +284,36 @@ class API_WRAPPER:
             except TypeError:
                 return resp
 
-    async def _request(self, shards):
-        return await self.current_api.request(shards=shards)
+    async def _request(self, shards, priority=None, cache=True, max_age=None, timeout=None):
+        response_cache = self.api_mother.cache
+        if response_cache is None or not cache or not self.current_api.shared_responses:
+            return await self.current_api.request(shards=shards, priority=priority, timeout=timeout)
+        key = self.current_api.url(shards)
+        # One lookup, the backend may be a file
+        stale = response_cache.lookup(key)
+        resp = response_cache.fresh_response(key, stale, max_age)
+        if resp is not None:
+            return dict(resp)
+        # A stale copy can still be revalidated instead of downloaded again
+        validators = stale.validators() if stale is not None else None
+        try:
+            resp = await self.current_api.request(shards=shards, priority=priority, request_headers=validators, timeout=timeout)
+        except CircuitOpen:
+            # NationStates is down, an old answer beats none
+            stale_if_error = self.api_mother.stale_if_error
+            if stale is None or stale_if_error is None or stale.age() > stale_if_error:
+                raise
+            resp = dict(stale.response)
+            resp["stale"] = True
+            return resp
+        if resp.get("not_modified"):
+            # Only possible with the validators of stale
+            return dict(response_cache.revalidated(key, stale))
+        response_cache.put(key, resp, response_cache.ttl_for(shards))
+        return dict(resp)
 
-    async def _request_post(self, shards): 
-        return await self.current_api.post(shards=shards)
+    async def _request_post(self, shards, priority=None, timeout=None): 
+        return await self.current_api.post(shards=shards, priority=priority, timeout=timeout)
 
     def _get_shard(self, shard):
         """Dynamically Builds methods to query shard with proper with arg and kwargs support"""
@@ -193,55 +323,88 @@ class API_WRAPPER:
             return await self.get_shards(Shard(shard, *arg, **kwargs), full_response=full_response)
         return get_shard
 
-    async def request(self, shards, full_response, return_status_tuple=False, use_post=False):
+    async def _retried(self, shards, use_post=False, priority=None, cache=True, max_age=None, timeout=None,
+                       only_bans=False):
+        """The unparsed response, failed attempts are retried as the RetryPolicy allows
+
+            :param only_bans: only 429s are retried, other errors are raised right away
+        """
+        policy = self.api_mother.retry_policy
+        if policy is not None:
+            policy.start()
+        # Retries so far of each kind of error
+        retries = dict()
+        while True:
+            try:
+                if use_post:
+                    return await self._request_post(shards, priority, timeout)
+                return await self._request(shards, priority, cache, max_age, timeout)
+            except (ConflictError, CloudflareServerError, InternalServerError, APIRateLimitBan,
+                    aiohttp.ServerDisconnectedError) as exc:
+                if only_bans and not isinstance(exc, APIRateLimitBan):
+                    raise
+                delay = None if policy is None else policy.delay(exc, retries, self._retry_ratelimit_ban)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+
+    async def request(self, shards, full_response, return_status_tuple=False, use_post=False, priority=None, cache=True, max_age=None, timeout=None):
         """Request the API
 
            This method is wrapped by similar functions, not mean't for end user use
         """
         try:
-            if use_post:
-                resp = await self._request_post(shards)
-            else:
-                resp = await self._request(shards)
-
-            if return_status_tuple:
-                return (self._parser(resp, full_response), True)
-            else:
-                return self._parser(resp, full_response)
-        except (ConflictError, CloudflareServerError, InternalServerError, aiohttp.client_exceptions.ServerDisconnectedError) as exc:
-            # The Retry system
+            resp = await self._retried(shards, use_post, priority, cache, max_age, timeout,
+                                       only_bans=return_status_tuple)
+        except (ConflictError, CloudflareServerError, InternalServerError, aiohttp.ServerDisconnectedError):
             if return_status_tuple:
                 return (None, False)
-            elif self.api_mother.do_retry:
-                request_limit = self.api_mother.max_retries
-                await asyncio.sleep(self.api_mother.retry_sleep)
-                resp = await self.request(shards, full_response, True, use_post)
-                while not resp[1]:
-                    await asyncio.sleep(self.api_mother.retry_sleep)
-                    resp = await self.request(shards, full_response, True, use_post)
-                    request_limit = request_limit - 1
-                    if request_limit == 0:
-                        raise exc
-                return resp[0]
-            else:
-                raise exc
+            raise
+
+        if return_status_tuple:
+            return (self._parser(resp, full_response), True)
+        else:
+            return self._parser(resp, full_response)
 
-    async def __get_shards__(self, *args, full_response=False, use_post=False):
+    async def __get_shards__(self, *args, full_response=False, use_post=False, priority=None, cache=True, max_age=None,
+                             timeout=None):
         """Get Shards, internal implementation"""
         if use_post:
-            resp = await self.request(shards=args, full_response=full_response, use_post=True)
+            resp = await self.request(shards=args, full_response=full_response, use_post=True, priority=priority,
+                                      timeout=timeout)
             return resp         
         else:
-            resp = await self.request(shards=args, full_response=full_response, use_post=False)
+            resp = await self.request(shards=args, full_response=full_response, use_post=False, priority=priority,
+                                      cache=cache, max_age=max_age, timeout=timeout)
             return resp
 
     def _check_beta(self):
         if not self.api_mother.enable_beta:
             raise BetaDisabled('Beta Endpoints are not enabled. Pass enable_beta = True to nationstates.Nationstates to suppress')
 
-    async def get_shards(self, *args, full_response=False):
-        """Get Shards"""
-        return await self.__get_shards__(*args, full_response=full_response, use_post=False)
+    def _batch_key(self):
+        """Requests with the same key can be combined into one, None if they can't"""
+        return None
+
+    async def get_shards(self, *args, full_response=False, priority=None, cache=True, max_age=None, timeout=None):
+        """Get Shards
+
+            :param priority: (Optional) slot priority for this request, lower goes first.
+                See nsapiwrapper.info for the defaults
+            :param cache: (Optional) False skips the response cache, if one is enabled
+            :param max_age: (Optional) Oldest cached response in seconds that is acceptable,
+                instead of the shard defaults
+            :param timeout: (Optional) seconds the whole request may take, or an aiohttp.ClientTimeout,
+                instead of the Nationstates timeouts
+        """
+        batcher = self.api_mother.batcher
+        if (batcher is not None and not full_response and priority is None and cache and max_age is None
+                and timeout is None and batcher.can_batch(args)):
+            key = self._batch_key()
+            if key is not None:
+                return await batcher.get_shards(self, key, args)
+        return await self.__get_shards__(*args, full_response=full_response, use_post=False, priority=priority,
+                                         cache=cache, max_age=max_age, timeout=timeout)
 
     def command(self, command, full_response=False, use_post=False, **kwargs): # pragma: no cover
         """Method Interface to the command API for Nationstates"""
@@ -250,6 +413,20 @@ class API_WRAPPER:
         command = Shard(c=command)
         return self.__get_shards__(*(command, Shard(**kwargs)), full_response=full_response, use_post=use_post)
 
+    async def _lazy_names(self, shard, sep, factory, names_only=False, priority=None):
+        resp = await self.get_shards(shard, priority=priority)
+        return LazyNameSequence(resp[shard], sep, None if names_only else factory)
+
+    def watch(self, shards, interval=None, **kwargs):
+        """Watcher polling these shards every interval seconds, see watch.Watcher
+
+            :returns: Watcher, async iterate it for lists of Changes
+        """
+        if interval is not None:
+            kwargs["interval"] = interval
+        from .watch import Watcher
+        return Watcher(self, shards, **kwargs)
+
     @property
     def api(self):
         """Returns the Mother `Nationstates`"""
@@ -257,6 +434,7 @@ class API_WRAPPER:
 
 class Nation(API_WRAPPER):
     """Nation API endpoint handeler"""
+    __slots__ = ("nation_name", "is_auth")
     api_name = NationAPI.api_name
     # These Shards can be used
     # like Nation().shard
@@ -270,7 +448,8 @@ class Nation(API_WRAPPER):
 
         self.is_auth = bool(password or autologin)
         self.nation_name = nation_name
-        self._set_apiwrapper(self._determine_api(nation_name, password, autologin))
+        if self.is_auth:
+            self._set_apiwrapper(self._determine_api(nation_name, password, autologin))
 
     def __repr__(self):
         return "<Nation:'{value}' at {hexloc}>".format(
@@ -284,6 +463,14 @@ class Nation(API_WRAPPER):
         else:
             return self.api.Nation(name)
 
+    def _create_api(self):
+        return self._determine_api(self.nation_name)
+
+    def _batch_key(self):
+        if self.is_auth:
+            return None
+        return (self.api_name, normalize_name(self.nation_name))
+
     def _check_auth(self):
         if not self.is_auth:
             raise NotAuthenticated("Action requires authentication")
@@ -296,6 +483,14 @@ class Nation(API_WRAPPER):
             return False
 
     def authenticate(self, password=None, autologin=None):
+        """Authenticates this handle, returns it
+
+            Handles from Nationstates.nation are shared by everything asking for that name,
+            those are left alone and a new authenticated Nation is returned instead
+        """
+        if self.api_mother._is_shared_handle(self):
+            return type(self)(self.nation_name, self.api_mother, password=password, autologin=autologin)
+        self.is_auth = bool(password or autologin)
         self._set_apiwrapper(self._determine_api(self.nation_name, password, autologin))
         return self
 
@@ -413,6 +608,7 @@ class Nation(API_WRAPPER):
         return resp
 
 class Region(API_WRAPPER):
+    __slots__ = ("region_name",)
     api_name = RegionAPI.api_name
     auto_shards = region_shards
     _get_shard_ = set("get_"+x for x in auto_shards)
@@ -422,11 +618,16 @@ class Region(API_WRAPPER):
         bad_api_parameter(region_name, self.api_name)
 
         self.region_name = region_name
-        self._set_apiwrapper(self._determine_api(region_name))
 
     def _determine_api(self, name):
         return self.api.Region(name)
 
+    def _create_api(self):
+        return self._determine_api(self.region_name)
+
+    def _batch_key(self):
+        return (self.api_name, normalize_name(self.region_name))
+
     def __repr__(self):
         return "<Region:'{value}' at {hexloc}>".format(
             value=self.region_name,
@@ -443,19 +644,33 @@ class Region(API_WRAPPER):
     async def nations(self):
         resp = await self._auto_shard("nations")
         return tuple(self.api_mother.nation(x) for x in resp.split(":"))
-    
+
+    async def lazy_nations(self, names_only=False, priority=None):
+        """Nations in the region as a LazyNameSequence, Nation objects are only
+            created when accessed. names_only gives interned strings instead"""
+        return await self._lazy_names("nations", ":", self.api_mother.nation, names_only, priority)
+
+    async def iter_nations(self, names_only=False, priority=None):
+        """Async iterator over the nations in the region"""
+        for nation in await self.lazy_nations(names_only, priority):
+            yield nation
+
+    def fetch_nations(self, shards, **kwargs):
+        """Requests shards for every nation in the region, see Nationstates.fetch_many"""
+        return self.api_mother.fetch_many(self.iter_nations(names_only=True), shards, **kwargs)
+
 class World(API_WRAPPER):
+    __slots__ = ()
     api_name = WorldAPI.api_name
     auto_shards = world_shards
     _get_shard_ = set("get_"+x for x in auto_shards)
 
-    def __init__(self, api_mother):
-        super().__init__(api_mother)
-        self._set_apiwrapper(self._determine_api())
-
     def _determine_api(self):
         return self.api.World()
 
+    def _batch_key(self):
+        return (self.api_name,)
+
     @property
     async def nations(self):
         resp = await self._auto_shard("nations")
@@ -466,7 +681,47 @@ class World(API_WRAPPER):
         resp = await self._auto_shard("regions")
         return tuple(self.api_mother.region(x) for x in resp.split(","))
 
+    async def lazy_nations(self, names_only=False, priority=None):
+        """Every nation as a LazyNameSequence, Nation objects are only
+            created when accessed. names_only gives interned strings instead"""
+        return await self._lazy_names("nations", ",", self.api_mother.nation, names_only, priority)
+
+    async def iter_nations(self, names_only=False, priority=None):
+        """Async iterator over every nation"""
+        for nation in await self.lazy_nations(names_only, priority):
+            yield nation
+
+    async def lazy_regions(self, names_only=False, priority=None):
+        """Every region as a LazyNameSequence, see lazy_nations"""
+        return await self._lazy_names("regions", ",", self.api_mother.region, names_only, priority)
+
+    async def iter_regions(self, names_only=False, priority=None):
+        """Async iterator over every region"""
+        for region in await self.lazy_regions(names_only, priority):
+            yield region
+
+    def fetch_nations(self, shards, **kwargs):
+        """Requests shards for every nation, see Nationstates.fetch_many"""
+        return self.api_mother.fetch_many(self.iter_nations(names_only=True), shards, **kwargs)
+
+    def fetch_regions(self, shards, **kwargs):
+        """Requests shards for every region, see Nationstates.fetch_many"""
+        return self.api_mother.fetch_many(self.iter_regions(names_only=True), shards, kind="region", **kwargs)
+
+    def stream_happenings(self, filters=None, view=None, **kwargs):
+        """Async iterator of new happenings, each yielded once, oldest first
+
+            :param filters: (Optional) happenings filters, like ["law", "change"]
+            :param view: (Optional) like "region.the_pacific"
+            :param sinceid: (Optional) start after this event id instead of from now
+            :param poll_interval: (Optional) starting seconds between polls
+            :returns: HappeningsStream, its sinceid is the last event handed out
+        """
+        from .happenings import HappeningsStream
+        return HappeningsStream(self, filters=filters, view=view, **kwargs)
+
 class WorldAssembly(API_WRAPPER):
+    __slots__ = ("chamber",)
     api_name = WorldAssemblyAPI.api_name
     auto_shards = wa_shards
     _get_shard_ = set("get_"+x for x in auto_shards)
@@ -476,7 +731,6 @@ class WorldAssembly(API_WRAPPER):
         bad_api_parameter(chamber, self.api_name)
 
         self.chamber = chamber
-        self._set_apiwrapper(self._determine_api(chamber))
 
     def __repr__(self):
         return "< World Assembly:'{value}' at {hexloc}>".format(
@@ -486,6 +740,12 @@ class WorldAssembly(API_WRAPPER):
     def _determine_api(self, chamber):
         return self.api.WorldAssembly(chamber)
 
+    def _create_api(self):
+        return self._determine_api(self.chamber)
+
+    def _batch_key(self):
+        return (self.api_name, self.chamber)
+
     @property
     def nations(self):
         resp = self._auto_shard("nations")
@@ -497,6 +757,9 @@ class WorldAssembly(API_WRAPPER):
         return tuple(self.api_mother.region(x) for x in resp.split(":"))
 
 class Telegram(API_WRAPPER):
+    __slots__ = ("__clientkey__", "__tgid__", "__key__")
+    # A telegram 429 is the per-key send limit, the caller decides when to send again
+    _retry_ratelimit_ban = False
     api_name = TelegramAPI.api_name
     api_value = TelegramAPI.api_value
 
@@ -520,6 +783,7 @@ class Telegram(API_WRAPPER):
 
 class Cards(API_WRAPPER):
     # Shared code for Cards api
+    __slots__ = ()
     api_name = CardsAPI.api_name_multi
     auto_shards = tuple()
     _get_shard_ = set("get_"+x for x in auto_shards)
@@ -583,6 +847,7 @@ class Cards(API_WRAPPER):
 
 
 class IndividualCards(API_WRAPPER):
+    __slots__ = ("__cardid__", "__season__")
     api_name = CardsAPI.api_name_single
     auto_shards = individual_cards_shards
     get_shard = set("get_"+x for x in auto_shards)
@@ -0,0 +1,126 @@
+"""Retrying requests that failed for reasons that tend to go away
+
+    api = Nationstates(user_agent, retry_policy=RetryPolicy(max_retries=3, max_delay=30))
+
+Retries back off exponentially with jitter. Every kind of error has its
+own retry budget per call, and a RetryBudget shared by every call
+keeps an outage from turning into a retry storm that eats the rate limit.
+429s are retried once their Retry-After has passed, if it's short enough.
+"""
+import random
+from collections import deque
+from time import monotonic
+
+from .exceptions import APIRateLimitBan, CloudflareServerError, ConflictError, InternalServerError
+from .info import (retry_base_delay, retry_max_delay, retry_jitter, retry_max_retry_after,
+                   retry_budget_minimum, retry_budget_ratio)
+from .nsapiwrapper.info import ratelimit_within
+from .nsapiwrapper.utils import LazyModule
+
+aiohttp = LazyModule("aiohttp")
+
+
+class RetryBudget:
+
+    """
+    Limits retries across every call, to minimum per window seconds
+    plus ratio for every request made in that window.
+
+    """
+    def __init__(self, minimum=retry_budget_minimum, ratio=retry_budget_ratio, within=ratelimit_within):
+        self.minimum = minimum
+        self.ratio = ratio
+        self.within = within
+        self.requests = deque()
+        self.retries = deque()
+
+    def _expire(self, now):
+        for times in (self.requests, self.retries):
+            while times and times[0] <= now - self.within:
+                times.popleft()
+
+    def deposit(self):
+        """Records a request"""
+        now = monotonic()
+        self._expire(now)
+        self.requests.append(now)
+
+    def withdraw(self):
+        """Records a retry if the budget allows one, returns whether it did"""
+        now = monotonic()
+        self._expire(now)
+        if len(self.retries) >= self.minimum + self.ratio * len(self.requests):
+            return False
+        self.retries.append(now)
+        return True
+
+
+class RetryPolicy:
+
+    """
+    Decides whether and when a failed request is tried again.
+
+        :param max_retries: retries per call for each kind of error
+        :param budgets: {exception class: retries per call}, replaces max_retries
+            for those errors. The first class the error is an instance of counts.
+        :param base_delay: seconds before the first retry, doubled for each one after
+        :param max_delay: longest backoff
+        :param jitter: up to this fraction of a backoff is taken off at random
+        :param max_retry_after: 429s asking to wait longer than this are raised
+        :param budget: RetryBudget shared by every call, None for no limit
+
+    """
+    # Dropped connections (aiohttp.ServerDisconnectedError) are retried too, see retryable
+    retry_on = (ConflictError, CloudflareServerError, InternalServerError, APIRateLimitBan)
+
+    def __init__(self, max_retries=5, budgets=None, base_delay=retry_base_delay, max_delay=retry_max_delay,
+                 jitter=retry_jitter, max_retry_after=retry_max_retry_after, budget=True):
+        self.max_retries = max_retries
+        self.budgets = dict(budgets) if budgets else dict()
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.max_retry_after = max_retry_after
+        self.budget = RetryBudget() if budget is True else budget
+
+    def start(self):
+        """Called once per call, before its first attempt"""
+        if self.budget is not None:
+            self.budget.deposit()
+
+    def _kind(self, exc):
+        for kind in self.budgets:
+            if isinstance(exc, kind):
+                return kind
+        return type(exc)
+
+    def backoff(self, retry):
+        """Seconds to wait before retry number retry, counting from 0"""
+        delay = min(self.max_delay, self.base_delay * 2 ** retry)
+        return delay * (1 - self.jitter * random.random())
+
+    def retryable(self, exc):
+        return isinstance(exc, self.retry_on) or isinstance(exc, aiohttp.ServerDisconnectedError)
+
+    def delay(self, exc, retries, retry_ratelimit_ban=True):
+        """Seconds to wait before trying again, None if the error should be raised
+
+            :param retries: dict kept by the caller for the whole call, updated here
+        """
+        if not self.retryable(exc):
+            return None
+        if isinstance(exc, APIRateLimitBan):
+            if (not retry_ratelimit_ban or exc.retry_after is None
+                    or exc.retry_after > self.max_retry_after):
+                return None
+        kind = self._kind(exc)
+        count = retries.get(kind, 0)
+        if count >= self.budgets.get(kind, self.max_retries):
+            return None
+        if self.budget is not None and not self.budget.withdraw():
+            return None
+        retries[kind] = count + 1
+        if isinstance(exc, APIRateLimitBan):
+            # The server said exactly how long, a little extra so it's surely over
+            return exc.retry_after + random.random()
+        return self.backoff(sum(retries.values()) - 1)
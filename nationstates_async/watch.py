@@ -0,0 +1,179 @@
+"""Watching a nation or region for changes
+
+    watcher = api.region("the_pacific").watch(["delegate", "officers", "nations", "embassies"])
+    async for changes in watcher:
+        for change in changes:
+            print(change)
+
+Only a digest per shard is compared, and the whole response is hashed
+before it's parsed, so an unchanged region costs one request and one hash.
+Name lists like nations are kept as sets and reported as added/removed,
+so are repeated elements like officers or embassies.
+"""
+import asyncio
+import hashlib
+import json
+import sys
+
+from .info import watch_interval
+
+# Shards holding separated name lists
+set_shards = {
+    "nations": ":",
+    "banlist": ":",
+    "wanations": ",",
+    "endorsements": ",",
+}
+
+
+def _digest(data):
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=16).digest()
+
+def _canonical(value):
+    return json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+def _items(value):
+    # <OFFICERS><OFFICER>...</OFFICER>...</OFFICERS>, one child repeated
+    if isinstance(value, dict) and len(value) == 1:
+        items = next(iter(value.values()))
+        if isinstance(items, list):
+            return items
+        if isinstance(items, (dict, str)):
+            return [items]
+    return None
+
+
+class Change:
+    """One shard that changed. added/removed are set for list like shards, old/new otherwise"""
+    __slots__ = ("target", "shard", "old", "new", "added", "removed")
+
+    def __init__(self, target, shard, old=None, new=None, added=None, removed=None):
+        self.target = target
+        self.shard = shard
+        self.old = old
+        self.new = new
+        self.added = added
+        self.removed = removed
+
+    def __repr__(self):
+        if self.added is not None:
+            return "<Change:{} {} +{} -{}>".format(self.target, self.shard, len(self.added), len(self.removed))
+        return "<Change:{} {} {!r} -> {!r}>".format(self.target, self.shard, self.old, self.new)
+
+
+class _Snapshot:
+    """What's kept of a shard between checks"""
+    __slots__ = ("digest", "value", "members")
+
+    def __init__(self, digest, value=None, members=None):
+        self.digest = digest
+        self.value = value
+        self.members = members
+
+
+class Watcher:
+
+    """
+    Polls shards of a Nation or Region every interval seconds and reports what changed.
+
+    check() does a single poll, iterating the watcher polls forever and
+    yields the list of Changes of every poll that found some.
+    The first poll only records the current state.
+
+    """
+    def __init__(self, handle, shards, interval=watch_interval, set_shards=set_shards, priority=None):
+        if isinstance(shards, str):
+            shards = (shards,)
+        self.handle = handle
+        self.shards = tuple(shards)
+        # Keys the shards come back as
+        self.names = tuple(str(shard).lower() for shard in self.shards)
+        self.interval = interval
+        self.set_shards = set_shards
+        self.priority = priority
+        self.response_digest = None
+        self.snapshot = None
+
+    @property
+    def target(self):
+        return getattr(self.handle, "nation_name", None) or getattr(self.handle, "region_name", None)
+
+    def _snapshot(self, shard, value):
+        if shard in self.set_shards and isinstance(value, str):
+            names = value.split(self.set_shards[shard]) if value else ()
+            return _Snapshot(_digest(value), members=frozenset(sys.intern(name) for name in names))
+        if isinstance(value, str):
+            return _Snapshot(_digest(value), value=value)
+        items = _items(value)
+        if items is not None:
+            members = frozenset(_canonical(item) for item in items)
+            return _Snapshot(_digest(_canonical(value)), members=members)
+        return _Snapshot(_digest(_canonical(value)), value=value)
+
+    def _decode(self, shard, members):
+        # Repeated elements are kept as canonical json
+        if shard in self.set_shards:
+            return sorted(members)
+        return [json.loads(member) for member in sorted(members)]
+
+    def _value(self, shard, snapshot):
+        if snapshot is None:
+            return None
+        if snapshot.members is not None:
+            return self._decode(shard, snapshot.members)
+        return snapshot.value
+
+    def _diff(self, shard, old, new):
+        if old is None or new is None:
+            # The shard appeared or went missing
+            return Change(self.target, shard, old=self._value(shard, old), new=self._value(shard, new))
+        if old.members is not None and new.members is not None:
+            return Change(self.target, shard,
+                          added=self._decode(shard, new.members - old.members),
+                          removed=self._decode(shard, old.members - new.members))
+        return Change(self.target, shard, old=self._value(shard, old), new=self._value(shard, new))
+
+    def compare(self, data):
+        """Records data (shard -> value) as the current state, returns the Changes since the last one"""
+        snapshot = {shard: self._snapshot(shard, value) for shard, value in data.items()
+                    if shard in self.names}
+        changes = []
+        if self.snapshot is not None:
+            for shard in self.names:
+                old = self.snapshot.get(shard)
+                new = snapshot.get(shard)
+                if old is None and new is None:
+                    continue
+                if old is not None and new is not None:
+                    if old.members is not None and new.members is not None:
+                        # The digest also changes when only the order did
+                        if old.members == new.members:
+                            continue
+                    elif old.digest == new.digest:
+                        continue
+                changes.append(self._diff(shard, old, new))
+        self.snapshot = snapshot
+        return changes
+
+    async def check(self):
+        """Polls once, returns the list of Changes"""
+        # Retried like any request, but parsed only if the bytes changed
+        resp = await self.handle._retried(self.shards, priority=self.priority, cache=False)
+        digest = _digest(resp["xml"] or "")
+        if digest == self.response_digest:
+            # Same bytes as last time, nothing to parse
+            return []
+        self.response_digest = digest
+        data = self.handle._parser(resp, False)
+        return self.compare(data)
+
+    def __aiter__(self):
+        return self._run()
+
+    async def _run(self):
+        while True:
+            changes = await self.check()
+            if changes:
+                yield changes
+            await asyncio.sleep(self.interval)
+
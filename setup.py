@@ -30,8 +30,10 @@ version = '0.0.1'
 
 from setuptools import setup
 setup(name='nationstates-async',
-      install_requires=["beautifulsoup4==4.9.3", "ezurl==0.1.3.25",
+      install_requires=["ezurl==0.1.3.25",
                         "aiohttp==3.7.*", "xmltodict==0.12.0" ],
+      # Only used as a fallback for error pages the built in extractor can't read
+      extras_require={"html": ["beautifulsoup4==4.9.3"]},
       version=version,
       description='Nationstates API wrapper for python',
       author='Joshua W',
@@ -0,0 +1,103 @@
+"""Fakes shared by the tests, they replace the http layer so nothing goes over the network"""
+import asyncio
+
+from nationstates_async.nsapiwrapper.objects import NationstatesAPI, APIResponse
+
+
+NATION_XML = ('<NATION id="testlandia"><NAME>Testlandia</NAME><POPULATION>100</POPULATION>'
+              '<REGION>Testregionia</REGION><UNSTATUS>Non-member</UNSTATUS></NATION>')
+
+
+class FakeTransport:
+    """Replaces the http layer, records every url requested"""
+
+    def __init__(self, xml=NATION_XML):
+        self.xml = xml
+        self.urls = []
+        self.timeouts = []
+
+    async def get(self, api, url, headers):
+        self.urls.append(url)
+        await asyncio.sleep(0)
+        return APIResponse(200, self.xml, {"X-ratelimit-requests-seen": "1"}, None)
+
+    def __enter__(self):
+        self.original = NationstatesAPI._request_wrap_get
+        transport = self
+
+        async def _request_wrap_get(api, url, headers, timeout=None):
+            transport.timeouts.append(timeout)
+            return await transport.get(api, url, headers)
+        NationstatesAPI._request_wrap_get = _request_wrap_get
+        return self
+
+    def __exit__(self, *args):
+        NationstatesAPI._request_wrap_get = self.original
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+class FlakyTransport(FakeTransport):
+    """Answers with each (status, headers) in turn, then with the nation"""
+
+    def __init__(self, *failures):
+        super().__init__()
+        self.failures = list(failures)
+
+    async def get(self, api, url, headers):
+        self.urls.append(url)
+        await asyncio.sleep(0)
+        if self.failures:
+            status, headers = self.failures.pop(0)
+            return APIResponse(status, "<h1>Too Many Requests</h1>", headers, None)
+        return APIResponse(200, self.xml, {}, None)
+
+
+class NationTransport(FakeTransport):
+    """Answers with the nation in the url, 404 for names starting with missing"""
+
+    async def get(self, api, url, headers):
+        self.urls.append(url)
+        name = url.split("nation=")[1].split("&")[0]
+        # Later names answer first, so completion order isn't request order
+        await asyncio.sleep(0.01 / (len(self.urls) + 1))
+        if name.startswith("missing"):
+            return APIResponse(404, "<h1>Unknown nation</h1>", {"X-ratelimit-requests-seen": "1"}, None)
+        xml = '<NATION id="{0}"><POPULATION>{1}</POPULATION></NATION>'.format(name, len(name))
+        return APIResponse(200, xml, {"X-ratelimit-requests-seen": "1"}, None)
+
+
+async def collect(fetch, stop_after=None):
+    results = []
+    async for result in fetch:
+        results.append(result)
+        if stop_after is not None and len(results) == stop_after:
+            await fetch.aclose()
+            break
+    return results
+
+
+class HangingTransport(FakeTransport):
+    """Never answers until released"""
+
+    def __init__(self):
+        super().__init__()
+        self.released = None
+        self.cancelled = 0
+
+    async def get(self, api, url, headers):
+        if self.released is None:
+            self.released = asyncio.Event()
+        self.urls.append(url)
+        try:
+            await self.released.wait()
+        except asyncio.CancelledError:
+            self.cancelled = self.cancelled + 1
+            raise
+        return await super().get(api, url, headers)
@@ -1,4 +1,5 @@
 import unittest
+import asyncio
 import nationstates_async as ns
 
 
@@ -16,6 +17,40 @@ class nationstates_api_object(unittest.TestCase):
         api.user_agent = "New user_agent"
         self.assertEqual(api.user_agent, "New user_agent")
 
+    def test_api_session_lifecycle(self):
+        async def run():
+            async with ns.Nationstates(ua) as api:
+                session = await api.api.get_session()
+                self.assertIs(session, await api.api.get_session())
+            self.assertTrue(session.closed)
+            self.assertIsNone(api.api.session)
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(run())
+        finally:
+            loop.close()
+
+    def test_session_replaced_on_new_loop(self):
+        api = ns.Nationstates(ua)
+        sessions = []
+        connectors = []
+        for _ in range(2):
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                sessions.append(loop.run_until_complete(api.api.get_session()))
+                connectors.append(sessions[-1].connector)
+                if len(sessions) == 2:
+                    loop.run_until_complete(api.close())
+            finally:
+                asyncio.set_event_loop(None)
+                loop.close()
+        self.assertIsNot(sessions[0], sessions[1])
+        # The first one was let go of when the second loop took over
+        self.assertTrue(sessions[0].closed)
+        self.assertTrue(connectors[0].closed)
+        self.assertTrue(sessions[1].closed)
+
   
    # pass
 
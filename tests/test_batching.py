@@ -0,0 +1,201 @@
+import unittest
+import asyncio
+
+import nationstates_async as ns
+from nationstates_async.nsapiwrapper.objects import APIResponse
+
+from .helpers import FakeTransport, HangingTransport, run
+
+
+class BatchingTest(unittest.TestCase):
+
+    def test_batched_shards(self):
+        api = ns.Nationstates("placeholder", batch_shards=True)
+        nation = api.nation("testlandia")
+
+        async def main():
+            return await asyncio.gather(nation.population, nation.region,
+                                        api.nation("Testlandia").get_shards("wa"))
+
+        with FakeTransport() as transport:
+            population, region, wa = run(main())
+        self.assertEqual(len(transport.urls), 1)
+        self.assertIn("population", transport.urls[0])
+        self.assertEqual(population, "100")
+        self.assertEqual(region.region_name, "Testregionia")
+        self.assertEqual(wa.unstatus, "Non-member")
+
+    def test_batch_tasks_are_kept(self):
+        api = ns.Nationstates("placeholder", batch_shards=True)
+        nation = api.nation("testlandia")
+        seen = []
+
+        async def main():
+            waiting = asyncio.ensure_future(nation.population)
+            while transport.released is None:
+                await asyncio.sleep(api.batcher.window)
+            # Flushed, the request is in flight
+            seen.append(len(api.batcher.sending))
+            transport.released.set()
+            return await waiting
+
+        with HangingTransport() as transport:
+            self.assertEqual(run(main()), "100")
+        self.assertEqual(seen, [1])
+        self.assertEqual(api.batcher.sending, set())
+
+    def test_callers_get_their_own_shards(self):
+        api = ns.Nationstates("placeholder", batch_shards=True)
+        nation = api.nation("testlandia")
+
+        async def main():
+            return await asyncio.gather(nation.get_shards("population"), nation.get_shards("region"),
+                                        nation.get_shards("wa"))
+
+        with FakeTransport() as transport:
+            population, region, wa = run(main())
+        self.assertEqual(len(transport.urls), 1)
+        self.assertIn("population", population)
+        self.assertNotIn("region", population)
+        self.assertNotIn("population", region)
+        # wa comes back as unstatus, which no shard of the batch claims
+        self.assertEqual(wa["unstatus"], "Non-member")
+        self.assertNotIn("population", wa)
+
+    def test_failed_batch_retried_per_caller(self):
+        api = ns.Nationstates("placeholder", batch_shards=True, retry_policy=None)
+        nation = api.nation("testlandia")
+
+        class PickyTransport(FakeTransport):
+            async def get(self, api, url, headers):
+                self.urls.append(url)
+                if "notashard" in url:
+                    return APIResponse(400, "<h1>Unknown shard</h1>", {"X-ratelimit-requests-seen": "1"}, None)
+                return APIResponse(200, self.xml, {"X-ratelimit-requests-seen": "1"}, None)
+
+        async def main():
+            return await asyncio.gather(nation.get_shards("population"), nation.get_shards("notashard"),
+                                        return_exceptions=True)
+
+        with PickyTransport() as transport:
+            population, error = run(main())
+        # The combined request, then each caller on its own
+        self.assertEqual(len(transport.urls), 3)
+        self.assertEqual(population["population"], "100")
+        self.assertIsInstance(error, ns.exceptions.BadRequest)
+
+    def test_abandoned_batch_not_sent(self):
+        api = ns.Nationstates("placeholder", batch_shards=True)
+        nation = api.nation("testlandia")
+
+        async def main():
+            callers = [asyncio.ensure_future(nation.get_shards(shard)) for shard in ("population", "region")]
+            await asyncio.sleep(0)
+            for caller in callers:
+                caller.cancel()
+            await asyncio.sleep(api.batcher.window * 2)
+
+        with FakeTransport() as transport:
+            run(main())
+        self.assertEqual(transport.urls, [])
+
+    def test_parameter_shards_not_batched(self):
+        api = ns.Nationstates("placeholder", batch_shards=True)
+        nation = api.nation("testlandia")
+
+        async def main():
+            return await asyncio.gather(nation.get_shards("name"),
+                                        nation.get_shards(ns.Shard("census", scale="1")))
+
+        with FakeTransport() as transport:
+            run(main())
+        self.assertEqual(len(transport.urls), 2)
+
+    def test_batching_off_by_default(self):
+        api = ns.Nationstates("placeholder")
+        nation = api.nation("testlandia")
+
+        async def main():
+            return await asyncio.gather(nation.population, nation.region)
+
+        with FakeTransport() as transport:
+            run(main())
+        self.assertEqual(len(transport.urls), 2)
+
+
+class SingleFlightTest(unittest.TestCase):
+
+    def test_duplicate_requests_share_response(self):
+        api = ns.Nationstates("placeholder")
+
+        async def main():
+            return await asyncio.gather(*(api.nation("testlandia").get_shards("population") for _ in range(5)))
+
+        with FakeTransport() as transport:
+            results = run(main())
+        self.assertEqual(len(transport.urls), 1)
+        self.assertEqual(len(results), 5)
+        self.assertEqual(results[4].population, "100")
+        self.assertEqual(api.api.inflight, {})
+
+    def test_single_flight_disabled(self):
+        api = ns.Nationstates("placeholder", single_flight=False)
+
+        async def main():
+            return await asyncio.gather(*(api.nation("testlandia").get_shards("population") for _ in range(3)))
+
+        with FakeTransport() as transport:
+            run(main())
+        self.assertEqual(len(transport.urls), 3)
+
+    def test_cancelled_callers(self):
+        api = ns.Nationstates("placeholder")
+
+        class SlowTransport(FakeTransport):
+            async def get(self, api, url, headers):
+                self.urls.append(url)
+                await asyncio.sleep(0.05)
+                return APIResponse(200, self.xml, {"X-ratelimit-requests-seen": "1"}, None)
+
+        async def main():
+            first = asyncio.ensure_future(api.nation("testlandia").get_shards("population"))
+            second = asyncio.ensure_future(api.nation("testlandia").get_shards("population"))
+            await asyncio.sleep(0.01)
+            # One caller giving up leaves the request to the other
+            first.cancel()
+            result = await second
+            third = asyncio.ensure_future(api.nation("testlandia").get_shards("name"))
+            await asyncio.sleep(0.01)
+            shared = next(iter(api.api.inflight.values()))
+            # The last caller giving up cancels the request
+            third.cancel()
+            await asyncio.sleep(0.01)
+            return result, shared
+
+        with SlowTransport():
+            result, shared = run(main())
+        self.assertEqual(result.population, "100")
+        self.assertTrue(shared.future.cancelled())
+        self.assertEqual(api.api.inflight, {})
+
+    def test_caller_after_last_cancel(self):
+        api = ns.Nationstates("placeholder")
+
+        class SlowTransport(FakeTransport):
+            async def get(self, api, url, headers):
+                self.urls.append(url)
+                await asyncio.sleep(0.02)
+                return APIResponse(200, self.xml, {"X-ratelimit-requests-seen": "1"}, None)
+
+        async def main():
+            first = asyncio.ensure_future(api.nation("testlandia").get_shards("population"))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            # Arrives before the cancelled request's done callback has run
+            second = asyncio.ensure_future(api.nation("testlandia").get_shards("population"))
+            return await second
+
+        with SlowTransport() as transport:
+            result = run(main())
+        self.assertEqual(result.population, "100")
+        self.assertEqual(len(transport.urls), 2)
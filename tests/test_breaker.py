@@ -0,0 +1,97 @@
+import unittest
+
+import nationstates_async as ns
+from nationstates_async.exceptions import CircuitOpen, InternalServerError, NotFound
+from nationstates_async.nsapiwrapper.breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+from .helpers import run, FlakyTransport
+
+
+class CircuitBreakerTest(unittest.TestCase):
+
+    def fail(self, breaker, exc=InternalServerError):
+        try:
+            with breaker.guard():
+                raise exc("down")
+        except exc:
+            pass
+
+    def test_trips(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        changes = []
+        breaker.listeners.append(lambda breaker, old, new: changes.append((old, new)))
+        self.fail(breaker)
+        self.assertEqual(breaker.state, CLOSED)
+        self.fail(breaker)
+        self.assertEqual(breaker.state, OPEN)
+        with self.assertRaises(CircuitOpen) as cm:
+            breaker.before()
+        self.assertGreater(cm.exception.retry_in, 0)
+        self.assertEqual(changes, [(CLOSED, OPEN)])
+        self.assertEqual(breaker.stats()["rejected"], 1)
+
+    def test_answers_reset(self):
+        breaker = CircuitBreaker(failure_threshold=2)
+        self.fail(breaker)
+        # The server answered, so it's up
+        self.fail(breaker, NotFound)
+        self.fail(breaker)
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_probe(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        self.fail(breaker)
+        self.assertEqual(breaker.state, OPEN)
+        breaker.before()
+        self.assertEqual(breaker.state, HALF_OPEN)
+        # Only one probe at a time
+        with self.assertRaises(CircuitOpen):
+            breaker.before()
+        breaker.failure()
+        self.assertEqual(breaker.state, OPEN)
+        with breaker.guard():
+            pass
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertEqual(breaker.trips, 2)
+
+
+class DegradedModeTest(unittest.TestCase):
+
+    def test_fail_fast(self):
+        api = ns.Nationstates("placeholder", do_retry=False,
+                              circuit_breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+        nation = api.nation("testlandia")
+        with FlakyTransport((500, {}), (500, {})) as transport:
+            for _ in range(2):
+                with self.assertRaises(InternalServerError):
+                    run(nation.get_shards("population"))
+            with self.assertRaises(CircuitOpen):
+                run(nation.get_shards("population"))
+        self.assertEqual(len(transport.urls), 2)
+        self.assertEqual(api.breaker.state, OPEN)
+
+    def test_stale_if_error(self):
+        api = ns.Nationstates("placeholder", cache=True,
+                              circuit_breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60))
+        nation = api.nation("testlandia")
+        with FlakyTransport() as transport:
+            run(nation.get_shards("population"))
+            for entry in api.cache.entries.values():
+                entry.stored_at = entry.stored_at - 3600
+            api.breaker.failure()
+            resp = run(nation.get_shards("population", full_response=True))
+        self.assertEqual(len(transport.urls), 1)
+        self.assertTrue(resp["stale"])
+        self.assertEqual(resp["data"]["nation"]["population"], "100")
+
+    def test_too_stale(self):
+        api = ns.Nationstates("placeholder", cache=True, stale_if_error=60,
+                              circuit_breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60))
+        nation = api.nation("testlandia")
+        with FlakyTransport():
+            run(nation.get_shards("population"))
+            for entry in api.cache.entries.values():
+                entry.stored_at = entry.stored_at - 3600
+            api.breaker.failure()
+            with self.assertRaises(CircuitOpen):
+                run(nation.get_shards("population"))
@@ -0,0 +1,122 @@
+import unittest
+import asyncio
+import json
+
+import nationstates_async as ns
+from nationstates_async.bulk import BulkFetch
+from nationstates_async.exceptions import NotFound
+from nationstates_async.nsapiwrapper.objects import APIResponse
+
+from .helpers import run, NationTransport, collect
+
+
+class FetchManyTest(unittest.TestCase):
+
+    def test_results_and_errors(self):
+        api = ns.Nationstates("placeholder")
+        names = ["nation_{}".format(i) for i in range(20)] + ["missing_one"]
+        with NationTransport() as transport:
+            results = run(collect(api.fetch_many(names, "population", concurrency=4)))
+        self.assertEqual(len(transport.urls), 21)
+        self.assertEqual(sorted(r.index for r in results), list(range(21)))
+        failed = [r for r in results if not r.ok]
+        self.assertEqual([r.name for r in failed], ["missing_one"])
+        self.assertIsInstance(failed[0].error, NotFound)
+        self.assertEqual(results[0].data["population"], str(len(results[0].name)))
+
+    def test_bad_target(self):
+        api = ns.Nationstates("placeholder")
+        with NationTransport() as transport:
+            results = run(collect(api.fetch_many(["testlandia", "", "maxtopia"], "population")))
+        self.assertEqual(len(transport.urls), 2)
+        results = {r.index: r for r in results}
+        self.assertEqual(sorted(results), [0, 1, 2])
+        self.assertTrue(results[0].ok and results[2].ok)
+        self.assertIsInstance(results[1].error, ValueError)
+        self.assertEqual(results[1].name, "")
+
+    def test_cancelled_target(self):
+        api = ns.Nationstates("placeholder")
+
+        class CancellingTransport(NationTransport):
+            async def get(self, api, url, headers):
+                if "nation=cancelled" in url:
+                    raise asyncio.CancelledError()
+                return await NationTransport.get(self, api, url, headers)
+
+        with CancellingTransport():
+            results = run(collect(api.fetch_many(["testlandia", "cancelled", "maxtopia"], "population")))
+        results = {r.index: r for r in results}
+        self.assertEqual(sorted(results), [0, 1, 2])
+        self.assertTrue(results[0].ok and results[2].ok)
+        self.assertIsInstance(results[1].error, asyncio.CancelledError)
+        self.assertEqual(results[1].name, "cancelled")
+
+    def test_async_targets(self):
+        api = ns.Nationstates("placeholder")
+
+        async def names():
+            for i in range(5):
+                yield "nation_{}".format(i)
+
+        with NationTransport():
+            results = run(collect(api.fetch_many(names(), ["population"])))
+        self.assertEqual(sorted(r.name for r in results), ["nation_{}".format(i) for i in range(5)])
+
+    def test_bounded_concurrency(self):
+        api = ns.Nationstates("placeholder", max_requests_at_once=3)
+        active = []
+        peak = []
+
+        class Transport(NationTransport):
+            async def get(self, api, url, headers):
+                active.append(url)
+                peak.append(len(active))
+                try:
+                    return await NationTransport.get(self, api, url, headers)
+                finally:
+                    active.remove(url)
+
+        with Transport():
+            run(collect(api.fetch_many(["n{}".format(i) for i in range(12)], "population")))
+        self.assertEqual(max(peak), 3)
+
+    def test_resume(self):
+        api = ns.Nationstates("placeholder")
+        names = ["nation_{}".format(i) for i in range(10)]
+        fetch = api.fetch_many(names, "population", concurrency=3)
+        with NationTransport():
+            first = run(collect(fetch, stop_after=4))
+        # The fourth result was being processed when the loop stopped
+        handed_out = set(r.index for r in first[:3])
+        token = fetch.token
+        state = json.loads(token)
+        self.assertEqual(set(range(state["position"])) | set(state["done"]), handed_out)
+
+        with NationTransport() as transport:
+            rest = run(collect(api.fetch_many(names, "population", resume=token)))
+        self.assertEqual(len(transport.urls), 7)
+        self.assertEqual(sorted(r.index for r in first[:3] + rest), list(range(10)))
+
+    def test_mark_done(self):
+        fetch = BulkFetch(None, [], "population")
+        for index in (1, 3, 0):
+            fetch._mark_done(index)
+        self.assertEqual((fetch.position, fetch.done), (2, {3}))
+        fetch._mark_done(2)
+        self.assertEqual((fetch.position, fetch.done), (4, set()))
+
+    def test_region_helper(self):
+        api = ns.Nationstates("placeholder")
+        region_xml = '<REGION id="lazarus"><NATIONS>a:b:missing_c</NATIONS></REGION>'
+
+        class Transport(NationTransport):
+            async def get(self, api, url, headers):
+                if "region=" in url:
+                    self.urls.append(url)
+                    return APIResponse(200, region_xml, {"X-ratelimit-requests-seen": "1"}, None)
+                return await NationTransport.get(self, api, url, headers)
+
+        with Transport():
+            results = run(collect(api.region("lazarus").fetch_nations(["population"])))
+        self.assertEqual(sorted((r.name, r.ok) for r in results), [("a", True), ("b", True), ("missing_c", False)])
@@ -0,0 +1,180 @@
+import unittest
+
+import nationstates_async as ns
+from nationstates_async.cache import ResponseCache
+
+from .helpers import FakeTransport, run
+
+
+def response(xml="<NATION></NATION>"):
+    return {"xml": xml, "status": 200, "headers": {}}
+
+
+class ResponseCacheTest(unittest.TestCase):
+
+    def test_ttl_policy(self):
+        cache = ResponseCache(default_ttl=300, static_ttl=86400)
+        self.assertEqual(cache.ttl_for(("dbid", ns.Shard("foundedtime"))), 86400)
+        self.assertEqual(cache.ttl_for(("dbid", "population")), 300)
+        self.assertEqual(cache.ttl_for(("happenings", "dbid")), 0)
+        self.assertEqual(ResponseCache(ttl_policy={"population": 5}).ttl_for(("population",)), 5)
+
+    def test_expiry(self):
+        cache = ResponseCache()
+        cache.put("a", response(), 10, now=100)
+        self.assertIsNotNone(cache.get("a", now=105))
+        self.assertIsNone(cache.get("a", now=111))
+        self.assertIsNone(cache.get("a", max_age=2, now=105))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 2)
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(max_entries=2, max_bytes=1000)
+        cache.put("a", response(), 10)
+        cache.put("b", response(), 10)
+        cache.get("a")
+        cache.put("c", response(), 10)
+        self.assertIsNone(cache.lookup("b"))
+        self.assertIsNotNone(cache.lookup("a"))
+        cache.put("d", response("x" * 990), 10)
+        self.assertEqual(list(cache.entries), ["d"])
+        self.assertEqual(cache.stats()["evictions"], 3)
+
+    def test_cached_requests(self):
+        api = ns.Nationstates("placeholder", cache=True)
+        nation = api.nation("testlandia")
+
+        async def main():
+            await nation.get_shards("dbid")
+            await nation.get_shards("dbid")
+            await nation.get_shards("dbid", cache=False)
+            await nation.get_shards("dbid", max_age=0)
+            await nation.get_shards("happenings")
+            return await nation.get_shards("happenings")
+
+        with FakeTransport() as transport:
+            run(main())
+        self.assertEqual(len(transport.urls), 5)
+        self.assertEqual(api.cache.stats()["hits"], 1)
+
+
+    def test_miss_reads_backend_once(self):
+        class CountingBackend:
+            def __init__(self):
+                self.reads = 0
+
+            def get(self, key):
+                self.reads = self.reads + 1
+                return None
+
+            def put(self, key, response, stored_at, ttl):
+                pass
+
+        backend = CountingBackend()
+        api = ns.Nationstates("placeholder", cache=ResponseCache(backend=backend))
+
+        async def main():
+            await api.nation("testlandia").get_shards("dbid")
+
+        with FakeTransport():
+            run(main())
+        self.assertEqual(backend.reads, 1)
+        self.assertEqual(api.cache.stats()["misses"], 1)
+
+
+class SQLiteCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        import tempfile
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = self.folder.name + "/responses.db"
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_shared_between_caches(self):
+        from nationstates_async.diskcache import SQLiteCache
+        first = ResponseCache(backend=SQLiteCache(self.path))
+        first.put("a", response("<A></A>"), 60)
+        first.close()
+
+        second = ResponseCache(backend=SQLiteCache(self.path))
+        self.assertEqual(second.get("a")["xml"], "<A></A>")
+        second.close()
+
+    def test_readonly_replay(self):
+        from nationstates_async.diskcache import SQLiteCache
+        writer = SQLiteCache(self.path)
+        writer.put("a", response(), 0, 1)
+        writer.close()
+
+        replay = ResponseCache(backend=SQLiteCache(self.path, readonly=True), replay=True)
+        self.assertIsNotNone(replay.get("a"))
+        replay.put("b", response(), 60)
+        self.assertEqual(len(replay.backend), 1)
+        replay.close()
+
+    def test_size_bound(self):
+        from nationstates_async.diskcache import SQLiteCache
+        backend = SQLiteCache(self.path, max_bytes=100)
+        for n in range(10):
+            backend.put(str(n), response("x" * 20), n, 60)
+        self.assertLessEqual(backend.size, 90)
+        self.assertIsNone(backend.get("0"))
+        self.assertIsNotNone(backend.get("9"))
+        backend.compact()
+        backend.close()
+
+    def test_locked_file_is_a_miss(self):
+        import sqlite3
+        from nationstates_async.diskcache import SQLiteCache
+        backend = SQLiteCache(self.path)
+        backend.put("a", response("<A></A>"), 0, 60)
+        # Another process in the middle of a write
+        other = sqlite3.connect(self.path)
+        other.execute("BEGIN EXCLUSIVE")
+        try:
+            cache = ResponseCache(backend=SQLiteCache(self.path, busy_timeout=0.01))
+            self.assertIsNone(cache.get("a"))
+            cache.put("b", response(), 60)
+            backend.put("c", response(), 0, 60)
+            self.assertEqual(backend.busy, 1)
+        finally:
+            other.rollback()
+            other.close()
+        self.assertIsNotNone(backend.get("a"))
+        self.assertIsNone(backend.get("c"))
+        self.assertIsNotNone(cache.get("b"))
+        cache.close()
+        backend.close()
+
+
+class ConditionalRequestTest(unittest.TestCase):
+
+    def test_not_modified(self):
+        from nationstates_async.nsapiwrapper.objects import APIResponse
+
+        class ETagTransport(FakeTransport):
+            async def get(self, api, url, headers):
+                self.urls.append(url)
+                if headers.get("If-None-Match") == '"v1"':
+                    return APIResponse(304, "", {"X-ratelimit-requests-seen": "1"}, None)
+                return APIResponse(200, self.xml, {"X-ratelimit-requests-seen": "1", "ETag": '"v1"'}, None)
+
+        api = ns.Nationstates("placeholder", cache=True)
+        nation = api.nation("testlandia")
+
+        async def main():
+            await nation.get_shards("population")
+            return await nation.get_shards("population", max_age=0)
+
+        with ETagTransport() as transport:
+            resp = run(main())
+        self.assertEqual(len(transport.urls), 2)
+        self.assertEqual(resp.population, "100")
+        stats = api.cache.stats()
+        self.assertEqual(stats["revalidations"], 1)
+        self.assertEqual(stats["hits"], 0)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hit_ratio"], 0)
+        self.assertEqual(stats["bytes_saved"], len(transport.xml))
@@ -0,0 +1,114 @@
+import unittest
+import asyncio
+
+import aiohttp
+
+import nationstates_async as ns
+
+from .helpers import FakeTransport, run, HangingTransport
+
+
+class CancellationTest(unittest.TestCase):
+
+    def assertIdle(self, api):
+        self.assertEqual(api.api.gate.active, 0)
+        self.assertEqual(api.api.gate.queue_depth, 0)
+        self.assertEqual(api.api.turn.active, 0)
+        self.assertEqual(api.api.turn.queue_depth, 0)
+        self.assertEqual(api.api.inflight, {})
+        for stats in api.queue_stats().values():
+            self.assertEqual(stats["waiting"], 0)
+
+    def test_cancel_thousands(self):
+        # Some hold a slot, some wait for one, some wait on the rate limit
+        api = ns.Nationstates("placeholder")
+
+        async def main():
+            tasks = [asyncio.ensure_future(api.nation("nation_{}".format(n)).get_shards("population"))
+                     for n in range(2000)]
+            for _ in range(5):
+                await asyncio.sleep(0)
+            self.assertEqual(api.api.gate.active, api.max_requests_at_once)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        with HangingTransport() as transport:
+            run(main())
+        self.assertEqual(transport.cancelled, len(transport.urls))
+        self.assertIdle(api)
+
+    def test_wait_for(self):
+        api = ns.Nationstates("placeholder", ratelimit_enabled=False)
+
+        async def main():
+            requests = [asyncio.wait_for(api.nation("nation_{}".format(n)).get_shards("population"), 0.01)
+                        for n in range(2000)]
+            results = await asyncio.gather(*requests, return_exceptions=True)
+            self.assertTrue(all(isinstance(result, asyncio.TimeoutError) for result in results))
+            self.assertIdle(api)
+            # Nothing leaked, every slot can still be used
+            transport.released.set()
+            return await asyncio.gather(*(api.nation("nation_{}".format(n)).get_shards("population")
+                                          for n in range(50)))
+
+        with HangingTransport() as transport:
+            results = run(main())
+        self.assertEqual(len(results), 50)
+        self.assertIdle(api)
+
+    def test_shared_request_cancelled(self):
+        api = ns.Nationstates("placeholder")
+
+        async def main():
+            tasks = [asyncio.ensure_future(api.nation("testlandia").get_shards("population"))
+                     for _ in range(1000)]
+            for _ in range(5):
+                await asyncio.sleep(0)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await asyncio.sleep(0.01)
+
+        with HangingTransport() as transport:
+            run(main())
+        self.assertEqual(len(transport.urls), 1)
+        self.assertEqual(transport.cancelled, 1)
+        self.assertIdle(api)
+
+
+class TimeoutTest(unittest.TestCase):
+
+    def test_settings(self):
+        api = ns.Nationstates("placeholder", total_timeout=20, connect_timeout=2, read_timeout=5)
+        timeout = api.api.client_timeout()
+        self.assertEqual((timeout.total, timeout.connect, timeout.sock_read), (20, 2, 5))
+        timeout = api.api.client_timeout(1)
+        self.assertEqual((timeout.total, timeout.connect, timeout.sock_read), (1, 2, 5))
+        custom = aiohttp.ClientTimeout(total=3)
+        self.assertIs(api.api.client_timeout(custom), custom)
+
+    def test_per_call(self):
+        api = ns.Nationstates("placeholder")
+        with FakeTransport() as transport:
+            run(api.nation("testlandia").get_shards("population", timeout=5))
+            run(api.nation("testlandia").get_shards("region"))
+        self.assertEqual(transport.timeouts, [5, None])
+
+    def test_hung_connection(self):
+        # A server that accepts the connection and never answers
+        api = ns.Nationstates("placeholder", read_timeout=0.1)
+
+        async def main():
+            async def accept(reader, writer):
+                await asyncio.sleep(10)
+            server = await asyncio.start_server(accept, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                with self.assertRaises(asyncio.TimeoutError):
+                    await api.api.Nation("testlandia")._request_wrap_get("http://127.0.0.1:{}/".format(port), {})
+            finally:
+                await api.close()
+                server.close()
+
+        run(main())
@@ -0,0 +1,98 @@
+import unittest
+import json
+import os
+import shutil
+import tempfile
+
+import nationstates_async as ns
+from nationstates_async.crawl import JSONLinesSink, MemorySink
+from nationstates_async.nsapiwrapper.objects import APIResponse
+
+from .helpers import run, NationTransport
+
+
+class WorldTransport(NationTransport):
+
+    async def get(self, api, url, headers):
+        if "nation=" not in url:
+            self.urls.append(url)
+            xml = "<WORLD><NATIONS>a,b,missing_c,d</NATIONS></WORLD>"
+            return APIResponse(200, xml, {"X-ratelimit-requests-seen": "1"}, None)
+        return await NationTransport.get(self, api, url, headers)
+
+
+class CrawlTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "test.crawl")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_dedupe(self):
+        crawl = ns.Nationstates("placeholder").crawl(self.path, "population", kind="nation")
+        self.assertEqual(crawl.add(["Foo Bar", "foo_bar", "baz"]), 2)
+        self.assertEqual(crawl.add(["BAZ", "qux"]), 1)
+        self.assertEqual(crawl.counts(), (0, 0, 3))
+        crawl.close()
+
+    def test_crawl(self):
+        api = ns.Nationstates("placeholder")
+        sink = MemorySink()
+        crawl = api.crawl(self.path, ["population"], kind="nation", sink=sink)
+        seen = []
+        with WorldTransport():
+            self.assertEqual(run(crawl.add_world()), 4)
+            progress = run(crawl.run(on_progress=seen.append))
+        self.assertEqual(sorted(sink), ["a", "b", "d"])
+        self.assertEqual(sink["d"]["population"], "1")
+        self.assertEqual((progress.done, progress.failed, progress.remaining), (3, 1, 0))
+        self.assertEqual(len(seen), 4)
+        self.assertEqual(seen[-1].total, 4)
+        self.assertEqual(crawl.failures()[0][0], "missing_c")
+        self.assertIn("NotFound", crawl.failures()[0][1])
+        # Nothing left, running again doesn't request anything
+        with WorldTransport() as transport:
+            run(crawl.run())
+        self.assertEqual(transport.urls, [])
+        self.assertEqual(crawl.retry_failed(), 1)
+        self.assertEqual(crawl.counts(), (3, 0, 1))
+        crawl.close()
+
+    def test_resume(self):
+        api = ns.Nationstates("placeholder")
+        names = ["nation_{}".format(i) for i in range(10)]
+        crawl = api.crawl(self.path, "population", kind="nation")
+        crawl.add(names)
+
+        class Stop(Exception):
+            pass
+
+        def stop_after_four(progress):
+            if progress.done == 4:
+                raise Stop()
+        with NationTransport():
+            self.assertRaises(Stop, run, crawl.run(on_progress=stop_after_four))
+        crawl.close()
+
+        sink_path = os.path.join(self.directory, "results.jsonl")
+        crawl = api.crawl(self.path, "population", kind="nation", sink=JSONLinesSink(sink_path))
+        with NationTransport() as transport:
+            progress = run(crawl.run())
+        crawl.close()
+        self.assertEqual(len(transport.urls), 6)
+        self.assertEqual(progress.done, 10)
+        with open(sink_path) as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual(len(lines), 6)
+        self.assertEqual(lines[0]["data"]["population"], str(len(lines[0]["name"])))
+
+    def test_eta(self):
+        api = ns.Nationstates("placeholder", ratelimit_limit=40, ratelimit_timeframe=30)
+        crawl = api.crawl(self.path, "population")
+        crawl.add("region_{}".format(i) for i in range(400))
+        progress = crawl.progress()
+        self.assertEqual(progress.remaining, 400)
+        self.assertAlmostEqual(progress.eta, 300)
+        crawl.close()
@@ -0,0 +1,105 @@
+import unittest
+import asyncio
+import gzip
+import io
+import os
+import tempfile
+
+from nationstates_async.dumps import DumpParser, iter_dump, dump_url
+from nationstates_async.nsapiwrapper.utils import parsetree
+from nationstates_async.objects import NSDict
+from nationstates_async import Nationstates
+
+
+nation_xml = """<NATION>
+<NAME>Nation {0}</NAME>
+<TYPE>Republic</TYPE>
+<MOTTO>Caf&eacute; &amp; tea</MOTTO>
+<REGION>The Pacific</REGION>
+<UNSTATUS>Non-member</UNSTATUS>
+<FREEDOM><CIVILRIGHTS>Good</CIVILRIGHTS></FREEDOM>
+<CENSUS><SCALE id="0"><SCORE>{0}.5</SCORE></SCALE><SCALE id="1"><SCORE>2</SCORE></SCALE></CENSUS>
+</NATION>
+"""
+
+
+def make_dump(count):
+    body = "".join(nation_xml.format(i) for i in range(count))
+    return '<?xml version="1.0" encoding="UTF-8"?>\n<NATIONS api_version="11">\n{}</NATIONS>\n'.format(body).encode("utf-8")
+
+
+class DumpParserTest(unittest.TestCase):
+
+    def test_records_match_parsetree(self):
+        records = list(iter_dump(io.BytesIO(make_dump(3))))
+        self.assertEqual(len(records), 3)
+        expected = parsetree(nation_xml.format(1).replace("&eacute;", "é"), NSDict)["nation"]
+        self.assertEqual(records[1], expected)
+        self.assertIsInstance(records[1], NSDict)
+        self.assertEqual(records[1].motto, "Café & tea")
+        self.assertEqual(records[2].census.scale[0].score, "2.5")
+
+    def test_gzip_file(self):
+        fd, path = tempfile.mkstemp(suffix=".xml.gz")
+        os.close(fd)
+        try:
+            with gzip.open(path, "wb") as f:
+                f.write(make_dump(50))
+            names = [record.name for record in iter_dump(path, size=100)]
+            self.assertEqual(names, ["Nation {}".format(i) for i in range(50)])
+        finally:
+            os.remove(path)
+
+    def test_byte_at_a_time(self):
+        data = gzip.compress(make_dump(2))
+        parser = DumpParser()
+        records = []
+        for i in range(len(data)):
+            records.extend(parser.feed(data[i:i+1]))
+        records.extend(parser.close())
+        self.assertEqual([r.name for r in records], ["Nation 0", "Nation 1"])
+
+    def test_records_are_released(self):
+        parser = DumpParser()
+        parser.feed(make_dump(20))
+        # Nothing is kept on the root once a record is handed out
+        self.assertEqual(parser.builder.item, {"nations": {"api_version": "11"}})
+
+    def test_dumps_object(self):
+        api = Nationstates("test dumps", use_nsdict=False)
+        records = list(api.dumps().iter_file(io.BytesIO(make_dump(1))))
+        self.assertEqual(type(records[0]), dict)
+        self.assertTrue(dump_url("regions").endswith("regions.xml.gz"))
+        self.assertRaises(ValueError, dump_url, "cards")
+
+    def test_stream_aclose_gives_slot_back(self):
+        from nationstates_async.dumps import Dumps
+        api = Nationstates("test dumps")
+        closed = []
+
+        async def download(self, session, url, headers, size):
+            data = gzip.compress(make_dump(50))
+            try:
+                for i in range(0, len(data), 64):
+                    yield data[i:i+64]
+            finally:
+                closed.append(url)
+
+        async def main():
+            records = api.dumps().stream("nations")
+            async for record in records:
+                self.assertEqual(api.api.gate.active, 1)
+                break
+            await records.aclose()
+            self.assertEqual(api.api.gate.active, 0)
+            self.assertEqual(closed, [dump_url("nations")])
+            await api.api.close()
+
+        original = Dumps._download
+        Dumps._download = download
+        try:
+            loop = asyncio.new_event_loop()
+            loop.run_until_complete(main())
+            loop.close()
+        finally:
+            Dumps._download = original
@@ -0,0 +1,111 @@
+import unittest
+import io
+import gzip
+import os
+import tempfile
+
+from nationstates_async.dumpstore import DumpStore
+
+
+def nation(i, region, population, scores):
+    return {
+        "name": "Nation {}".format(i),
+        "fullname": "The Republic of Nation {}".format(i),
+        "region": region,
+        "category": "Democratic Socialists" if i % 2 else "Anarchy",
+        "unstatus": "Non-member",
+        "population": str(population),
+        "dbid": str(i),
+        "census": {"scale": [{"id": censusid, "score": str(score)} for censusid, score in scores]}
+    }
+
+records = [
+    nation(0, "The Pacific", 500, [("0", 10), ("65", 1.5)]),
+    nation(1, "The Pacific", 5000, [("0", 30), ("65", 7)]),
+    nation(2, "Lazarus", 2000, [("0", 20)]),
+    nation(3, "the pacific", 3000, [("0", 30), ("65", 3)]),
+    {"name": "Nation 4", "region": "Lazarus", "population": "", "census": {"scale": {"id": "1", "score": "4"}}},
+]
+
+
+class DumpStoreTest(unittest.TestCase):
+
+    def check_store(self, store):
+        self.assertEqual(len(store), 5)
+        self.assertEqual(store.find("NATION 3"), 3)
+        self.assertEqual(store.find("nation_2"), 2)
+        self.assertIsNone(store.find("nation 9"))
+        self.assertIn("Nation 4", store)
+        self.assertEqual(store["nation 1"]["fullname"], "The Republic of Nation 1")
+        self.assertEqual(store["nation 1"]["census"], {"0": 30.0, "65": 7.0})
+        self.assertEqual(list(store.rows_where("region", "the_pacific")), [0, 1, 3])
+        self.assertEqual(store.value(3, "region"), "The Pacific")
+        self.assertEqual(list(store.rows_where("region", "Lazarus")), [2, 4])
+        self.assertEqual(store.names(store.filter(region="The Pacific", population=(1000, None))), ["Nation 1", "Nation 3"])
+        self.assertEqual(store.filter(population=(None, 2500)), [0, 2])
+        self.assertEqual(store.filter(name=lambda n: n.endswith("4")), [4])
+        self.assertEqual(store.top("0", 3), [1, 3, 2])
+        self.assertEqual(store.top(65, 10), [1, 3, 0])
+        self.assertEqual(store.rank("nation 1", 0), 1)
+        self.assertEqual(store.rank("nation 3", 0), 1)
+        self.assertEqual(store.rank("nation 2", 0), 3)
+        self.assertEqual(store.rank("nation 0", 0), 4)
+        self.assertIsNone(store.rank("nation 2", 65))
+        self.assertEqual(list(store.census_between(0, 15, 30)), [2])
+        self.assertEqual(list(store.census_between(1)), [4])
+        self.assertEqual(store.value(4, "population") != store.value(4, "population"), True)
+
+    def test_store(self):
+        self.check_store(DumpStore.from_records(records))
+
+    def test_save_load(self):
+        fd, path = tempfile.mkstemp(suffix=".store")
+        os.close(fd)
+        try:
+            DumpStore.from_records(records).save(path)
+            with DumpStore.load(path) as store:
+                self.check_store(store)
+                # Saving a loaded store gives the same file
+                copy = path + ".copy"
+                store.save(copy)
+            with open(path, "rb") as a, open(copy, "rb") as b:
+                self.assertEqual(a.read(), b.read())
+            os.remove(copy)
+        finally:
+            os.remove(path)
+
+    def test_results_outlive_close(self):
+        fd, path = tempfile.mkstemp(suffix=".store")
+        os.close(fd)
+        try:
+            DumpStore.from_records(records).save(path)
+            store = DumpStore.load(path)
+            rows = store.rows_where("region", "the_pacific")
+            ranked = store.census_between(0, 15)
+            population = store.column("population")[:2]
+            store.close()
+            self.assertIsNone(store.mapping)
+            self.assertEqual(rows, [0, 1, 3])
+            self.assertEqual(ranked, [2, 3, 1])
+            self.assertEqual(population[1], 5000.0)
+            del population
+        finally:
+            os.remove(path)
+
+    def test_load_bad_file(self):
+        fd, path = tempfile.mkstemp()
+        os.write(fd, b"not a store at all")
+        os.close(fd)
+        try:
+            self.assertRaises(ValueError, DumpStore.load, path)
+        finally:
+            os.remove(path)
+
+    def test_from_dump(self):
+        xml = ('<REGIONS><REGION><NAME>Lazarus</NAME><NUMNATIONS>4000</NUMNATIONS>'
+               '<POWER>Very High</POWER><DELEGATE>nation_2</DELEGATE></REGION>'
+               '<REGION><NAME>Osiris</NAME><NUMNATIONS>2000</NUMNATIONS><POWER>High</POWER></REGION></REGIONS>')
+        store = DumpStore.from_dump(io.BytesIO(gzip.compress(xml.encode())), kind="regions")
+        self.assertEqual(store["osiris"]["numnations"], 2000.0)
+        self.assertEqual(store["lazarus"]["delegate"], "nation_2")
+        self.assertEqual(store.names(store.filter(power="very high")), ["Lazarus"])
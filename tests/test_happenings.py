@@ -0,0 +1,101 @@
+import unittest
+import asyncio
+import re
+
+import nationstates_async as ns
+from nationstates_async.happenings import HappeningsStream
+from nationstates_async.nsapiwrapper.objects import APIResponse
+
+from .helpers import FakeTransport, run
+
+
+class HappeningsTransport(FakeTransport):
+    """Serves happenings out of self.events, newest first like the API"""
+
+    def __init__(self, events, lasteventid=0):
+        FakeTransport.__init__(self)
+        self.events = events
+        self.lasteventid = lasteventid
+
+    async def get(self, api, url, headers):
+        self.urls.append(url)
+        if "q=lasteventid" in url:
+            xml = "<WORLD><LASTEVENTID>{}</LASTEVENTID></WORLD>".format(self.lasteventid)
+        else:
+            params = dict(re.findall(r"(\w+)=([^&]*)", url))
+            ids = [i for i in sorted(self.events, reverse=True)
+                   if i > int(params.get("sinceid", 0)) and i < int(params.get("beforeid", 10 ** 9))]
+            ids = ids[:int(params["limit"])]
+            xml = "<WORLD><HAPPENINGS>{}</HAPPENINGS></WORLD>".format("".join(
+                '<EVENT id="{0}"><TIMESTAMP>{0}</TIMESTAMP><TEXT>{1}</TEXT></EVENT>'.format(i, self.events[i])
+                for i in ids))
+        return APIResponse(200, xml, {"X-ratelimit-requests-seen": "1"}, None)
+
+
+async def take(stream, amount):
+    events = []
+    iterator = stream.__aiter__()
+    while len(events) < amount:
+        events.append(await iterator.__anext__())
+    await iterator.aclose()
+    return events
+
+
+class HappeningsTest(unittest.TestCase):
+
+    def test_starts_from_now(self):
+        api = ns.Nationstates("placeholder")
+        transport = HappeningsTransport({1: "old", 2: "old"}, lasteventid=2)
+
+        async def main():
+            stream = api.world().stream_happenings(poll_interval=0.01, min_interval=0.01)
+            task = asyncio.ensure_future(take(stream, 2))
+            await asyncio.sleep(0.05)
+            transport.events[3] = "new"
+            transport.events[4] = "newer"
+            return await task, stream
+
+        with transport:
+            events, stream = run(main())
+        self.assertEqual([e["text"] for e in events], ["new", "newer"])
+        # The last event is only counted once the loop asks for another
+        self.assertEqual(stream.sinceid, 3)
+
+    def test_paging_and_filters(self):
+        api = ns.Nationstates("placeholder")
+        events = {i: "event {}".format(i) for i in range(1, 26)}
+        stream = api.world().stream_happenings(filters=["law", "change"], view="region.lazarus",
+                                               sinceid=0, limit=10, poll_interval=0.01, min_interval=0.01)
+        with HappeningsTransport(events) as transport:
+            result = run(take(stream, 25))
+        self.assertEqual([int(e["id"]) for e in result], list(range(1, 26)))
+        self.assertIn("filter=law+change", transport.urls[0])
+        self.assertIn("view=region.lazarus", transport.urls[0])
+        # A full page of 10 means two more to fill the gap
+        self.assertEqual(len(transport.urls), 3)
+
+    def test_interval_adapts(self):
+        stream = HappeningsStream(None, poll_interval=10, min_interval=5, max_interval=20)
+        stream._adapt(False)
+        self.assertEqual(stream.interval, 15)
+        stream._adapt(False)
+        self.assertEqual(stream.interval, 20)
+        stream._adapt(True)
+        stream._adapt(True)
+        self.assertEqual(stream.interval, 5)
+
+    def test_single_event(self):
+        api = ns.Nationstates("placeholder")
+        stream = api.world().stream_happenings(sinceid=0)
+        with HappeningsTransport({7: "only"}):
+            events = run(take(stream, 1))
+        self.assertEqual(events[0]["text"], "only")
+
+    def test_poll_without_sinceid(self):
+        api = ns.Nationstates("placeholder")
+        stream = api.world().stream_happenings(limit=2)
+        with HappeningsTransport({1: "old", 2: "newer", 3: "newest"}) as transport:
+            events = run(stream.poll())
+        self.assertEqual([e["text"] for e in events], ["newer", "newest"])
+        self.assertNotIn("sinceid", transport.urls[0])
+        self.assertIsNone(stream.sinceid)
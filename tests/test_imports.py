@@ -0,0 +1,48 @@
+import unittest
+import os
+import subprocess
+import sys
+
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+heavy = ("aiohttp", "requests", "bs4", "xmltodict", "ezurl", "sqlite3")
+
+
+def imported(statement):
+    """Which of the heavy modules a fresh interpreter has loaded after statement"""
+    script = "{}\nimport sys\nprint(' '.join(m for m in {!r} if m in sys.modules))".format(statement, heavy)
+    result = subprocess.run([sys.executable, "-c", script], cwd=root, stdout=subprocess.PIPE,
+                            universal_newlines=True, check=True)
+    return set(result.stdout.split())
+
+
+class LazyImportTest(unittest.TestCase):
+
+    def test_package_import(self):
+        self.assertEqual(imported("import nationstates_async"), set())
+
+    def test_nationstates(self):
+        # Nothing heavy until a request is made
+        self.assertEqual(imported("import nationstates_async as ns\n"
+                                  "api = ns.Nationstates('test')\n"
+                                  "api.nation('testlandia'); api.region('lazarus')"), set())
+
+    def test_attributes(self):
+        import nationstates_async as ns
+        from nationstates_async.main import Nationstates
+        from nationstates_async.nsapiwrapper.main import Api
+        from nationstates_async.nsapiwrapper.urls import Shard
+        self.assertIs(ns.Nationstates, Nationstates)
+        self.assertIs(ns.Shard, Shard)
+        self.assertIs(ns.nsapiwrapper.Api, Api)
+        self.assertIn("Nationstates", dir(ns))
+        with self.assertRaises(AttributeError):
+            ns.missing
+
+    def test_star_import(self):
+        names = dict()
+        exec("from nationstates_async import *", names)
+        self.assertEqual(set(names) - {"__builtins__"}, {"Nationstates", "Shard", "exceptions"})
+        names = dict()
+        exec("from nationstates_async.nsapiwrapper import *", names)
+        self.assertEqual(set(names) - {"__builtins__"}, {"Api", "Shard", "exceptions", "utils"})
@@ -0,0 +1,127 @@
+import unittest
+
+import nationstates_async as ns
+from nationstates_async.objects import LazyNameSequence, Nation, Region
+
+from .helpers import FakeTransport, run
+
+
+class LazyNameSequenceTest(unittest.TestCase):
+
+    def test_sequence(self):
+        names = LazyNameSequence("a,bb,,ccc", ",")
+        self.assertEqual(len(names), 4)
+        self.assertEqual(list(names), ["a", "bb", "", "ccc"])
+        self.assertEqual([names[i] for i in range(4)], list(names))
+        self.assertEqual(names[-1], "ccc")
+        self.assertEqual(names[1:3], ["bb", ""])
+        self.assertRaises(IndexError, names.__getitem__, 4)
+
+    def test_empty(self):
+        names = LazyNameSequence("", ":")
+        self.assertEqual(len(names), 0)
+        self.assertEqual(list(names), [])
+        self.assertRaises(IndexError, names.__getitem__, 0)
+
+    def test_interned(self):
+        a = LazyNameSequence("testlandia:other", ":")[0]
+        b = LazyNameSequence("x:testlandia", ":")[1]
+        self.assertIs(a, b)
+
+    def test_factory(self):
+        api = ns.Nationstates("placeholder")
+        created = []
+
+        def factory(name):
+            created.append(name)
+            return api.nation(name)
+        names = LazyNameSequence("a:b:c", ":", factory)
+        self.assertEqual(created, [])
+        self.assertEqual(names[1].nation_name, "b")
+        self.assertEqual(created, ["b"])
+        self.assertEqual(list(names.names()), ["a", "b", "c"])
+
+
+class LazyNationsTest(unittest.TestCase):
+
+    def test_world_nations(self):
+        api = ns.Nationstates("placeholder")
+        xml = "<WORLD><NATIONS>testlandia,the_pacific_isle,maxtopia</NATIONS></WORLD>"
+
+        async def main():
+            world = api.world()
+            lazy = await world.lazy_nations()
+            names = [name async for name in world.iter_nations(names_only=True)]
+            return lazy, names
+
+        with FakeTransport(xml):
+            lazy, names = run(main())
+        self.assertEqual(len(lazy), 3)
+        self.assertIsInstance(lazy[2], Nation)
+        self.assertEqual(lazy[2].nation_name, "maxtopia")
+        self.assertEqual(names, ["testlandia", "the_pacific_isle", "maxtopia"])
+
+    def test_region_nations(self):
+        api = ns.Nationstates("placeholder")
+        xml = '<REGION id="testregionia"><NATIONS>testlandia:maxtopia</NATIONS></REGION>'
+
+        async def main():
+            return [nation async for nation in api.region("testregionia").iter_nations()]
+
+        with FakeTransport(xml):
+            nations = run(main())
+        self.assertEqual([n.nation_name for n in nations], ["testlandia", "maxtopia"])
+
+    def test_world_regions(self):
+        api = ns.Nationstates("placeholder")
+        xml = "<WORLD><REGIONS>the_pacific,lazarus</REGIONS></WORLD>"
+        with FakeTransport(xml):
+            regions = run(api.world().lazy_regions())
+        self.assertIsInstance(regions[0], Region)
+        self.assertEqual(regions[1].region_name, "lazarus")
+
+
+class HandleRegistryTest(unittest.TestCase):
+
+    def test_same_handle(self):
+        api = ns.Nationstates("placeholder")
+        nation = api.nation("Foo Bar")
+        self.assertIs(api.nation("foo_bar"), nation)
+        self.assertIs(api.nation(" FOO BAR "), nation)
+        self.assertIs(api.region("The Pacific"), api.region("the_pacific"))
+        self.assertIsNot(api.nation("foo_bar"), api.region("foo_bar"))
+
+    def test_handles_are_released(self):
+        api = ns.Nationstates("placeholder")
+        api.nation("testlandia")
+        self.assertNotIn("testlandia", api.nation_handles)
+
+    def test_authenticated_handles_are_not_shared(self):
+        api = ns.Nationstates("placeholder")
+        private = api.nation("testlandia", password="hunter2")
+        self.assertIsNot(api.nation("testlandia"), private)
+        nation = api.nation("testlandia")
+        other = api.nation("Testlandia")
+        private = other.authenticate(password="hunter2")
+        self.assertTrue(private.is_auth)
+        self.assertIsNot(private, nation)
+        self.assertIs(api.nation("testlandia"), nation)
+        # Everything else holding the shared handle stays unauthenticated
+        self.assertFalse(nation.is_auth)
+        self.assertEqual(type(nation.current_api).__name__, "NationAPI")
+        self.assertIsNotNone(nation._batch_key())
+
+    def test_authenticate_own_handle(self):
+        api = ns.Nationstates("placeholder")
+        nation = Nation("testlandia", api)
+        self.assertIs(nation.authenticate(password="hunter2"), nation)
+        self.assertTrue(nation.is_auth)
+
+    def test_slots(self):
+        api = ns.Nationstates("placeholder")
+        nation = api.nation("testlandia")
+        self.assertFalse(hasattr(nation, "__dict__"))
+        # The nsapiwrapper object is only made when it's needed
+        self.assertIsNone(nation._current_api)
+        self.assertEqual(nation.current_api.nation_name, "testlandia")
+        self.assertIsNone(api.region("lazarus")._current_api)
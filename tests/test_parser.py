@@ -0,0 +1,79 @@
+import unittest
+
+from nationstates_async.objects import response_parser, NSDict
+from nationstates_async.nsapiwrapper.exceptions import NotFound
+from nationstates_async.nsapiwrapper.objects import response_check
+from nationstates_async.nsapiwrapper.utils import parsetree, parse, _parsedict, error_message, beautifulsoup
+
+BeautifulSoup = beautifulsoup()
+
+
+CENSUS_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<NATION id="testlandia">
+  <NAME>Testlandia</NAME>
+  <MOTTO>Tea &amp; biscuits</MOTTO>
+  <CENSUS>
+    <SCALE id="0"><SCORE>1.5</SCORE><RANK>10</RANK></SCALE>
+    <SCALE id="1"><SCORE>2</SCORE><RANK>20</RANK></SCALE>
+  </CENSUS>
+  <ENDORSEMENTS></ENDORSEMENTS>
+  <BANNER id="b1">text <B>child</B></BANNER>
+</NATION>"""
+
+
+class ParserTest(unittest.TestCase):
+
+    def test_matches_xmltodict_tree(self):
+        for dicttype in (dict, NSDict):
+            self.assertEqual(parsetree(CENSUS_XML, dicttype), _parsedict(parse(CENSUS_XML), dicttype))
+
+    def test_tree_shape(self):
+        tree = parsetree(CENSUS_XML, NSDict)
+        nation = tree.nation
+        self.assertIsInstance(nation, NSDict)
+        self.assertEqual(nation.id, "testlandia")
+        self.assertEqual(nation.motto, "Tea & biscuits")
+        self.assertEqual([scale.id for scale in nation.census.scale], ["0", "1"])
+        self.assertIsNone(nation.endorsements)
+        self.assertEqual(nation.banner, {"id": "b1", "b": "child", "text": "text"})
+
+    def test_html_entities(self):
+        response = {"xml": "<NATION><NAME>Caf&eacute; &amp; Co</NAME></NATION>"}
+        self.assertEqual(response_parser(response, False)["nation"]["name"], "Caf\xe9 & Co")
+
+    def test_full_response_lazy_xmltodict(self):
+        response = response_parser({"xml": CENSUS_XML}, True)
+        self.assertTrue(response["data_parse_success"])
+        self.assertNotIn("data_xmltodict", response)
+        self.assertEqual(response["data_xmltodict"]["NATION"]["@id"], "testlandia")
+        self.assertEqual(response.get("data_xmltodict")["NATION"]["NAME"], "Testlandia")
+
+
+NOT_FOUND_PAGE = """<!DOCTYPE html>
+<html><head><title>NationStates | Not Found</title></head>
+<body><div id="content">
+<H1 class="error">Unknown nation: &quot;cte&#39;d nation&quot;.</H1>
+<p>Try <a href="/page=dispatches">something</a> else.</p>
+<h1>Second</h1>
+</div></body></html>"""
+
+
+class ErrorPageTest(unittest.TestCase):
+
+    def test_error_message(self):
+        self.assertEqual(error_message(NOT_FOUND_PAGE), "Unknown nation: \"cte'd nation\".")
+        self.assertEqual(error_message("<h1>Too <b>Many</b>\nRequests</h1 >"), "Too Many\nRequests")
+        self.assertEqual(error_message("no heading"), "")
+        self.assertEqual(error_message(None), "")
+
+    @unittest.skipIf(BeautifulSoup is None, "beautifulsoup4 isn't installed")
+    def test_same_as_beautifulsoup(self):
+        for page in (NOT_FOUND_PAGE, "<h1>Too <b>Many</b> Requests</h1>", "<p><h1 id=x>a &amp; b</h1></p>"):
+            self.assertEqual(error_message(page), BeautifulSoup(page, "html.parser").h1.text)
+        # Unclosed, only BeautifulSoup makes sense of it
+        self.assertEqual(error_message("<h1>Not Found"), "Not Found")
+
+    def test_response_check(self):
+        with self.assertRaises(NotFound) as cm:
+            response_check({"status": 404, "xml": NOT_FOUND_PAGE})
+        self.assertEqual(str(cm.exception), "Unknown nation: \"cte'd nation\".")
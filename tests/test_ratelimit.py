@@ -0,0 +1,124 @@
+import unittest
+import asyncio
+
+import nationstates_async as ns
+from nationstates_async.nsapiwrapper.objects import RateLimit
+
+
+class RateLimitTest(unittest.TestCase):
+
+    def test_wait_time_empty(self):
+        rl = RateLimit(30)
+        self.assertEqual(rl.wait_time(40, now=100), 0)
+
+    def test_wait_time_full(self):
+        rl = RateLimit(30)
+        for i in range(40):
+            rl.record(now=100 + i * 0.25)
+        self.assertEqual(rl.count(now=110), 40)
+        # The oldest request leaves the window at 130
+        self.assertAlmostEqual(rl.wait_time(40, now=110), 20)
+        self.assertEqual(rl.wait_time(40, now=130), 0)
+        self.assertEqual(rl.count(now=130), 39)
+
+    def test_server_feedback(self):
+        rl = RateLimit(30)
+        for i in range(10):
+            rl.record(now=100 + i)
+        # 30 requests from somewhere else on this IP
+        rl.record_xrls(40, now=110)
+        self.assertEqual(rl.count(now=110), 40)
+        # Our own first request expires before the foreign ones
+        self.assertAlmostEqual(rl.wait_time(40, now=111), 19)
+        rl.record_xrls(20, now=111)
+        self.assertEqual(rl.count(now=111), 40)
+        self.assertEqual(rl.count(now=140), 0)
+
+    def test_check_ratelimit_raises(self):
+        api = ns.Nationstates("placeholder", ratelimit_sleep=False, ratelimit_limit=2)
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(api.api.check_ratelimit())
+            loop.run_until_complete(api.api.check_ratelimit())
+            with self.assertRaises(ns.exceptions.RateLimitReached):
+                loop.run_until_complete(api.api.check_ratelimit())
+        finally:
+            loop.close()
+
+
+class RateLimitBackendTest(unittest.TestCase):
+
+    def run_async(self, coro):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coro)
+        finally:
+            loop.close()
+
+    def test_file_backend_shared(self):
+        import os
+        import tempfile
+        from nationstates_async.nsapiwrapper.ratelimiting import FileRateLimit
+
+        async def main():
+            with tempfile.TemporaryDirectory() as folder:
+                path = os.path.join(folder, "ratelimit")
+                first, second = FileRateLimit(path), FileRateLimit(path)
+                self.assertEqual(await first.acquire(3), 0)
+                self.assertEqual(await second.acquire(3), 0)
+                self.assertEqual(await first.acquire(3), 0)
+                self.assertGreater(await second.acquire(3), 0)
+                self.assertEqual(second.count(), 3)
+        self.run_async(main())
+
+    def test_coordinator_backend_shared(self):
+        from nationstates_async.nsapiwrapper.ratelimiting import RateLimitCoordinator, CoordinatorRateLimit
+
+        async def main():
+            coordinator = await RateLimitCoordinator(port=0).start()
+            first = CoordinatorRateLimit(port=coordinator.port)
+            second = CoordinatorRateLimit(port=coordinator.port)
+            try:
+                self.assertEqual(await first.acquire(2), 0)
+                self.assertEqual(await second.acquire(2), 0)
+                self.assertGreater(await first.acquire(2), 0)
+                await second.feedback(5)
+                self.assertEqual(coordinator.rlobj.count(), 5)
+                self.assertEqual(second.count(), 5)
+            finally:
+                await first.close()
+                await second.close()
+                await coordinator.close()
+        self.run_async(main())
+
+    def test_coordinator_bad_input(self):
+        from nationstates_async.nsapiwrapper.ratelimiting import RateLimitCoordinator
+        coordinator = RateLimitCoordinator()
+        self.assertEqual(coordinator._respond("acquire many 30"), "error")
+        self.assertEqual(coordinator._respond("feedback lots"), "error")
+        self.assertEqual(coordinator._respond("acquire 2 soon"), "error")
+        self.assertEqual(coordinator._respond("acquire 2 30").split()[0], "0")
+        self.assertEqual(coordinator.rlobj.count(), 1)
+
+    def test_coordinator_serve_forever_stops(self):
+        from nationstates_async.nsapiwrapper.ratelimiting import RateLimitCoordinator, CoordinatorRateLimit
+
+        async def main():
+            coordinator = await RateLimitCoordinator(port=0).start()
+            serving = asyncio.ensure_future(coordinator.serve_forever())
+            client = CoordinatorRateLimit(port=coordinator.port)
+            try:
+                self.assertEqual(await client.acquire(2), 0)
+                self.assertEqual(client.count(), 1)
+            finally:
+                await client.close()
+                await coordinator.close()
+            await asyncio.wait_for(serving, 1)
+        self.run_async(main())
+
+    def test_api_uses_backend(self):
+        from nationstates_async.nsapiwrapper.objects import RateLimit
+        backend = RateLimit()
+        api = ns.Nationstates("placeholder", ratelimit_backend=backend)
+        self.run_async(api.api.check_ratelimit())
+        self.assertEqual(backend.count(), 1)
@@ -0,0 +1,66 @@
+import unittest
+
+import nationstates_async as ns
+from nationstates_async.exceptions import APIRateLimitBan, InternalServerError
+from nationstates_async.retry import RetryPolicy, RetryBudget
+
+from .helpers import run, FlakyTransport
+
+
+def nationstates(**kwargs):
+    kwargs.setdefault("retry_policy", RetryPolicy(base_delay=0))
+    return ns.Nationstates("placeholder", **kwargs)
+
+
+class RetryTest(unittest.TestCase):
+
+    def test_retries(self):
+        api = nationstates()
+        with FlakyTransport((500, {}), (521, {})) as transport:
+            population = run(api.nation("testlandia").get_shards("population"))
+        self.assertEqual(population["population"], "100")
+        self.assertEqual(len(transport.urls), 3)
+
+    def test_per_error_budget(self):
+        api = nationstates(retry_policy=RetryPolicy(base_delay=0, budgets={InternalServerError: 1}))
+        with FlakyTransport((500, {}), (500, {})) as transport:
+            with self.assertRaises(InternalServerError):
+                run(api.nation("testlandia").get_shards("population"))
+        self.assertEqual(len(transport.urls), 2)
+
+    def test_no_retry(self):
+        api = ns.Nationstates("placeholder", do_retry=False)
+        self.assertIsNone(api.retry_policy)
+        with FlakyTransport((500, {})) as transport:
+            with self.assertRaises(InternalServerError):
+                run(api.nation("testlandia").get_shards("population"))
+        self.assertEqual(len(transport.urls), 1)
+
+    def test_retry_after(self):
+        api = nationstates()
+        with FlakyTransport((429, {"X-Retry-After": "0"})) as transport:
+            run(api.nation("testlandia").get_shards("population"))
+        self.assertEqual(len(transport.urls), 2)
+
+    def test_long_retry_after(self):
+        api = nationstates()
+        with FlakyTransport((429, {"X-Retry-After": "900"})) as transport:
+            with self.assertRaises(APIRateLimitBan) as cm:
+                run(api.nation("testlandia").get_shards("population"))
+        self.assertEqual(cm.exception.retry_after, 900)
+        self.assertEqual(len(transport.urls), 1)
+
+    def test_global_budget(self):
+        budget = RetryBudget(minimum=1, ratio=0)
+        api = nationstates(retry_policy=RetryPolicy(base_delay=0, budget=budget))
+        with FlakyTransport((500, {}), (500, {})) as transport:
+            with self.assertRaises(InternalServerError):
+                run(api.nation("testlandia").get_shards("population"))
+        self.assertEqual(len(transport.urls), 2)
+
+    def test_backoff(self):
+        policy = RetryPolicy(base_delay=1, max_delay=5, jitter=0)
+        self.assertEqual([policy.backoff(n) for n in range(5)], [1, 2, 4, 5, 5])
+        policy.jitter = 0.5
+        for _ in range(100):
+            self.assertTrue(2 <= policy.backoff(2) <= 4)
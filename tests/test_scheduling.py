@@ -0,0 +1,168 @@
+import unittest
+import asyncio
+
+from nationstates_async.nsapiwrapper import Api
+from nationstates_async.nsapiwrapper.exceptions import DeadlineExceeded
+from nationstates_async.nsapiwrapper.scheduling import Scheduler, Schedule
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+class SlotLimitTest(unittest.TestCase):
+
+    def test_gate_limit(self):
+        async def main():
+            gate = Scheduler(2)
+            await gate.acquire()
+            await gate.acquire()
+            waiter = asyncio.ensure_future(gate.acquire())
+            await asyncio.sleep(0)
+            self.assertFalse(waiter.done())
+            self.assertEqual(gate.queue_depth, 1)
+            gate.release()
+            await waiter
+            self.assertEqual(gate.active, 2)
+            self.assertEqual(gate.queue_depth, 0)
+        run(main())
+
+    def test_gate_order(self):
+        async def main():
+            gate = Scheduler(1)
+            await gate.acquire()
+            order = []
+
+            async def worker(name, priority):
+                async with gate.slot(priority):
+                    order.append(name)
+
+            tasks = [asyncio.ensure_future(worker(n, p)) for n, p in
+                     (("bulk1", 20), ("bulk2", 20), ("auth", 0), ("default", 10))]
+            await asyncio.sleep(0)
+            gate.release()
+            await asyncio.gather(*tasks)
+            self.assertEqual(order, ["auth", "default", "bulk1", "bulk2"])
+        run(main())
+
+    def test_gate_resize(self):
+        async def main():
+            gate = Scheduler(1)
+            await gate.acquire()
+            waiters = [asyncio.ensure_future(gate.acquire()) for _ in range(3)]
+            await asyncio.sleep(0)
+            gate.limit = 4
+            await asyncio.gather(*waiters)
+            self.assertEqual(gate.active, 4)
+        run(main())
+
+    def test_gate_cancel(self):
+        async def main():
+            gate = Scheduler(1)
+            await gate.acquire()
+            waiter = asyncio.ensure_future(gate.acquire())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.sleep(0)
+            self.assertEqual(gate.queue_depth, 0)
+            gate.release()
+            self.assertEqual(gate.active, 0)
+        run(main())
+
+
+class SchedulerTest(unittest.TestCase):
+
+    def test_weights(self):
+        async def main():
+            scheduler = Scheduler(1)
+            scheduler.add_queue("heavy", weight=3, priority=20)
+            scheduler.add_queue("light", weight=1, priority=20)
+            await scheduler.acquire()
+            order = []
+
+            async def worker(name):
+                async with scheduler.slot(name):
+                    order.append(name)
+
+            tasks = [asyncio.ensure_future(worker(name)) for name in ["light"] * 4 + ["heavy"] * 12]
+            await asyncio.sleep(0)
+            scheduler.release()
+            await asyncio.gather(*tasks)
+            # Three heavy turns for every light one while both have work
+            self.assertEqual(order[:8].count("heavy"), 6)
+            self.assertEqual(order[:16].count("light"), 4)
+        run(main())
+
+    def test_unknown_queue(self):
+        scheduler = Scheduler(1)
+        with self.assertRaises(KeyError):
+            scheduler.queue("nope")
+        self.assertEqual(scheduler.queue(5).name, "priority-5")
+        self.assertEqual(scheduler.queue(0).name, "interactive")
+
+    def test_deadline(self):
+        async def main():
+            scheduler = Scheduler(1)
+            await scheduler.acquire()
+            loop = asyncio.get_event_loop()
+            with self.assertRaises(DeadlineExceeded):
+                await scheduler.acquire("bulk", deadline=loop.time() + 0.01)
+            self.assertEqual(scheduler.queue_depth, 0)
+            scheduler.release()
+            self.assertEqual(scheduler.active, 0)
+        run(main())
+
+
+class ApiSchedulingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.api = Api("test", ratelimit_sleep=True, ratelimit_max=1, ratelimit_within=0.02)
+
+    def test_interactive_first(self):
+        async def main():
+            order = []
+
+            async def worker(name, priority):
+                async with self.api.slot(priority):
+                    order.append(name)
+
+            # Everything is waiting on the rate limit, not on a slot
+            tasks = [asyncio.ensure_future(worker("bulk", "bulk")) for _ in range(4)]
+            await asyncio.sleep(0)
+            tasks.append(asyncio.ensure_future(worker("interactive", Schedule("interactive"))))
+            await asyncio.gather(*tasks)
+            # The second bulk request was already waiting on the rate limit,
+            # the interactive one goes right after it
+            self.assertEqual(order, ["bulk", "bulk", "interactive", "bulk", "bulk"])
+        run(main())
+
+    def test_deadline_and_stats(self):
+        async def main():
+            async with self.api.slot("bulk"):
+                pass
+            with self.assertRaises(DeadlineExceeded):
+                async with self.api.slot(Schedule("bulk", deadline=0.001)):
+                    pass
+            stats = self.api.queue_stats()["bulk"]
+            self.assertEqual(stats["served"], 1)
+            self.assertEqual(stats["expired"], 1)
+            self.assertEqual(stats["waiting"], 0)
+            self.assertEqual(self.api.gate.active, 0)
+            self.assertEqual(self.api.turn.active, 0)
+        run(main())
+
+    def test_ratelimit_taken_with_slot(self):
+        async def main():
+            self.api.max_ongoing_requests = 1
+            async with self.api.slot("bulk"):
+                # Expires waiting for the slot, it never counts against the rate limit
+                with self.assertRaises(DeadlineExceeded):
+                    async with self.api.slot(Schedule("bulk", deadline=0.01)):
+                        pass
+                self.assertEqual(self.api.rlobj.count(), 1)
+            self.assertEqual(self.api.gate.active, 0)
+        run(main())
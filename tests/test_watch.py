@@ -0,0 +1,79 @@
+import unittest
+
+import nationstates_async as ns
+from nationstates_async.retry import RetryPolicy
+
+from .helpers import FakeTransport, FlakyTransport, run
+
+
+def region_xml(delegate="a", nations="a:b:c", officers=("a",), embassies=("Lazarus",)):
+    return ('<REGION id="testregionia"><DELEGATE>{}</DELEGATE><NATIONS>{}</NATIONS>'
+            '<OFFICERS>{}</OFFICERS><EMBASSIES>{}</EMBASSIES></REGION>').format(
+        delegate, nations,
+        "".join("<OFFICER><NATION>{}</NATION><OFFICE>Minister</OFFICE></OFFICER>".format(o) for o in officers),
+        "".join("<EMBASSY>{}</EMBASSY>".format(e) for e in embassies))
+
+
+class WatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.api = ns.Nationstates("placeholder")
+        self.watcher = self.api.region("testregionia").watch(["delegate", "nations", "officers", "embassies"])
+
+    def check(self, xml):
+        with FakeTransport(xml) as transport:
+            changes = run(self.watcher.check())
+        self.assertEqual(len(transport.urls), 1)
+        return {change.shard: change for change in changes}
+
+    def test_first_check_is_baseline(self):
+        self.assertEqual(self.check(region_xml()), {})
+        self.assertEqual(self.check(region_xml()), {})
+
+    def test_unchanged_response_isnt_parsed(self):
+        self.check(region_xml())
+        parsed = []
+        original = self.watcher.compare
+        self.watcher.compare = lambda data: parsed.append(data) or original(data)
+        self.check(region_xml())
+        self.assertEqual(parsed, [])
+        self.check(region_xml(delegate="b"))
+        self.assertEqual(len(parsed), 1)
+
+    def test_changes(self):
+        self.check(region_xml())
+        changes = self.check(region_xml(delegate="b", nations="a:b:d:e", officers=("a", "b"),
+                                        embassies=("Lazarus",)))
+        self.assertEqual(sorted(changes), ["delegate", "nations", "officers"])
+        self.assertEqual((changes["delegate"].old, changes["delegate"].new), ("a", "b"))
+        self.assertEqual((changes["nations"].added, changes["nations"].removed), (["d", "e"], ["c"]))
+        self.assertEqual(changes["officers"].added, [{"nation": "b", "office": "Minister"}])
+        self.assertEqual(changes["officers"].removed, [])
+        # A single embassy parses as a string, several as a list
+        changes = self.check(region_xml(delegate="b", nations="a:b:d:e", officers=("a", "b"),
+                                        embassies=("Lazarus", "Osiris")))
+        self.assertEqual(list(changes), ["embassies"])
+        self.assertEqual(changes["embassies"].added, ["Osiris"])
+
+    def test_reordering_isnt_a_change(self):
+        self.check(region_xml(embassies=("Lazarus", "Osiris")))
+        changes = self.check(region_xml(nations="c:a:b", officers=("a",), embassies=("Osiris", "Lazarus")))
+        self.assertEqual(changes, {})
+
+    def test_shard_disappears(self):
+        self.check(region_xml())
+        changes = self.check('<REGION id="testregionia"><DELEGATE>a</DELEGATE><NATIONS>a:b:c</NATIONS>'
+                             '<EMBASSIES><EMBASSY>Lazarus</EMBASSY></EMBASSIES></REGION>')
+        self.assertEqual(list(changes), ["officers"])
+        self.assertEqual(changes["officers"].old, [{"nation": "a", "office": "Minister"}])
+        self.assertIsNone(changes["officers"].new)
+
+    def test_server_errors_are_retried(self):
+        api = ns.Nationstates("placeholder", retry_policy=RetryPolicy(base_delay=0))
+        watcher = api.region("testregionia").watch(["delegate"])
+        transport = FlakyTransport((500, {}), (521, {}))
+        transport.xml = region_xml()
+        with transport:
+            self.assertEqual(run(watcher.check()), [])
+        self.assertEqual(len(transport.urls), 3)
+        self.assertIsNotNone(watcher.snapshot)